@@ -1,5 +1,7 @@
 from swift_vo.base.api import app
+from swift_vo.metrics import api as metrics_api
 from swift_vo.objobssap import api
+from swift_vo.observablesky import api as observablesky_api
 from swift_vo.vosi import api as vosi_api
 
-__all__ = ["api", "app", "vosi_api"]
+__all__ = ["api", "app", "metrics_api", "observablesky_api", "vosi_api"]
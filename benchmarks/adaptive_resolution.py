@@ -0,0 +1,100 @@
+"""
+Benchmark of adaptive resolution visibility queries against high resolution
+queries over the whole range.
+
+The upstream service is stood in for by the local visibility engine: high
+resolution queries apply the Sun, Moon and Earth limb constraints at 1 minute
+steps, like the upstream service, and low resolution queries apply the Sun
+and Moon constraints at 30 minute steps. For 7 and 30 day ranges, and a few
+targets and MIN_OBS values, it prints the share of the high resolution time
+that adaptive resolution still queries (the bulk of the upstream cost), the
+number of upstream queries, and the largest difference between the windows
+of both approaches. Timings of the stand-in are not printed, as they do not
+reflect the cost of the upstream service.
+
+Usage: python benchmarks/adaptive_resolution.py
+"""
+
+import asyncio
+from datetime import timedelta
+
+import numpy as np
+from astropy.time import Time  # type: ignore[import-untyped]
+
+from swift_vo.objobssap import service
+from swift_vo.objobssap.cache import window_cache
+from swift_vo.objobssap.service import MJD_EPOCH, ObjObsSAPService, datetime64_to_mjd
+from swift_vo.visibility.constraints import mask_to_windows, observable_mask, radec_to_vectors
+from swift_vo.visibility.ephemeris import compute_ephemeris
+from swift_vo.visibility.orbit import TLE
+
+SWIFT_TLE = TLE.from_lines(
+    "1 28485U 04047A   26291.50000000  .00005000  00000-0  20000-3 0  9990",
+    "2 28485  20.5560 123.4567 0005000 234.5678 125.4321 15.30000000 10000",
+)
+HIRES_STEP = 60  # seconds
+LORES_STEP = 1800  # seconds
+TARGETS = {
+    "Crab": (83.63, 22.01),
+    "Galactic centre": (266.42, -29.01),
+    "NEP": (270.0, 66.56),
+    "Near the Sun": (215.0, -14.0),
+}
+
+
+class LocalUpstream:
+    """Stand-in for ``fetch_upstream_bounds`` using the local visibility engine."""
+
+    def __init__(self):
+        self.hires_time = timedelta(0)
+        self.queries = 0
+
+    def __call__(self, s_ra, s_dec, begin, end, hires=True, timeout=None):
+        """Compute the windows of a query, counting the time queried at high resolution."""
+        self.queries += 1
+        step = HIRES_STEP if hires else LORES_STEP
+        if hires:
+            self.hires_time += end - begin
+        start, stop = datetime64_to_mjd(np.array([begin, end], dtype="datetime64[us]"))
+        mjd = np.arange(start, stop, step / 86400)
+        ephemeris = compute_ephemeris(mjd, SWIFT_TLE if hires else None)
+        mask = observable_mask(radec_to_vectors(s_ra, s_dec), ephemeris)[:, 0]
+        t_start, t_stop = mask_to_windows(mask, mjd, step)
+        to_datetime64 = lambda values: MJD_EPOCH + np.round(values * 86400e6).astype("timedelta64[us]")  # noqa: E731
+        return to_datetime64(t_start), to_datetime64(np.minimum(t_stop, stop))
+
+
+async def run(ra, dec, days, min_obs, adaptive):
+    """Run one query, returning its windows and the stand-in upstream service."""
+    upstream = LocalUpstream()
+    service.fetch_upstream_bounds = upstream
+    window_cache.clear()
+    today = int(Time.now().mjd)
+    vo = ObjObsSAPService(ra, dec, today, today + days, min_obs, adaptive=adaptive)
+    await vo.query()
+    return np.array(vo.windows).reshape(-1, 2), upstream
+
+
+def difference(windows, reference) -> str:
+    """Largest difference between the boundaries of two sets of windows, in seconds."""
+    if windows.shape != reference.shape:
+        return f"{len(windows)} windows instead of {len(reference)}"
+    return f"{86400 * np.abs(windows - reference).max(initial=0):.0f} s"
+
+
+async def main() -> None:
+    """Run the benchmark for 7 and 30 day ranges."""
+    print(f"{'target':<16}{'days':>5}{'min_obs':>8}{'hires queried':>15}{'queries':>9}  max difference")
+    for days in (7, 30):
+        for name, (ra, dec) in TARGETS.items():
+            for min_obs in (0, 1500):
+                reference, full = await run(ra, dec, days, min_obs, adaptive=False)
+                windows, adaptive = await run(ra, dec, days, min_obs, adaptive=True)
+                print(
+                    f"{name:<16}{days:>5}{min_obs:>8}{100 * adaptive.hires_time / full.hires_time:>14.0f}%"
+                    f"{adaptive.queries:>9}  {difference(windows, reference)}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
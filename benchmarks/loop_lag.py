@@ -0,0 +1,60 @@
+"""
+Benchmark of event loop lag while large VOTables are rendered.
+
+Renders several large ObjObsSAP results concurrently while sampling the event
+loop lag, once with serialization on the event loop and once with it offloaded
+to the CPU pool, and prints the lag statistics of both runs.
+
+Usage: python benchmarks/loop_lag.py [n_windows] [n_requests]
+"""
+
+import asyncio
+import sys
+import time
+
+from swift_vo import constants
+from swift_vo.base.executor import shutdown_cpu_executor
+from swift_vo.base.monitor import LoopLagMonitor
+from swift_vo.objobssap.service import ObjObsSAPService
+
+
+def make_service(n_windows: int) -> ObjObsSAPService:
+    """Return a service holding ``n_windows`` synthetic windows."""
+    service = ObjObsSAPService(10.5, 20.3, 60000, 60030, 0)
+    service.windows = [(60000 + i * 0.01, 60000 + i * 0.01 + 0.005) for i in range(n_windows)]
+    return service
+
+
+async def run(n_windows: int, n_requests: int) -> dict:
+    """Render ``n_requests`` results concurrently and return the loop lag statistics."""
+    services = [make_service(n_windows) for _ in range(n_requests)]
+    monitor = LoopLagMonitor(interval=0.005, window=100_000)
+    monitor.start()
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(service.vo_format() for service in services))
+    elapsed = time.perf_counter() - start
+    # Let the monitor observe the lag of a loop that was blocked until now
+    await asyncio.sleep(2 * monitor.interval)
+    await monitor.stop()
+    return {"elapsed_s": elapsed, **monitor.stats()}
+
+
+def main() -> None:
+    """Run the benchmark with serialization inline and offloaded to each pool type."""
+    n_windows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    for label, threshold, executor in (
+        ("inline", sys.maxsize, "thread"),
+        ("thread", 0, "thread"),
+        ("process", 0, "process"),
+    ):
+        constants.CPU_OFFLOAD_THRESHOLD = threshold
+        constants.CPU_OFFLOAD_EXECUTOR = executor
+        stats = asyncio.run(run(n_windows, n_requests))
+        shutdown_cpu_executor()
+        print(f"{label:>8}: " + ", ".join(f"{key}={value:.1f}" for key, value in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark of multi-target visibility evaluation.
+
+Computes one day of visibility windows at 1 minute steps, with the Earth limb
+constraint, for increasing numbers of random targets evaluated together, and
+for a few targets evaluated one at a time with their own ephemeris, and
+prints the throughput of both in targets per second.
+
+Usage: python benchmarks/multi_target.py
+"""
+
+import time
+
+import numpy as np
+
+from swift_vo.visibility.constraints import mask_to_windows, observable_mask, radec_to_vectors
+from swift_vo.visibility.ephemeris import compute_ephemeris
+from swift_vo.visibility.orbit import TLE
+from swift_vo.visibility.targets import target_windows
+
+SWIFT_TLE = TLE.from_lines(
+    "1 28485U 04047A   26291.50000000  .00005000  00000-0  20000-3 0  9990",
+    "2 28485  20.5560 123.4567 0005000 234.5678 125.4321 15.30000000 10000",
+)
+
+
+def random_targets(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``n`` targets distributed uniformly over the sky."""
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 360, n), np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+
+
+def one_at_a_time(ra: np.ndarray, dec: np.ndarray, mjd: np.ndarray) -> None:
+    """Evaluate each target with its own ephemeris, as separate queries would."""
+    for target_ra, target_dec in zip(ra, dec, strict=True):
+        ephemeris = compute_ephemeris(mjd, SWIFT_TLE)
+        mask_to_windows(observable_mask(radec_to_vectors(target_ra, target_dec), ephemeris)[:, 0], mjd, 60)
+
+
+def main() -> None:
+    """Run the benchmark for up to 50k targets."""
+    mjd = SWIFT_TLE.epoch + np.arange(1440) / 1440
+    for n_targets in (10, 1_000, 10_000, 50_000):
+        ra, dec = random_targets(n_targets)
+        start = time.perf_counter()
+        target_windows(ra, dec, mjd, 60, SWIFT_TLE)
+        elapsed = time.perf_counter() - start
+        print(f"{n_targets:>6} targets together:     {n_targets / elapsed:>9.0f} targets/s")
+    ra, dec = random_targets(10)
+    start = time.perf_counter()
+    one_at_a_time(ra, dec, mjd)
+    print(f"{10:>6} targets one at a time: {10 / (time.perf_counter() - start):>9.0f} targets/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark of the ObjObsSAP response formats.
+
+Serializes the same synthetic result in every RESPONSEFORMAT and prints the
+serialization time and payload size of each, for increasing result sizes.
+
+Usage: python benchmarks/output_formats.py
+"""
+
+import asyncio
+import time
+
+from swift_vo import constants
+from swift_vo.objobssap.formats import pa
+from swift_vo.objobssap.service import ObjObsSAPService
+
+FORMATS = ["votable", "csv", "json"] + (["arrow", "parquet"] if pa is not None else [])
+
+
+def make_service(n_windows: int) -> ObjObsSAPService:
+    """Return a service holding ``n_windows`` synthetic windows."""
+    service = ObjObsSAPService(10.5, 20.3, 60000, 60030, 0)
+    service.windows = [(60000 + i * 0.0123456789, 60000 + i * 0.0123456789 + 0.004) for i in range(n_windows)]
+    return service
+
+
+async def measure(service: ObjObsSAPService, response_format: str, repeat: int = 3) -> tuple[float, int]:
+    """Return the best serialization time in seconds and the payload size in bytes."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        content, _ = await service.format(response_format)
+        best = min(best, time.perf_counter() - start)
+    size = len(content.encode() if isinstance(content, str) else content)
+    return best, size
+
+
+def main() -> None:
+    """Run the benchmark for 100 to 100k windows."""
+    # Serialize inline, so that only the serialization itself is timed
+    constants.CPU_OFFLOAD_THRESHOLD = 1 << 62
+    for n_windows in (100, 10_000, 100_000):
+        service = make_service(n_windows)
+        for response_format in FORMATS:
+            elapsed, size = asyncio.run(measure(service, response_format))
+            print(
+                f"{n_windows:>7} windows {response_format:>8}: {1000 * elapsed:9.2f} ms, "
+                f"{size / 1024:9.1f} KiB ({size / n_windows:6.1f} B/window)"
+            )
+
+
+if __name__ == "__main__":
+    main()
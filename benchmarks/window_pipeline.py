@@ -0,0 +1,67 @@
+"""
+Benchmark of the window pipeline, from upstream windows to VOTable rows.
+
+Times and traces allocations of each stage (collecting upstream entries into
+arrays, conversion and filtering, VOTable serialization) for increasing
+numbers of windows, and prints the cost per window.
+
+Usage: python benchmarks/window_pipeline.py
+"""
+
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from swift_vo.objobssap.service import ObjObsSAPService, bounds_to_windows, entries_to_bounds
+
+
+class Entry:
+    """Stand-in for an upstream visibility window."""
+
+    def __init__(self, begin: datetime, end: datetime):
+        self.begin = begin
+        self.end = end
+
+
+def measure(func, *args):
+    """
+    Return the result, elapsed seconds and peak allocated bytes of
+    ``func(*args)``. Allocations are traced in a second call, so that tracing
+    does not inflate the timing.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    """Run the benchmark for 1k to 100k windows."""
+    origin = datetime(2026, 1, 1)
+    for n_windows in (1_000, 10_000, 100_000):
+        entries = [
+            Entry(origin + timedelta(minutes=10 * i), origin + timedelta(minutes=10 * i + 5))
+            for i in range(n_windows)
+        ]
+        service = ObjObsSAPService(10.5, 20.3, 60000, 60030, 0)
+        (begin, end), t_collect, m_collect = measure(entries_to_bounds, entries)
+        windows, t_convert, m_convert = measure(bounds_to_windows, begin, end, 60)
+        service.t_start, service.t_stop, _ = windows
+        _, t_format, m_format = measure(service._vo_format)
+        for stage, elapsed, peak in (
+            ("collect", t_collect, m_collect),
+            ("convert", t_convert, m_convert),
+            ("format", t_format, m_format),
+        ):
+            print(
+                f"{n_windows:>7} windows {stage:>8}: {1e6 * elapsed / n_windows:8.3f} us/window, "
+                f"{peak / n_windows:8.1f} B/window"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Admission control and per-client concurrency limits."""
+
+import asyncio
+import math
+import time
+from collections import Counter, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import Request
+
+from ..constants import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_PER_CLIENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_TRUSTED_PROXIES,
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted, telling the client when to retry."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+def client_id(request: Request, trusted_proxies: int = ADMISSION_TRUSTED_PROXIES) -> str:
+    """
+    Identify the client a request comes from. The service runs behind
+    ``trusted_proxies`` proxies, each appending the address it received the
+    request from to X-Forwarded-For, so the client is the address that many
+    entries from the end. Entries before it are set by the client itself and
+    are ignored. Without a trusted proxy, the peer address is used.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and trusted_proxies > 0:
+        addresses = [address.strip() for address in forwarded.split(",")]
+        return addresses[max(0, len(addresses) - trusted_proxies)]
+    return request.client.host if request.client is not None else "unknown"
+
+
+class AdmissionController:
+    """
+    Limits the number of requests running at once, both globally and per
+    client. Requests over the limit wait in a bounded queue for at most
+    ``queue_timeout`` seconds; when the queue is full, or the client already
+    has as many requests queued as it may run, the request is rejected at once
+    with an estimate of when to retry.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_per_client: int = ADMISSION_MAX_PER_CLIENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ):
+        """
+        This method initializes the controller.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.active_per_client: Counter[str] = Counter()
+        self.waiting_per_client: Counter[str] = Counter()
+        self.rejected = 0
+        self.mean_hold_time = 1.0  # seconds, exponentially weighted
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+
+    def _can_admit(self, client: str) -> bool:
+        """Whether a request from ``client`` fits within the limits right now."""
+        return self.active < self.max_concurrent and self.active_per_client[client] < self.max_per_client
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting in the queue."""
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Estimate, in whole seconds, how long until a queued request would be served."""
+        drain_time = self.mean_hold_time * (self.waiting + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(drain_time))
+
+    def _reject(self, message: str) -> AdmissionRejected:
+        """Record and build a rejection."""
+        self.rejected += 1
+        return AdmissionRejected(message, self.retry_after())
+
+    async def acquire(self, client: str, deadline: float | None = None) -> None:
+        """
+        Wait for a slot for ``client``, or raise AdmissionRejected. Requests
+        wait in the queue until ``queue_timeout`` or, if sooner, their
+        ``deadline`` (a ``time.monotonic()`` time).
+        """
+        if not self._waiters and self._can_admit(client):
+            self._admit(client)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("Service is at capacity, please retry later.")
+        if self.waiting_per_client[client] >= self.max_per_client:
+            raise self._reject("Too many concurrent requests from this client, please retry later.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (client, waiter)
+        self._waiters.append(entry)
+        self.waiting_per_client[client] += 1
+        # Queued requests of clients at their own limit must not hold up other clients
+        self._wake()
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except TimeoutError:
+            if waiter.done():
+                # Admitted just as the deadline expired
+                return
+            waiter.cancel()
+            raise self._reject("Timed out waiting for a free slot, please retry later.") from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(client, 0.0)
+            waiter.cancel()
+            raise
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+            self.waiting_per_client[client] -= 1
+            if not self.waiting_per_client[client]:
+                del self.waiting_per_client[client]
+
+    def _admit(self, client: str) -> None:
+        """Account for an admitted request."""
+        self.active += 1
+        self.active_per_client[client] += 1
+
+    def _wake(self) -> None:
+        """Hand free slots to queued requests, in arrival order, skipping clients at their limit."""
+        for entry in list(self._waiters):
+            client, waiter = entry
+            if waiter.done():
+                continue
+            if self.active >= self.max_concurrent:
+                break
+            if self._can_admit(client):
+                self._waiters.remove(entry)
+                self._admit(client)
+                waiter.set_result(None)
+
+    def release(self, client: str, hold_time: float) -> None:
+        """Free the slot held by ``client`` and hand it on to a queued request."""
+        self.active -= 1
+        self.active_per_client[client] -= 1
+        if not self.active_per_client[client]:
+            del self.active_per_client[client]
+        self.mean_hold_time = 0.9 * self.mean_hold_time + 0.1 * hold_time
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(
+        self, client: str, exempt: bool = False, deadline: float | None = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold a slot for ``client`` for the duration of the context, waiting
+        for one no later than ``deadline``. Exempt requests (such as cache
+        hits) are never queued or rejected.
+        """
+        if exempt:
+            yield
+            return
+        await self.acquire(client, deadline)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(client, time.monotonic() - start)
+
+    def stats(self) -> dict[str, int | float]:
+        """Current load and rejection counters."""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "clients": len(self.active_per_client),
+            "mean_hold_time_s": self.mean_hold_time,
+        }
+
+
+admission_controller = AdmissionController()
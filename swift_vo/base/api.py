@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from urllib.parse import parse_qsl, urlencode
 
 from fastapi import FastAPI, Request
@@ -5,6 +6,34 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from .. import __version__  # type: ignore
 from ..constants import VO_ROOT_PATH
+from ..objobssap.subscriptions import subscription_registry
+from .executor import shutdown_cpu_executor, shutdown_upstream_executor
+from .health import health_monitor
+from .monitor import loop_lag_monitor
+from .watchdog import loop_stall_watchdog
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the background monitors and the refreshing of subscribed windows
+    when the application starts, and stop them (and the CPU offload and
+    upstream pools) when it shuts down.
+    """
+    loop_lag_monitor.start()
+    loop_stall_watchdog.start()
+    health_monitor.start()
+    subscription_registry.start()
+    try:
+        yield
+    finally:
+        await subscription_registry.stop()
+        await health_monitor.stop()
+        await loop_stall_watchdog.stop()
+        await loop_lag_monitor.stop()
+        shutdown_cpu_executor()
+        shutdown_upstream_executor()
+
 
 app = FastAPI(
     title="Swift VO",
@@ -15,6 +44,7 @@ app = FastAPI(
     },
     root_path=VO_ROOT_PATH,
     version=__version__,
+    lifespan=lifespan,
 )
 
 
@@ -0,0 +1,100 @@
+"""Offloading of CPU-bound and blocking work from the event loop."""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from .. import constants
+
+_cpu_executor: Executor | None = None
+_upstream_executor: ThreadPoolExecutor | None = None
+
+# Counters of how CPU-bound and upstream calls were dispatched, reported by the metrics endpoint
+offload_stats = {"inline": 0, "offloaded": 0, "upstream": 0}
+
+
+def get_cpu_executor() -> Executor:
+    """
+    Return the shared pool used for CPU-bound work, creating it on first use.
+
+    The pool type is selected by ``CPU_OFFLOAD_EXECUTOR``. A thread pool keeps
+    the event loop responsive (the loop regains the GIL at every switch
+    interval), while a process pool also gives true parallelism at the price
+    of pickling arguments and results.
+    """
+    global _cpu_executor
+    if _cpu_executor is None:
+        if constants.CPU_OFFLOAD_EXECUTOR == "process":
+            _cpu_executor = ProcessPoolExecutor(max_workers=constants.CPU_OFFLOAD_MAX_WORKERS)
+        elif constants.CPU_OFFLOAD_EXECUTOR == "thread":
+            _cpu_executor = ThreadPoolExecutor(
+                max_workers=constants.CPU_OFFLOAD_MAX_WORKERS, thread_name_prefix="swift-vo-cpu"
+            )
+        else:
+            raise ValueError(
+                f"Unknown CPU offload executor: {constants.CPU_OFFLOAD_EXECUTOR}. "
+                "Expected 'thread' or 'process'."
+            )
+    return _cpu_executor
+
+
+def shutdown_cpu_executor() -> None:
+    """Shut down the shared CPU pool, if it was started."""
+    global _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any, size: int = 0, **kwargs: Any) -> Any:
+    """
+    Run a CPU-bound callable without stalling the event loop.
+
+    Work whose ``size`` (typically a number of windows) is below
+    ``CPU_OFFLOAD_THRESHOLD`` runs inline, as handing it to a pool would cost
+    more than the work itself. Larger work runs in the shared CPU pool. When a
+    process pool is configured, ``func`` and its arguments must be picklable.
+    """
+    if size < constants.CPU_OFFLOAD_THRESHOLD:
+        offload_stats["inline"] += 1
+        return func(*args, **kwargs)
+
+    offload_stats["offloaded"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), partial(func, *args, **kwargs))
+
+
+def get_upstream_executor() -> ThreadPoolExecutor:
+    """
+    Return the pool used for calls to the upstream visibility service,
+    creating it on first use. It is kept apart from the CPU pool so that slow
+    upstream calls cannot hold up serialization work, and is bounded by
+    ``UPSTREAM_MAX_WORKERS``.
+    """
+    global _upstream_executor
+    if _upstream_executor is None:
+        _upstream_executor = ThreadPoolExecutor(
+            max_workers=constants.UPSTREAM_MAX_WORKERS, thread_name_prefix="swift-vo-upstream"
+        )
+    return _upstream_executor
+
+
+def shutdown_upstream_executor() -> None:
+    """Shut down the upstream pool, if it was started."""
+    global _upstream_executor
+    if _upstream_executor is not None:
+        _upstream_executor.shutdown(wait=False, cancel_futures=True)
+        _upstream_executor = None
+
+
+async def run_upstream(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking call to the upstream service in the upstream pool. The
+    whole call, including building the request and parsing the response,
+    runs off the event loop.
+    """
+    offload_stats["upstream"] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_upstream_executor(), partial(func, *args, **kwargs))
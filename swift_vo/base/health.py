@@ -0,0 +1,177 @@
+"""Background health checks behind VOSI availability."""
+
+import asyncio
+import contextlib
+import time
+from datetime import UTC, datetime, timedelta
+
+from vo_models.vosi.availability import Availability
+
+from ..constants import (
+    HEALTH_CHECK_INTERVAL,
+    HEALTH_MAX_LOOP_LAG,
+    HEALTH_PROBE_FAILURES,
+    HEALTH_PROBE_INTERVAL,
+    HEALTH_PROBE_TIMEOUT,
+)
+from ..objobssap.cache import window_cache
+from ..objobssap.service import fetch_upstream_bounds
+from .admission import admission_controller
+from .executor import run_upstream
+from .monitor import loop_lag_monitor
+
+
+def probe_upstream(timeout: float) -> bool:
+    """
+    Ask the upstream service for one day of low resolution visibility of a
+    fixed position, giving up on the HTTP request after ``timeout`` seconds.
+    This blocks, so it is run in the upstream pool.
+    """
+    begin = datetime.now(UTC).replace(tzinfo=None)
+    bounds = fetch_upstream_bounds(0.0, 0.0, begin, begin + timedelta(days=1), hires=False, timeout=timeout)
+    return bounds is not None
+
+
+class HealthMonitor:
+    """
+    Periodically works out whether this worker can serve queries: it probes
+    the upstream visibility service with a cheap canned query, and checks the
+    event loop lag and the admission control load. The resulting VOSI
+    availability document is rendered once per check, so that serving it
+    costs nothing per request.
+    """
+
+    def __init__(
+        self,
+        check_interval: float = HEALTH_CHECK_INTERVAL,
+        probe_interval: float = HEALTH_PROBE_INTERVAL,
+        probe_timeout: float = HEALTH_PROBE_TIMEOUT,
+        max_failures: int = HEALTH_PROBE_FAILURES,
+        max_loop_lag: float = HEALTH_MAX_LOOP_LAG,
+    ):
+        """
+        This method initializes the monitor. Until the first check the
+        service is reported available since start up.
+        """
+        self.check_interval = check_interval
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.max_failures = max_failures
+        self.max_loop_lag = max_loop_lag
+        self.up_since = datetime.now(UTC)
+        self.available = True
+        self.notes: list[str] = []
+        self.back_at: datetime | None = None
+        self.failures = 0
+        self.last_probe: datetime | None = None
+        self.last_probe_ok: bool | None = None
+        self.probe_latency: float | None = None
+        self._next_probe = 0.0
+        self._task: asyncio.Task | None = None
+        self._probe_task: asyncio.Task | None = None
+        self.availability_xml = self._render()
+
+    async def probe(self) -> bool:
+        """
+        Probe the upstream service, recording whether it answered within the
+        timeout.
+        """
+        start = time.monotonic()
+        try:
+            ok = await asyncio.wait_for(run_upstream(probe_upstream, self.probe_timeout), self.probe_timeout)
+        except Exception:
+            # Whatever the failure, the upstream service cannot answer queries
+            ok = False
+        self.record_probe(ok, time.monotonic() - start)
+        return ok
+
+    def record_probe(self, ok: bool, latency: float) -> None:
+        """Record the outcome of an upstream probe."""
+        self.last_probe = datetime.now(UTC)
+        self.last_probe_ok = ok
+        self.probe_latency = latency
+        self.failures = 0 if ok else self.failures + 1
+
+    def evaluate(self) -> None:
+        """
+        Derive the availability, explanatory notes and an estimate of when the
+        service will be back from the latest probes and load, and render the
+        VOSI availability document.
+        """
+        now = datetime.now(UTC)
+        notes = []
+        delays = []
+        if self.failures >= self.max_failures:
+            notes.append(
+                f"Upstream visibility service failed the last {self.failures} health probes; "
+                f"only the {len(window_cache)} cached queries can be answered."
+            )
+            delays.append(self.probe_interval)
+        lag = loop_lag_monitor.stats()["p99_ms"] / 1000
+        if lag > self.max_loop_lag:
+            notes.append(f"Event loop is saturated, with a p99 lag of {lag:.2f} s.")
+            # Stalls only stop counting once they leave the lag sample window
+            delays.append(loop_lag_monitor.interval * (loop_lag_monitor.samples.maxlen or 1))
+        if admission_controller.waiting >= admission_controller.max_queue:
+            notes.append(
+                f"Service is at capacity, with {admission_controller.active} queries running "
+                f"and {admission_controller.waiting} queued."
+            )
+            delays.append(admission_controller.retry_after())
+
+        available = not notes
+        if available and not self.available:
+            self.up_since = now
+        self.available = available
+        self.notes = notes
+        self.back_at = None if available else now + timedelta(seconds=max(delays))
+        self.availability_xml = self._render()
+
+    def _render(self) -> bytes:
+        """Render the VOSI availability document of the current state, UTF-8 encoded."""
+        xml = Availability(
+            available=self.available,
+            up_since=self.up_since if self.available else None,
+            back_at=self.back_at,
+            note=self.notes or None,
+        ).to_xml(encoding="UTF-8", xml_declaration=True)
+        return xml if isinstance(xml, bytes) else xml.encode()
+
+    async def _run(self) -> None:
+        """Check the service health until cancelled, probing upstream when due."""
+        while True:
+            probing = self._probe_task is not None and not self._probe_task.done()
+            if self.probe_interval > 0 and not probing and time.monotonic() >= self._next_probe:
+                self._next_probe = time.monotonic() + self.probe_interval
+                self._probe_task = asyncio.get_running_loop().create_task(self.probe())
+            self.evaluate()
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        """Start checking on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop checking, abandoning any probe in flight."""
+        for task in (self._task, self._probe_task):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._task = None
+        self._probe_task = None
+
+    def stats(self) -> dict:
+        """The current health state."""
+        return {
+            "available": self.available,
+            "notes": self.notes,
+            "back_at": self.back_at.isoformat() if self.back_at else None,
+            "probe_failures": self.failures,
+            "last_probe_ok": self.last_probe_ok,
+            "probe_latency_s": self.probe_latency,
+        }
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,73 @@
+"""Event loop lag monitoring."""
+
+import asyncio
+import contextlib
+from collections import deque
+
+from ..constants import LOOP_LAG_INTERVAL, LOOP_LAG_WINDOW
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a timer that should fire every
+    ``interval`` seconds. Any delay beyond the interval is time the loop spent
+    running other callbacks, so sustained lag means requests are being stalled
+    by CPU-bound work on the loop.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        """
+        This method initializes the monitor.
+        """
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    def record(self, lag: float) -> None:
+        """Record a single lag sample, in seconds."""
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+    async def _run(self) -> None:
+        """Sample the event loop lag until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(loop.time() - start - self.interval, 0.0))
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    @property
+    def current_lag(self) -> float:
+        """The most recent lag sample in seconds, or zero if none was taken."""
+        return self.samples[-1] if self.samples else 0.0
+
+    def stats(self) -> dict[str, float | int]:
+        """Summary statistics of the recent lag samples, in milliseconds."""
+        if not self.samples:
+            return {"samples": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self.samples)
+        count = len(ordered)
+        return {
+            "samples": count,
+            "mean_ms": 1000 * sum(ordered) / count,
+            "p50_ms": 1000 * ordered[int(0.50 * (count - 1))],
+            "p99_ms": 1000 * ordered[int(0.99 * (count - 1))],
+            "max_ms": 1000 * self.max_lag,
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,100 @@
+"""Detection of event loop stalls, with the stack of the blocking code."""
+
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import UTC, datetime
+
+from ..constants import LOOP_STALL_REPORTS, LOOP_STALL_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+
+class LoopStallWatchdog:
+    """
+    Watches the event loop from a separate thread. A task on the loop beats
+    every ``interval`` seconds; when no beat arrives for ``threshold``
+    seconds, a callback is blocking the loop, and the watchdog captures the
+    loop thread's stack while it is still stuck. Each stall is logged with
+    its stack and kept for the metrics endpoint, where its duration is
+    updated once the loop resumes.
+    """
+
+    def __init__(self, threshold: float = LOOP_STALL_THRESHOLD, reports: int = LOOP_STALL_REPORTS):
+        """
+        This method initializes the watchdog.
+        """
+        self.threshold = threshold
+        self.interval = threshold / 5
+        self.stalls = 0
+        self.reports: deque[dict] = deque(maxlen=reports)
+        self._beat = time.monotonic()
+        self._reported_beat: float | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    async def _heartbeat(self) -> None:
+        """Beat on the event loop until cancelled."""
+        while True:
+            now = time.monotonic()
+            if self._beat == self._reported_beat:
+                # The stall that was reported has just ended
+                self.reports[-1]["blocked_ms"] = 1000 * (now - self._beat)
+            self._beat = now
+            await asyncio.sleep(self.interval)
+
+    def check(self) -> None:
+        """Check for a stall, reporting each stall once, when first seen."""
+        beat = self._beat
+        blocked = time.monotonic() - beat
+        if blocked < self.threshold or beat == self._reported_beat:
+            return
+        frame = sys._current_frames().get(self._loop_thread) if self._loop_thread else None
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        self.stalls += 1
+        self.reports.append(
+            {"at": datetime.now(UTC).isoformat(), "blocked_ms": 1000 * blocked, "stack": stack}
+        )
+        self._reported_beat = beat
+        logger.warning("Event loop blocked for at least %.0f ms in:\n%s", 1000 * blocked, stack)
+
+    def _watch(self) -> None:
+        """Check for stalls until stopped."""
+        while not self._stopping.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        if self._task is None or self._task.done():
+            self._loop_thread = threading.get_ident()
+            self._beat = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._watch, name="swift-vo-watchdog", daemon=True)
+            self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop watching."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        """Number of stalls seen, and the most recent ones with their stacks."""
+        return {"threshold_ms": 1000 * self.threshold, "stalls": self.stalls, "recent": list(self.reports)}
+
+
+loop_stall_watchdog = LoopStallWatchdog()
@@ -0,0 +1,69 @@
+"""
+Offline builder of the precomputed ephemeris file.
+
+Computes the Sun and Moon positions, and Swift's position and velocity from
+the current TLE, on a fixed time grid covering the range that queries can
+ask for, and writes them to the file that the service maps into memory
+(``SWIFT_VO_EPHEMERIS_FILE``). Running workers pick up the new version on
+their next lookup. Run it whenever a new TLE arrives, and at least daily so
+that the file keeps covering the hard limit on future queries.
+
+Usage: swift-vo-build-ephemeris --output /var/lib/swift-vo/ephemeris.bin --tle swift.tle
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from astropy.time import Time  # type: ignore[import-untyped]
+
+from .constants import EPHEMERIS_FILE, EPHEMERIS_STEP, SWIFT_TLE_FILE, T_MAX_HARD_LIMIT_DELTA
+from .visibility.ephemeris import evaluate_ephemeris
+from .visibility.orbit import current_tle
+from .visibility.store import write_ephemeris_file
+
+
+def build(
+    path: str, start: float, days: float, step: float = EPHEMERIS_STEP, tle_file: str | None = None
+) -> dict:
+    """
+    Build the ephemeris file at ``path``, sampled every ``step`` seconds for
+    ``days`` days from the MJD ``start``, returning its header. Without a
+    TLE file, only the Sun and Moon are stored.
+    """
+    mjd = start + np.arange(round(days * 86400 / step) + 1) * step / 86400
+    tle = current_tle(tle_file)
+    ephemeris = evaluate_ephemeris(mjd, tle)
+    return write_ephemeris_file(
+        path, start, step, ephemeris.sun, ephemeris.moon, ephemeris.spacecraft, ephemeris.velocity, tle
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Build the precomputed ephemeris file.")
+    parser.add_argument("--output", default=EPHEMERIS_FILE, help="ephemeris file to write or replace")
+    parser.add_argument("--tle", default=SWIFT_TLE_FILE, help="file holding Swift's current TLE")
+    parser.add_argument("--start", type=float, help="MJD of the first sample (default: start of yesterday)")
+    parser.add_argument(
+        "--days", type=float, default=T_MAX_HARD_LIMIT_DELTA + 3, help="number of days to cover"
+    )
+    parser.add_argument("--step", type=float, default=EPHEMERIS_STEP, help="seconds between samples")
+    args = parser.parse_args(argv)
+    if not args.output:
+        parser.error("--output is required when SWIFT_VO_EPHEMERIS_FILE is not set")
+
+    start = args.start if args.start is not None else float(int(Time.now().mjd) - 1)
+    began = time.perf_counter()
+    header = build(args.output, start, args.days, args.step, args.tle)
+    print(
+        f"Wrote {args.output} version {header['version']}: {header['rows']} samples from MJD {start} "
+        f"every {args.step:g} s, {'with' if header['tle'] else 'without'} Swift's orbit, "
+        f"in {time.perf_counter() - began:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""
+Bulk precompute of visibility windows for source catalogs.
+
+Reads a catalog of positions (CSV, FITS or VOTable), computes the visibility
+windows of every source over a time range with the local visibility engine
+(Sun, Moon and Earth limb constraints, the last from Swift's TLE, which is
+required unless ``--no-earth-constraint`` is given), keeping the windows at
+least ``--min-obs`` seconds long and clipping the range to the ObjObsSAP hard
+limit, and writes one row per window to a Parquet or CSV file. South
+Atlantic Anomaly passages are not modelled, so windows can be longer than
+those ObjObsSAP returns, even with the Earth limb constraint.
+
+Sources are split into chunks that a pool of worker processes evaluates
+independently, each worker computing the ephemeris once. Every finished
+chunk is saved as a checkpoint, so an interrupted run resumes where it
+stopped when started again with the same arguments.
+
+Usage: swift-vo-catalog sources.fits --time 60100/60130 --min-obs 1500 --output windows.parquet --workers 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+from astropy.table import Table  # type: ignore[import-untyped]
+from astropy.time import Time  # type: ignore[import-untyped]
+
+try:
+    import pyarrow as pa  # type: ignore[import-untyped]
+    import pyarrow.parquet as pq  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+    pa = None
+    pq = None
+
+from .constants import CATALOG_CHUNK_SIZE, CATALOG_STEP, SWIFT_TLE_FILE, T_MAX_HARD_LIMIT_DELTA
+from .visibility.ephemeris import Ephemeris, compute_ephemeris
+from .visibility.orbit import TLE, current_tle
+from .visibility.targets import ephemeris_windows
+
+# Column names recognized as RA and Dec, in degrees, when not given explicitly
+RA_COLUMNS = ("ra", "s_ra", "raj2000", "_raj2000", "ra_deg")
+DEC_COLUMNS = ("dec", "s_dec", "dej2000", "_dej2000", "decj2000", "dec_deg")
+# Catalog formats by file suffix; other files are left to astropy to identify
+CATALOG_FORMATS = {".csv": "ascii.csv", ".vot": "votable", ".votable": "votable", ".xml": "votable"}
+PROGRESS_INTERVAL = 5  # seconds between progress reports
+
+# Ephemeris of the time grid in a worker process, computed once by ``_init_worker``
+_ephemeris: Ephemeris | None = None
+
+
+def _find_column(table: Table, name: str | None, candidates: tuple[str, ...]) -> str:
+    """Return the named column, or the first column whose name is a candidate."""
+    if name is not None:
+        if name not in table.colnames:
+            raise ValueError(f"Column {name} not found in the catalog")
+        return name
+    for column in table.colnames:
+        if column.lower() in candidates:
+            return column
+    raise ValueError(f"None of the columns {', '.join(candidates)} found in the catalog")
+
+
+def read_catalog(
+    path: Path, ra_column: str | None = None, dec_column: str | None = None, id_column: str | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    Read the RA and Dec in degrees of every source of a catalog, and their
+    identifiers if ``id_column`` is given.
+    """
+    table = Table.read(path, format=CATALOG_FORMATS.get(path.suffix.lower()))
+    ra = np.asarray(table[_find_column(table, ra_column, RA_COLUMNS)], dtype=np.float64)
+    dec = np.asarray(table[_find_column(table, dec_column, DEC_COLUMNS)], dtype=np.float64)
+    ids = None if id_column is None else np.asarray(table[_find_column(table, id_column, ())]).astype(str)
+    return ra, dec, ids
+
+
+def time_grid(t_min: float, t_max: float, step: float) -> tuple[np.ndarray, float]:
+    """
+    Sample times from ``t_min`` every ``step`` seconds, stopping where the
+    last sample ends by ``t_max`` or the ObjObsSAP hard limit, and the end of
+    the range actually covered.
+    """
+    t_max = min(t_max, int(Time.now().mjd) + T_MAX_HARD_LIMIT_DELTA)
+    samples = max(0, int(np.floor((t_max - t_min) * 86400 / step + 1e-9)))
+    return t_min + np.arange(samples) * step / 86400, t_max
+
+
+def _init_worker(mjd: np.ndarray, tle: TLE | None) -> None:
+    """Compute the ephemeris of the time grid in a worker process."""
+    global _ephemeris
+    _ephemeris = compute_ephemeris(mjd, tle)
+
+
+def _run_chunk(first: int, ra: np.ndarray, dec: np.ndarray, step: float, min_obs: float, part: Path) -> int:
+    """
+    Compute the windows of a chunk of sources, the first being source
+    ``first`` of the catalog, and save them to the checkpoint ``part``.
+    Returns the number of windows.
+    """
+    assert _ephemeris is not None
+    windows = ephemeris_windows(ra, dec, _ephemeris, step, min_obs)
+    counts = [len(t_start) for t_start, _ in windows]
+    temporary = part.with_suffix(".tmp")
+    with open(temporary, "wb") as f:
+        np.savez(
+            f,
+            source=np.repeat(np.arange(first, first + len(ra)), counts),
+            t_start=np.concatenate([t_start for t_start, _ in windows]) if windows else np.empty(0),
+            t_stop=np.concatenate([t_stop for _, t_stop in windows]) if windows else np.empty(0),
+        )
+    os.replace(temporary, part)
+    return sum(counts)
+
+
+def _part(checkpoints: Path, chunk: int) -> Path:
+    """The checkpoint file of a chunk."""
+    return checkpoints / f"part-{chunk:06d}.npz"
+
+
+def _check_manifest(checkpoints: Path, manifest: dict) -> dict:
+    """
+    Record the parameters of a run with its checkpoints, or check that they
+    match those of the interrupted run being resumed, whose recorded time
+    grid is then used.
+    """
+    path = checkpoints / "manifest.json"
+    if path.exists():
+        recorded = json.loads(path.read_text())
+        arguments = {key: value for key, value in manifest.items() if key != "grid_t_max"}
+        if {key: value for key, value in recorded.items() if key != "grid_t_max"} != arguments:
+            raise ValueError(f"Checkpoints in {checkpoints} belong to a run with other arguments")
+        return recorded
+    checkpoints.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest))
+    return manifest
+
+
+def write_output(
+    output: Path,
+    parts: list[Path],
+    ra: np.ndarray,
+    dec: np.ndarray,
+    ids: np.ndarray | None,
+    metadata: dict[str, str],
+) -> None:
+    """
+    Write the windows of all checkpoints, in catalog order, to a Parquet
+    file (one row group per chunk) or a CSV file, chosen by the suffix of
+    ``output``. The file is written next to ``output`` and renamed over it.
+    """
+    temporary = output.with_name(f".{output.name}.tmp")
+    parquet = output.suffix.lower() == ".parquet"
+    writer = None
+    with open(temporary, "wb") as f:
+        if not parquet:
+            f.write("".join(f"# {name}: {value}\n" for name, value in metadata.items()).encode())
+            header = ["source", *(["id"] if ids is not None else []), "s_ra", "s_dec"]
+            f.write((",".join([*header, "t_start", "t_stop", "t_observability"]) + "\n").encode())
+        for part in parts:
+            with np.load(part) as data:
+                source, t_start, t_stop = data["source"], data["t_start"], data["t_stop"]
+            columns = {"source": source}
+            if ids is not None:
+                columns["id"] = ids[source]
+            columns.update(
+                {
+                    "s_ra": ra[source],
+                    "s_dec": dec[source],
+                    "t_start": t_start,
+                    "t_stop": t_stop,
+                    "t_observability": (t_stop - t_start) * 86400,
+                }
+            )
+            if parquet:
+                table = pa.table(columns).replace_schema_metadata(metadata)
+                if writer is None:
+                    writer = pq.ParquetWriter(f, table.schema)
+                writer.write_table(table)
+            else:
+                rows = zip(*(values.tolist() for values in columns.values()), strict=True)
+                f.write("".join(",".join(map(str, row)) + "\n" for row in rows).encode())
+        if writer is not None:
+            writer.close()
+    os.replace(temporary, output)
+
+
+def precompute(
+    catalog: Path,
+    output: Path,
+    t_min: float,
+    t_max: float,
+    min_obs: float = 0.0,
+    step: float = CATALOG_STEP,
+    chunk_size: int = CATALOG_CHUNK_SIZE,
+    workers: int = 1,
+    checkpoints: Path | None = None,
+    tle_file: str | None = SWIFT_TLE_FILE,
+    earth_constraint: bool = True,
+    columns: tuple[str | None, str | None, str | None] = (None, None, None),
+    keep_checkpoints: bool = False,
+    progress=print,
+) -> dict:
+    """
+    Compute the windows of every source of ``catalog`` and write them to
+    ``output``, resuming from the checkpoints of an interrupted run. Returns
+    a summary of the run, with its throughput.
+
+    The Earth limb constraint needs the TLE in ``tle_file``. Without
+    ``earth_constraint`` the TLE is not used, and the windows are those of
+    the Sun and Moon constraints only, which are far longer than ObjObsSAP
+    windows. Either way the SAA is not applied, so windows that ObjObsSAP
+    splits at SAA passages are kept whole.
+    """
+    if output.suffix.lower() == ".parquet" and pa is None:
+        raise ValueError("Parquet output needs pyarrow, which is not installed; write a .csv file instead")
+    tle = current_tle(tle_file) if earth_constraint else None
+    if earth_constraint and tle is None:
+        raise ValueError(
+            "The Earth limb constraint needs Swift's TLE: pass --tle or set SWIFT_VO_TLE_FILE, "
+            "or pass --no-earth-constraint for Sun and Moon constraints only"
+        )
+
+    started = time.perf_counter()
+    ra, dec, ids = read_catalog(catalog, *columns)
+    checkpoints = checkpoints or output.with_name(f"{output.name}.checkpoints")
+    manifest = _check_manifest(
+        checkpoints,
+        {
+            "catalog": str(catalog.resolve()),
+            "sources": len(ra),
+            "t_min": t_min,
+            "t_max": t_max,
+            "min_obs": min_obs,
+            "step": step,
+            "chunk_size": chunk_size,
+            "tle": None if tle is None else [float(value) for value in tle],
+            "grid_t_max": time_grid(t_min, t_max, step)[1],
+        },
+    )
+    mjd, _ = time_grid(t_min, manifest["grid_t_max"], step)
+    chunks = range(-(-len(ra) // chunk_size))
+    pending = [chunk for chunk in chunks if not _part(checkpoints, chunk).exists()]
+    resumed = len(chunks) - len(pending)
+    if resumed:
+        progress(f"Resuming: {resumed} of {len(chunks)} chunks already done")
+
+    def task(chunk: int) -> tuple:
+        first = chunk * chunk_size
+        part = _part(checkpoints, chunk)
+        return (first, ra[first : first + chunk_size], dec[first : first + chunk_size], step, min_obs, part)
+
+    todo = sum(len(ra[chunk * chunk_size : (chunk + 1) * chunk_size]) for chunk in pending)
+    computed = 0
+    windows = 0
+    reported = compute_started = time.perf_counter()
+
+    def report() -> None:
+        nonlocal reported
+        if time.perf_counter() - reported >= PROGRESS_INTERVAL:
+            reported = time.perf_counter()
+            rate = computed / (reported - compute_started)
+            progress(
+                f"{computed}/{todo} sources, {rate:.0f} sources/s, {(todo - computed) / rate:.0f} s left"
+            )
+
+    if workers == 1:
+        _init_worker(mjd, tle)
+        for chunk in pending:
+            arguments = task(chunk)
+            windows += _run_chunk(*arguments)
+            computed += len(arguments[1])
+            report()
+    elif pending:
+        # Fresh interpreters, rather than forks of this one, each with single threaded numerics
+        for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ.setdefault(variable, "1")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(mjd, tle),
+        ) as pool:
+            # At most two chunks per worker in flight, so that chunks are handed out as workers free up
+            queue = iter(pending)
+            running: dict[Future, int] = {}
+            while True:
+                for chunk in queue:
+                    arguments = task(chunk)
+                    running[pool.submit(_run_chunk, *arguments)] = len(arguments[1])
+                    if len(running) >= 2 * workers:
+                        break
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    windows += future.result()
+                    computed += running.pop(future)
+                report()
+
+    elapsed = time.perf_counter() - compute_started
+    metadata = {
+        "TIME": f"{t_min}/{manifest['grid_t_max']}",
+        "MIN_OBS": str(min_obs),
+        "EARTH_CONSTRAINT": "T" if tle is not None else "F",
+        "SAA_CONSTRAINT": "F",
+    }
+    write_output(output, [_part(checkpoints, chunk) for chunk in chunks], ra, dec, ids, metadata)
+    if not keep_checkpoints:
+        shutil.rmtree(checkpoints)
+    return {
+        "sources": len(ra),
+        "computed": computed,
+        "resumed_chunks": resumed,
+        "windows_computed": windows,
+        "workers": workers,
+        "compute_s": elapsed,
+        "total_s": time.perf_counter() - started,
+        "sources_per_s": computed / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Precompute the visibility windows of a source catalog.")
+    parser.add_argument("catalog", type=Path, help="catalog of sources: CSV, FITS or VOTable")
+    parser.add_argument("--output", type=Path, required=True, help="output file, .parquet or .csv")
+    parser.add_argument("--time", required=True, help="time range in 'T_MIN/T_MAX' format, in MJD")
+    parser.add_argument("--min-obs", type=float, default=0.0, help="minimum window length in seconds")
+    parser.add_argument("--step", type=float, default=CATALOG_STEP, help="seconds between time samples")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=CATALOG_CHUNK_SIZE, help="sources per chunk")
+    parser.add_argument("--tle", default=SWIFT_TLE_FILE, help="file holding Swift's current TLE")
+    parser.add_argument(
+        "--no-earth-constraint",
+        action="store_true",
+        help="apply the Sun and Moon constraints only, without a TLE",
+    )
+    parser.add_argument("--ra-column", help="RA column in degrees (default: ra, raj2000, ...)")
+    parser.add_argument("--dec-column", help="Dec column in degrees (default: dec, dej2000, ...)")
+    parser.add_argument("--id-column", help="column identifying the sources, copied to the output")
+    parser.add_argument("--checkpoints", type=Path, help="checkpoint directory (default: next to the output)")
+    parser.add_argument("--keep-checkpoints", action="store_true", help="keep the checkpoints when done")
+    args = parser.parse_args(argv)
+
+    try:
+        t_min, t_max = (float(value) for value in args.time.split("/"))
+    except ValueError:
+        parser.error(f"Invalid time range format: {args.time}. Expected 'T_MIN/T_MAX' (e.g., '59000/59001').")
+    try:
+        summary = precompute(
+            args.catalog,
+            args.output,
+            t_min,
+            t_max,
+            min_obs=args.min_obs,
+            step=args.step,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            checkpoints=args.checkpoints,
+            tle_file=args.tle,
+            earth_constraint=not args.no_earth_constraint,
+            columns=(args.ra_column, args.dec_column, args.id_column),
+            keep_checkpoints=args.keep_checkpoints,
+        )
+    except ValueError as e:
+        print(f"swift-vo-catalog: {e}", file=sys.stderr)
+        return 2
+    print(
+        f"{summary['sources']} sources ({summary['computed']} computed, {summary['resumed_chunks']} chunks "
+        f"resumed) in {summary['total_s']:.1f} s with {summary['workers']} workers: "
+        f"{summary['sources_per_s']:.0f} sources/s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,93 @@
+import os
+
 VO_SERVER = "www.swift.psu.edu"
 VO_ROOT_PATH = "/vo"
 OBJOBSSAP_DEFAULT_LENGTH = 7  # days
 T_MAX_HARD_LIMIT_DELTA = 30  # days to add to current date for hard limit on future visibility
+JOINT_MAX_POSITIONS = 20  # positions accepted by a joint observability query
+
+# Time budget of an ObjObsSAP request, unless the X-Request-Deadline header (seconds) asks for another
+REQUEST_DEADLINE = float(os.environ.get("SWIFT_VO_REQUEST_DEADLINE", "30"))  # seconds
+REQUEST_DEADLINE_MAX = 300  # seconds, longest deadline a client may ask for
+DEADLINE_FORMAT_RESERVE = 0.1  # share of the budget kept for serializing the result
+
+# CPU-bound work (VOTable serialization, large window conversions) is moved off
+# the event loop once it involves at least this many windows
+CPU_OFFLOAD_THRESHOLD = int(os.environ.get("SWIFT_VO_CPU_OFFLOAD_THRESHOLD", "500"))
+CPU_OFFLOAD_EXECUTOR = os.environ.get("SWIFT_VO_CPU_OFFLOAD_EXECUTOR", "thread")  # "thread" or "process"
+CPU_OFFLOAD_MAX_WORKERS = int(os.environ.get("SWIFT_VO_CPU_OFFLOAD_MAX_WORKERS", "4"))
+
+# Calls to the upstream visibility service run in their own bounded thread pool, as
+# the swifttools client parses and validates responses synchronously
+UPSTREAM_MAX_WORKERS = int(os.environ.get("SWIFT_VO_UPSTREAM_MAX_WORKERS", "16"))
+# Optionally split upstream queries into pieces at most this many days long, so that the pieces
+# completed by the request deadline can be returned; 0 sends one query over the whole range
+UPSTREAM_CHUNK_SPAN = float(os.environ.get("SWIFT_VO_UPSTREAM_CHUNK_SPAN", "0"))  # days
+# Seconds each piece extends past the start of the next, so that the two halves of a window cut at
+# their boundary overlap and are joined again, however the upstream service clips them
+UPSTREAM_CHUNK_OVERLAP = 600
+UPSTREAM_QUERY_CONCURRENCY = 4  # pieces of one request fetched at once
+
+LOOP_LAG_INTERVAL = 0.1  # seconds between event loop lag samples
+LOOP_LAG_WINDOW = 600  # number of recent lag samples kept for statistics
+
+# Event loop stall detection
+LOOP_STALL_THRESHOLD = float(os.environ.get("SWIFT_VO_LOOP_STALL_THRESHOLD", "0.5"))  # seconds
+LOOP_STALL_REPORTS = 20  # number of recent stalls, with their stacks, kept for the metrics endpoint
+
+# Background health checks behind VOSI availability
+HEALTH_CHECK_INTERVAL = 5  # seconds between evaluations of the service health
+HEALTH_PROBE_INTERVAL = float(os.environ.get("SWIFT_VO_HEALTH_PROBE_INTERVAL", "60"))  # seconds, 0 disables
+HEALTH_PROBE_TIMEOUT = 10  # seconds
+HEALTH_PROBE_FAILURES = 3  # consecutive failed probes before the upstream service is considered down
+HEALTH_MAX_LOOP_LAG = 1.0  # seconds of p99 event loop lag above which the worker is saturated
+
+# Admission control for ObjObsSAP queries that need the upstream visibility service
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("SWIFT_VO_ADMISSION_MAX_CONCURRENT", "16"))
+ADMISSION_MAX_PER_CLIENT = int(os.environ.get("SWIFT_VO_ADMISSION_MAX_PER_CLIENT", "4"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("SWIFT_VO_ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("SWIFT_VO_ADMISSION_QUEUE_TIMEOUT", "10"))  # seconds
+# Proxies in front of the service that append the address they received a request from to
+# X-Forwarded-For; clients are identified by the address the outermost of them saw
+ADMISSION_TRUSTED_PROXIES = int(os.environ.get("SWIFT_VO_ADMISSION_TRUSTED_PROXIES", "1"))
+
+# Adaptive resolution: find candidate windows with a low resolution upstream query, and only ask
+# for high resolution visibility around those that could be at least MIN_OBS long
+ADAPTIVE_RESOLUTION = os.environ.get("SWIFT_VO_ADAPTIVE_RESOLUTION", "0") == "1"
+# Seconds refined on either side of a low resolution window. Besides the coarse sampling, this covers
+# the Moon's parallax from low Earth orbit (up to ~1 degree, or ~2 hours of lunar motion)
+ADAPTIVE_EDGE_MARGIN = 10800
+HIRES_MAX_SPAN = 20  # days, longest high resolution query accepted by the upstream service
+
+# Cache of upstream visibility windows
+WINDOW_CACHE_SIZE = 1024  # number of (position, time range) entries
+WINDOW_CACHE_TTL = 600  # seconds
+
+# Subscriptions to visibility window changes
+SUBSCRIPTION_CHECK_INTERVAL = 30  # seconds between checks for a new TLE or ephemeris version
+# Seconds between refreshes of the windows of every subscribed target from the upstream service
+SUBSCRIPTION_REFRESH_INTERVAL = float(os.environ.get("SWIFT_VO_SUBSCRIPTION_REFRESH_INTERVAL", "600"))
+SUBSCRIPTION_KEEPALIVE = 15  # seconds between keep-alive comments on idle event streams
+SUBSCRIPTION_REFRESH_CONCURRENCY = 4  # upstream queries in flight at once while refreshing
+
+# Swift pointing constraints, in degrees
+SUN_AVOIDANCE_ANGLE = 45
+MOON_AVOIDANCE_ANGLE = 21
+EARTH_LIMB_AVOIDANCE_ANGLE = 28
+
+# Two-line element set of Swift's orbit, needed to apply the Earth limb constraint locally
+SWIFT_TLE_FILE = os.environ.get("SWIFT_VO_TLE_FILE")
+
+# Precomputed ephemeris file, built with swift-vo-build-ephemeris and shared by all workers
+EPHEMERIS_FILE = os.environ.get("SWIFT_VO_EPHEMERIS_FILE")
+EPHEMERIS_STEP = 60  # seconds between samples of the ephemeris file
+
+# Bulk catalog precompute
+CATALOG_STEP = 60  # seconds between time samples
+CATALOG_CHUNK_SIZE = 2000  # sources per chunk handed to a worker and checkpointed
+
+# Observable sky MOC computation
+OBSERVABLE_SKY_ORDER = 5  # HEALPix order of the evaluation grid
+OBSERVABLE_SKY_STEP = 60  # seconds between time samples, must divide a day
+OBSERVABLE_SKY_CHUNK_CACHE_SIZE = 64  # number of cached time chunks
+OBSERVABLE_SKY_CHUNK_CACHE_TTL = 86400  # seconds
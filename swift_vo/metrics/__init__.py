@@ -0,0 +1 @@
+"""Operational metrics for the Swift VO services."""
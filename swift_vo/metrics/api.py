@@ -0,0 +1,44 @@
+"""Operational metrics API endpoint implementation."""
+
+from fastapi import APIRouter
+
+from ..base.admission import admission_controller
+from ..base.api import app
+from ..base.executor import offload_stats
+from ..base.health import health_monitor
+from ..base.monitor import loop_lag_monitor
+from ..base.watchdog import loop_stall_watchdog
+from ..constants import CPU_OFFLOAD_EXECUTOR, CPU_OFFLOAD_THRESHOLD
+from ..objobssap.cache import window_cache
+from ..objobssap.subscriptions import subscription_registry
+from ..visibility.store import ephemeris_store
+
+router = APIRouter(prefix="", tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def metrics() -> dict:
+    """
+    Returns operational metrics for this worker, such as the event loop lag
+    and stalls (with the stacks of the blocking code), how much CPU-bound
+    work was offloaded from the event loop, the admission control load, the
+    window cache hit rate, the health check state, the loaded version of the
+    precomputed ephemeris and the number of subscribed targets.
+    """
+    return {
+        "event_loop_lag": loop_lag_monitor.stats(),
+        "event_loop_stalls": loop_stall_watchdog.stats(),
+        "cpu_offload": {
+            "executor": CPU_OFFLOAD_EXECUTOR,
+            "threshold": CPU_OFFLOAD_THRESHOLD,
+            **offload_stats,
+        },
+        "admission": admission_controller.stats(),
+        "window_cache": window_cache.stats(),
+        "health": health_monitor.stats(),
+        "ephemeris_store": ephemeris_store.stats(),
+        "subscriptions": subscription_registry.stats(),
+    }
+
+
+app.include_router(router)
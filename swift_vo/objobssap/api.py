@@ -1,21 +1,53 @@
+from time import monotonic
 from urllib.parse import urlparse, urlunparse
 
 from astropy.time import Time  # type: ignore[import-untyped]
-from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
+from ..base.admission import AdmissionRejected, admission_controller, client_id
 from ..base.api import app
-from ..constants import OBJOBSSAP_DEFAULT_LENGTH, VO_SERVER
-from .schema import VOPosition, VOTimeRange
-from .service import ObjObsSAPService
+from ..constants import (
+    DEADLINE_FORMAT_RESERVE,
+    JOINT_MAX_POSITIONS,
+    OBJOBSSAP_DEFAULT_LENGTH,
+    REQUEST_DEADLINE,
+    REQUEST_DEADLINE_MAX,
+    VO_SERVER,
+)
+from .formats import response_media_type
+from .schema import VOCursor, VOPosition, VOTimeRange
+from .service import JointObsService, ObjObsSAPService, error_votable
+from .subscriptions import subscription_registry
 
 router = APIRouter(prefix="/objobssap", tags=["ObjObsSAP"])
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> Response:
+    """Reply to a rejected request with a DALI error VOTable and a Retry-After header."""
+    return Response(
+        content=error_votable(exc.message),
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        media_type="application/x-votable+xml",
+    )
+
+
 def parse_pos(pos: str = Query(..., description="Position in 'RA,DEC' format")) -> VOPosition:
     """Parses the position string into a VOPosition object."""
     return VOPosition.from_string(pos)
 
 
+def parse_positions(
+    pos: list[str] = Query(..., description="Positions in 'RA,DEC' format, one POS parameter per position"),
+) -> list[VOPosition]:
+    """Parses repeated position strings into VOPosition objects."""
+    if len(pos) > JOINT_MAX_POSITIONS:
+        raise HTTPException(status_code=422, detail=f"At most {JOINT_MAX_POSITIONS} positions are accepted.")
+    return [VOPosition.from_string(value) for value in pos]
+
+
 def parse_time(
     time: str | None = Query(
         default=None,
@@ -37,6 +69,31 @@ def parse_min_obs(min_obs: float = Query(default=0, description="Minimum observa
     return float(min_obs)
 
 
+def parse_deadline(
+    x_request_deadline: str | None = Header(
+        default=None, description=f"Time budget of the request in seconds, at most {REQUEST_DEADLINE_MAX}"
+    ),
+) -> float:
+    """
+    Works out the ``time.monotonic()`` time by which upstream queries must be
+    done, keeping part of the request's time budget for serializing the
+    result.
+    """
+    budget = REQUEST_DEADLINE
+    if x_request_deadline is not None:
+        try:
+            budget = float(x_request_deadline)
+        except ValueError:
+            budget = float("nan")
+        if not 0 < budget <= REQUEST_DEADLINE_MAX:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid X-Request-Deadline: {x_request_deadline}. "
+                f"Expected a number of seconds up to {REQUEST_DEADLINE_MAX}.",
+            )
+    return monotonic() + budget * (1 - DEADLINE_FORMAT_RESERVE)
+
+
 @router.get(
     "/query",
     response_class=Response,
@@ -45,10 +102,18 @@ def parse_min_obs(min_obs: float = Query(default=0, description="Minimum observa
             "content": {
                 "application/x-votable+xml": {
                     "example": "<note><to>User</to><from>Server</from><message>Hello, XML!</message></note>"
-                }
+                },
+                "text/csv": {},
+                "application/json": {},
+                "application/vnd.apache.arrow.stream": {},
+                "application/vnd.apache.parquet": {},
             },
-            "description": "Returns a VOTable response",
-        }
+            "description": "Returns a VOTable response, or the format selected by RESPONSEFORMAT",
+        },
+        503: {
+            "content": {"application/x-votable+xml": {}},
+            "description": "Service is at capacity; returns a DALI error VOTable and a Retry-After header",
+        },
     },
 )
 async def objvissap(
@@ -60,8 +125,24 @@ async def objvissap(
     upload: str | None = Query(
         default=None, description="Not used for ObjObsSAP, but included for consistency"
     ),
+    responseformat: str | None = Query(
+        default=None, description="Output format: 'votable' (default), 'csv', 'json', 'arrow' or 'parquet'"
+    ),
+    cursor: str | None = Query(
+        default=None, description="Continuation cursor from the CURSOR INFO of a previous, overflowing page"
+    ),
+    deadline: float = Depends(parse_deadline),
 ):
     """Handles the query for ObjObjSAP."""
+    response_media_type(responseformat)
+    after = None
+    if cursor is not None:
+        # A cursor continues the query it was issued for, over the same time range
+        page = VOCursor.from_string(cursor)
+        if (page.s_ra, page.s_dec, page.min_obs) != (position.s_ra, position.s_dec, min_obs):
+            raise HTTPException(status_code=422, detail="Cursor does not belong to this query.")
+        time = VOTimeRange(t_min=page.t_min, t_max=page.t_max)
+        after = page.after
     vo = ObjObsSAPService(
         s_ra=position.s_ra,
         s_dec=position.s_dec,
@@ -70,9 +151,101 @@ async def objvissap(
         min_obs=min_obs,
         maxrec=maxrec,
         upload=upload,
+        after=after,
+        deadline=deadline,
+    )
+
+    return await run_query(request, vo, responseformat)
+
+
+@router.get(
+    "/joint",
+    response_class=Response,
+    responses={
+        200: {
+            "content": {
+                "application/x-votable+xml": {},
+                "text/csv": {},
+                "application/json": {},
+                "application/vnd.apache.arrow.stream": {},
+                "application/vnd.apache.parquet": {},
+            },
+            "description": "Returns the windows in which all positions are observable at once",
+        },
+        503: {
+            "content": {"application/x-votable+xml": {}},
+            "description": "Service is at capacity; returns a DALI error VOTable and a Retry-After header",
+        },
+    },
+)
+async def joint_obs(
+    request: Request,
+    positions: list[VOPosition] = Depends(parse_positions),
+    time: VOTimeRange = Depends(parse_time),
+    min_obs: float = Depends(parse_min_obs),
+    maxrec: int | None = Query(default=None, description="Maximum number of records to return"),
+    responseformat: str | None = Query(
+        default=None, description="Output format: 'votable' (default), 'csv', 'json', 'arrow' or 'parquet'"
+    ),
+    deadline: float = Depends(parse_deadline),
+):
+    """Handles joint observability queries, with the same parameters and result as ObjObsSAP."""
+    response_media_type(responseformat)
+    vo = JointObsService(
+        positions=[(position.s_ra, position.s_dec) for position in positions],
+        t_min=time.t_min,
+        t_max=time.t_max,
+        min_obs=min_obs,
+        maxrec=maxrec,
+        deadline=deadline,
+    )
+    return await run_query(request, vo, responseformat)
+
+
+@router.get(
+    "/subscribe",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": (
+                "Streams a 'snapshot' event with the windows of each position, then an 'update' event"
+                " with the windows added and removed whenever they change"
+            ),
+        },
+        503: {
+            "content": {"application/x-votable+xml": {}},
+            "description": "Service is at capacity; returns a DALI error VOTable and a Retry-After header",
+        },
+    },
+)
+async def subscribe(
+    request: Request,
+    positions: list[VOPosition] = Depends(parse_positions),
+    time: VOTimeRange = Depends(parse_time),
+    min_obs: float = Depends(parse_min_obs),
+):
+    """
+    Handles subscriptions to the windows of one or more positions, with the
+    same parameters as ObjObsSAP, as a stream of server-sent events.
+    """
+    keys = [(position.s_ra, position.s_dec, time.t_min, time.t_max, min_obs) for position in positions]
+
+    # Subscribing to targets nobody watches yet needs the upstream service
+    exempt = all(subscription_registry.cached(key) for key in keys)
+    async with admission_controller.slot(client_id(request), exempt=exempt):
+        for key in keys:
+            await subscription_registry.watch(key)
+
+    return StreamingResponse(
+        subscription_registry.stream(keys),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    await vo.query()
 
+
+async def run_query(request: Request, vo: ObjObsSAPService, responseformat: str | None) -> Response:
+    """Runs a query under admission control and formats its result."""
     # Ensure the query_url uses the correct base URL
 
     parsed_url = urlparse(str(request.url))
@@ -87,9 +260,12 @@ async def objvissap(
         )
     )
 
-    xml_data = await vo.vo_format(query_url=str(fixed_url))
+    # Queries that need the upstream service are subject to admission control, within their deadline
+    async with admission_controller.slot(client_id(request), exempt=vo.cached, deadline=vo.deadline):
+        await vo.query()
+        content, media_type = await vo.format(responseformat, query_url=str(fixed_url))
 
-    return Response(content=xml_data, media_type="application/x-votable+xml")
+    return Response(content=content, media_type=media_type)
 
 
 app.include_router(router)
@@ -0,0 +1,79 @@
+"""Cache of upstream visibility windows."""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from ..constants import WINDOW_CACHE_SIZE, WINDOW_CACHE_TTL
+
+
+class WindowCache:
+    """
+    Least-recently-used cache of upstream visibility windows with a time to
+    live, so that repeated queries for the same position and time range do
+    not go back to the upstream visibility service.
+    """
+
+    def __init__(self, maxsize: int = WINDOW_CACHE_SIZE, ttl: float = WINDOW_CACHE_TTL):
+        """
+        This method initializes the cache.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def _fresh(self, key: Hashable) -> bool:
+        """Whether ``key`` is cached and not expired, dropping it if it expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return False
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._fresh(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for ``key``, or None if it is missing or expired."""
+        if not self._fresh(key):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key][1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache ``value`` under ``key``, evicting the least recently used entry if full."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """Drop the entry for ``key``, if any."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Cache size and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+window_cache = WindowCache()
@@ -0,0 +1,162 @@
+"""
+Alternative RESPONSEFORMAT writers for ObjObsSAP results.
+
+Each writer goes straight from the result column arrays to the output, without
+building an astropy VOTable, and carries the DALI INFO metadata in the form
+the format allows: comment lines in CSV, a metadata object in JSON, and
+schema metadata in Arrow and Parquet.
+"""
+
+import json
+from collections.abc import Callable
+from io import BytesIO
+
+import numpy as np
+from fastapi import HTTPException
+
+try:
+    import pyarrow as pa  # type: ignore[import-untyped]
+    import pyarrow.parquet as pq  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover - pyarrow is an optional dependency
+    pa = None
+    pq = None
+
+# Result fields of ObjObsSAP, in table order
+FIELDS = [
+    {
+        "name": "t_validity",
+        "datatype": "double",
+        "ucd": "time.validity",
+        "utype": "Char.TimeAxis.Coverage.Time",
+        "unit": "d",
+    },
+    {
+        "name": "t_start",
+        "datatype": "double",
+        "ucd": "time.start",
+        "utype": "Char.TimeAxis.Coverage.Bounds.Limits.StartTime",
+        "unit": "d",
+    },
+    {
+        "name": "t_stop",
+        "datatype": "double",
+        "ucd": "time.end",
+        "utype": "Char.TimeAxis.Coverage.Bounds.Limits.StopTime",
+        "unit": "d",
+    },
+    {
+        "name": "t_observability",
+        "datatype": "double",
+        "ucd": "time.duration",
+        "utype": "Char.TimeAxis.Coverage.Support.Extent",
+        "unit": "s",
+    },
+]
+
+VOTABLE_MEDIA_TYPE = "application/x-votable+xml"
+CSV_MEDIA_TYPE = "text/csv"
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# RESPONSEFORMAT values, as DALI short names or media types, and their media type
+RESPONSE_FORMATS = {
+    "votable": VOTABLE_MEDIA_TYPE,
+    VOTABLE_MEDIA_TYPE: VOTABLE_MEDIA_TYPE,
+    "text/xml": VOTABLE_MEDIA_TYPE,
+    "csv": CSV_MEDIA_TYPE,
+    CSV_MEDIA_TYPE: CSV_MEDIA_TYPE,
+    "json": JSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE: JSON_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE,
+    ARROW_MEDIA_TYPE: ARROW_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE: PARQUET_MEDIA_TYPE,
+}
+
+
+def response_media_type(response_format: str | None) -> str:
+    """
+    Return the media type for a RESPONSEFORMAT value, a VOTable by default.
+    Formats that need pyarrow are rejected when it is not installed.
+    """
+    media_type = RESPONSE_FORMATS.get((response_format or "votable").lower())
+    if media_type is None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid RESPONSEFORMAT: {response_format}. "
+            "Expected one of votable, csv, json, arrow or parquet.",
+        )
+    if media_type in (ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE) and pa is None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"RESPONSEFORMAT {response_format} is not available on this server.",
+        )
+    return media_type
+
+
+def write_csv(columns: dict[str, np.ndarray], infos: list[tuple[str, str]]) -> str:
+    """
+    Write the columns as CSV, preceded by the INFO metadata as '#' comment
+    lines. Values use Python's shortest round-trip float representation.
+    """
+    lines = [f"# {name}: {value}" for name, value in infos]
+    lines.append(",".join(columns))
+    values = [map(repr, array.tolist()) for array in columns.values()]
+    lines.extend(map(",".join, zip(*values, strict=True)))
+    return "\n".join(lines) + "\n"
+
+
+def write_json(columns: dict[str, np.ndarray], infos: list[tuple[str, str]]) -> str:
+    """
+    Write the result as a JSON object with the INFO metadata, the field
+    descriptions and the data stored column by column.
+    """
+    return json.dumps(
+        {
+            "metadata": dict(infos),
+            "fields": FIELDS,
+            "data": {name: array.tolist() for name, array in columns.items()},
+        }
+    )
+
+
+def _arrow_table(columns: dict[str, np.ndarray], infos: list[tuple[str, str]]):
+    """Build an Arrow table with the field descriptions and INFO metadata as schema metadata."""
+    schema = pa.schema(
+        [
+            pa.field(
+                field["name"],
+                pa.float64(),
+                nullable=False,
+                metadata={key: value for key, value in field.items() if key != "name"},
+            )
+            for field in FIELDS
+        ],
+        metadata=dict(infos),
+    )
+    return pa.Table.from_arrays([pa.array(columns[field["name"]]) for field in FIELDS], schema=schema)
+
+
+def write_arrow(columns: dict[str, np.ndarray], infos: list[tuple[str, str]]) -> bytes:
+    """Write the result as an Arrow IPC stream."""
+    table = _arrow_table(columns, infos)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def write_parquet(columns: dict[str, np.ndarray], infos: list[tuple[str, str]]) -> bytes:
+    """Write the result as a Parquet file."""
+    with BytesIO() as stream:
+        pq.write_table(_arrow_table(columns, infos), stream)
+        return stream.getvalue()
+
+
+WRITERS: dict[str, Callable[[dict[str, np.ndarray], list[tuple[str, str]]], bytes | str]] = {
+    CSV_MEDIA_TYPE: write_csv,
+    JSON_MEDIA_TYPE: write_json,
+    ARROW_MEDIA_TYPE: write_arrow,
+    PARQUET_MEDIA_TYPE: write_parquet,
+}
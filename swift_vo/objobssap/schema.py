@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import base64
+import binascii
+
 from astropy.time import Time  # type: ignore[import-untyped]
 from fastapi import HTTPException
 from pydantic import BaseModel, Field
@@ -56,3 +59,31 @@ class ObjObsSAPQueryParameters(BaseModel):
     pos: VOPosition
     time: VOTimeRange
     min_obs: float
+
+
+class VOCursor(BaseModel):
+    """
+    Continuation cursor of a paged query. It records the query it belongs to,
+    with the time range as originally requested so that the next page hits
+    the same cached upstream windows, and the t_start of the last window
+    already returned.
+    """
+
+    s_ra: float
+    s_dec: float
+    t_min: float
+    t_max: float
+    min_obs: float
+    after: float
+
+    def to_string(self) -> str:
+        """Encodes the cursor as an opaque URL-safe token."""
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode().rstrip("=")
+
+    @classmethod
+    def from_string(cls, value: str) -> VOCursor:
+        """Decodes a token made by ``to_string`` into a VOCursor object."""
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+        except (binascii.Error, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid cursor: {value}.") from e
@@ -1,6 +1,9 @@
+import asyncio
+import time
 from datetime import UTC, datetime
 from io import BytesIO
 
+import numpy as np
 from astropy.io.votable.tree import (  # type: ignore[import-untyped]
     Field,
     Info,
@@ -11,7 +14,161 @@ from astropy.io.votable.tree import (  # type: ignore[import-untyped]
 from astropy.time import Time  # type: ignore[import-untyped]
 from swifttools.swift_too import VisQuery  # type: ignore[import-untyped]
 
-from ..constants import T_MAX_HARD_LIMIT_DELTA
+from ..base.executor import run_cpu_bound, run_upstream
+from ..constants import (
+    ADAPTIVE_EDGE_MARGIN,
+    ADAPTIVE_RESOLUTION,
+    HIRES_MAX_SPAN,
+    T_MAX_HARD_LIMIT_DELTA,
+    UPSTREAM_CHUNK_OVERLAP,
+    UPSTREAM_CHUNK_SPAN,
+    UPSTREAM_QUERY_CONCURRENCY,
+)
+from ..visibility.intervals import IntervalSet
+from .cache import window_cache
+from .formats import FIELDS, VOTABLE_MEDIA_TYPE, WRITERS, response_media_type
+from .schema import VOCursor
+
+RESOURCE_DESCRIPTION = (
+    "NASA Neil Gehrels Swift Observatory Science Operations Center - "
+    + "Object Observability Simple Access Protocol (ObjObsSAP)"
+)
+
+MJD_EPOCH = np.datetime64("1858-11-17T00:00:00", "us")
+
+
+def datetime64_to_mjd(values: np.ndarray) -> np.ndarray:
+    """Convert an array of UTC datetime64 values to float64 MJD."""
+    return (values - MJD_EPOCH) / np.timedelta64(1, "D")
+
+
+def entries_to_bounds(entries) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Collect the begin and end times of upstream visibility windows into two
+    datetime64 arrays. Upstream times are UTC.
+    """
+    begin = np.array([e.begin for e in entries], dtype="datetime64[us]")
+    end = np.array([e.end for e in entries], dtype="datetime64[us]")
+    return begin, end
+
+
+def fetch_upstream_bounds(
+    s_ra: float,
+    s_dec: float,
+    begin: datetime,
+    end: datetime,
+    hires: bool = True,
+    timeout: float | None = None,
+):
+    """
+    Query the upstream service for the visibility windows of a position,
+    returning their begin and end times as ``entries_to_bounds`` does, or
+    None if the query failed. This blocks on the upstream service and parses
+    its response synchronously, so it is run in the upstream pool.
+
+    ``timeout`` replaces the client's timeout of each step of the HTTP
+    exchange (connecting, sending, and waiting for the response), so that a
+    query abandoned at the request deadline soon frees its thread. Callers
+    still bound their wait with ``asyncio.wait_for``, which holds even when
+    the client timeout cannot be set.
+    """
+    vis_windows = VisQuery(ra=s_ra, dec=s_dec, begin=begin, end=end, hires=hires, auto_submit=False)
+    # swifttools takes no timeout argument, and only reads it from the private _timeout attribute
+    # (seconds, 120 by default). Versions without that attribute keep their own timeout.
+    if timeout is not None and hasattr(vis_windows, "_timeout"):
+        vis_windows._timeout = timeout
+    if not vis_windows.submit_get():
+        return None
+    return entries_to_bounds(vis_windows.entries)
+
+
+def merge_bounds(begin: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Merge overlapping or touching intervals, returning them sorted by begin time."""
+    merged = IntervalSet(begin, end)
+    return merged.begin, merged.end
+
+
+def candidate_spans(
+    begin: np.ndarray,
+    end: np.ndarray,
+    t_min: np.datetime64,
+    t_max: np.datetime64,
+    min_obs: float,
+    margin: float = ADAPTIVE_EDGE_MARGIN,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Work out which spans of time to query at high resolution from low
+    resolution windows. High resolution windows only ever lie within low
+    resolution ones, as they add the Earth occultation and SAA constraints,
+    so windows that cannot be ``min_obs`` seconds long even allowing
+    ``margin`` seconds of error at either end are skipped. The others are
+    widened by ``margin``, clipped to the query range and merged.
+    """
+    pad = np.timedelta64(round(margin * 1e6), "us")
+    keep = (end - begin) + 2 * pad >= np.timedelta64(round(min_obs * 1e6), "us")
+    lower = np.maximum(begin[keep] - pad, t_min)
+    upper = np.minimum(end[keep] + pad, t_max)
+    valid = lower < upper
+    return merge_bounds(lower[valid], upper[valid])
+
+
+def split_span(
+    begin: np.datetime64,
+    end: np.datetime64,
+    max_days: float = HIRES_MAX_SPAN,
+    overlap: float = UPSTREAM_CHUNK_OVERLAP,
+) -> list:
+    """
+    Split a span of time into consecutive pieces at most ``max_days`` long,
+    each but the last overlapping the next by ``overlap`` seconds.
+    """
+    extra = np.timedelta64(round(overlap * 1e6), "us")
+    step = np.timedelta64(round(max_days * 86400e6), "us") - extra
+    edges = [*np.arange(begin, end, step), end]
+    return [(start, min(stop + extra, end)) for start, stop in zip(edges[:-1], edges[1:], strict=True)]
+
+
+def mjd_to_datetime64(value: float) -> np.datetime64:
+    """Convert a float64 MJD to a UTC datetime64, rounded to the microsecond."""
+    return MJD_EPOCH + np.timedelta64(round(value * 86400e6), "us")
+
+
+def select_windows(
+    begin: np.ndarray,
+    end: np.ndarray,
+    min_obs: float,
+    maxrec: int | None = None,
+    after: np.datetime64 | None = None,
+) -> tuple[np.ndarray, bool]:
+    """
+    Select the upstream windows at least ``min_obs`` seconds long, and that
+    start strictly after ``after`` if given, returning the indices of at most
+    ``maxrec`` of them and whether further windows were left out.
+    """
+    keep = (end - begin) / np.timedelta64(1, "s") >= min_obs
+    if after is not None:
+        keep &= begin > after
+    selected = np.flatnonzero(keep)
+    if maxrec is None:
+        return selected, False
+    return selected[:maxrec], len(selected) > maxrec
+
+
+def bounds_to_windows(
+    begin: np.ndarray,
+    end: np.ndarray,
+    min_obs: float,
+    maxrec: int | None = None,
+    after: np.datetime64 | None = None,
+) -> tuple[np.ndarray, np.ndarray, bool]:
+    """
+    Convert upstream begin and end times into float64 MJD t_start and t_stop
+    arrays, keeping only the windows chosen by ``select_windows``. Only the
+    selected windows are converted. The third value records whether windows
+    beyond MAXREC were left out.
+    """
+    selected, overflow = select_windows(begin, end, min_obs, maxrec=maxrec, after=after)
+    return datetime64_to_mjd(begin[selected]), datetime64_to_mjd(end[selected]), overflow
 
 
 class ObjObsSAPService:
@@ -19,12 +176,29 @@ class ObjObsSAPService:
     This class is the service class for the ObjObsSAP service.
     """
 
-    def __init__(self, s_ra, s_dec, t_min, t_max, min_obs, maxrec=None, upload=None):
+    def __init__(
+        self,
+        s_ra,
+        s_dec,
+        t_min,
+        t_max,
+        min_obs,
+        maxrec=None,
+        upload=None,
+        after=None,
+        adaptive=ADAPTIVE_RESOLUTION,
+        deadline=None,
+    ):
         """
-        This method initializes the service class.
+        This method initializes the service class. ``after`` is the t_start
+        (MJD) of the last window of the previous page when paging a query,
+        ``adaptive`` selects adaptive resolution upstream queries, and
+        ``deadline`` is the ``time.monotonic()`` time by which upstream
+        queries must be done.
         """
         self.s_ra = s_ra
         self.s_dec = s_dec
+        self.requested_time = (t_min, t_max)
         self.t_min = Time(t_min, format="mjd").datetime
         requested_t_max = Time(t_max, format="mjd").datetime
         hard_limit_mjd = int(Time.now().mjd) + T_MAX_HARD_LIMIT_DELTA
@@ -35,26 +209,249 @@ class ObjObsSAPService:
         self.min_obs = min_obs
         self.maxrec = maxrec
         self.upload = upload
-        self.windows = []
+        self.after = after
+        self.adaptive = adaptive
+        self.deadline = deadline
+        self.overflow = False
+        self.partial = False
+        self.t_start = np.empty(0)
+        self.t_stop = np.empty(0)
+
+    @property
+    def windows(self) -> list[tuple[float, float]]:
+        """The visibility windows as a list of (t_start, t_stop) MJD pairs."""
+        return list(zip(self.t_start.tolist(), self.t_stop.tolist(), strict=True))
+
+    @windows.setter
+    def windows(self, windows) -> None:
+        """Set the visibility windows from a sequence of (t_start, t_stop) MJD pairs."""
+        pairs = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+        self.t_start = np.ascontiguousarray(pairs[:, 0])
+        self.t_stop = np.ascontiguousarray(pairs[:, 1])
+
+    @property
+    def cache_key(self) -> tuple:
+        """
+        Key of this query's upstream windows in the window cache. Adaptive
+        resolution leaves out windows shorter than MIN_OBS, so its windows are
+        cached per MIN_OBS.
+        """
+        if self.adaptive:
+            return (self.s_ra, self.s_dec, self.t_min, self.t_max, self.min_obs or 0)
+        return (self.s_ra, self.s_dec, self.t_min, self.t_max)
+
+    @property
+    def cached(self) -> bool:
+        """Whether this query can be answered without calling the upstream service."""
+        return self.maxrec == 0 or self.cache_key in window_cache
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, or None if there is no deadline."""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    async def fetch_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        This method fetches the begin and end times of the visibility windows
+        for the position and time range from the upstream service, in one
+        query or, if UPSTREAM_CHUNK_SPAN is set, in pieces at most that many
+        days long. Failed upstream queries give no
+        windows and are not cached. When the deadline expires, the windows of
+        the pieces fetched so far are returned, uncached, with ``partial``
+        set.
+        """
+        bounds = window_cache.get(self.cache_key)
+        if bounds is None:
+            try:
+                if self.adaptive:
+                    bounds = await self.fetch_adaptive_bounds()
+                else:
+                    t_min, t_max = np.datetime64(self.t_min, "us"), np.datetime64(self.t_max, "us")
+                    if UPSTREAM_CHUNK_SPAN:
+                        pieces = split_span(t_min, t_max, UPSTREAM_CHUNK_SPAN)
+                    else:
+                        pieces = [(t_min, t_max)]
+                    bounds = await self.fetch_pieces(pieces)
+            except TimeoutError:
+                self.partial = True
+                return entries_to_bounds([])
+            if bounds is None:
+                return entries_to_bounds([])
+            if not self.partial:
+                window_cache.put(self.cache_key, bounds)
+        return bounds
+
+    async def fetch_adaptive_bounds(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        This method fetches the visibility windows at adaptive resolution: a
+        low resolution query over the whole range finds candidate windows, and
+        high resolution queries, fetched by ``fetch_pieces`` and at most
+        HIRES_MAX_SPAN long, cover only the candidates that could be at least
+        MIN_OBS long.
+
+        The result matches a high resolution query over the whole range for
+        every window at least MIN_OBS long, provided the low resolution window
+        boundaries are within ADAPTIVE_EDGE_MARGIN of the true Sun, Moon and
+        pole constraint boundaries. Shorter windows may be missing. If the
+        deadline expires, only the windows of the high resolution queries
+        that completed are returned.
+        """
+        coarse = await asyncio.wait_for(
+            run_upstream(
+                fetch_upstream_bounds,
+                self.s_ra,
+                self.s_dec,
+                self.t_min,
+                self.t_max,
+                hires=False,
+                timeout=self.remaining(),
+            ),
+            self.remaining(),
+        )
+        if coarse is None:
+            return None
+        coarse_begin, coarse_end = coarse
+        t_min, t_max = np.datetime64(self.t_min, "us"), np.datetime64(self.t_max, "us")
+        spans = candidate_spans(coarse_begin, coarse_end, t_min, t_max, self.min_obs or 0)
+        pieces = [piece for span in zip(*spans, strict=True) for piece in split_span(*span)]
+        return await self.fetch_pieces(pieces)
+
+    async def fetch_pieces(self, pieces: list) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        This method fetches the high resolution windows of consecutive
+        (begin, end) pieces of time, at most UPSTREAM_QUERY_CONCURRENCY at a
+        time, and merges them. If the deadline expires, pieces not yet sent
+        are cancelled, pieces under way are abandoned, and only the windows
+        of the completed pieces are returned, with ``partial`` set. Returns
+        None if any completed upstream query failed.
+        """
+        if not pieces:
+            return entries_to_bounds([])
+        semaphore = asyncio.Semaphore(UPSTREAM_QUERY_CONCURRENCY)
+
+        async def fetch(begin: np.datetime64, end: np.datetime64):
+            async with semaphore:
+                return await run_upstream(
+                    fetch_upstream_bounds,
+                    self.s_ra,
+                    self.s_dec,
+                    begin.item(),
+                    end.item(),
+                    timeout=self.remaining(),
+                )
+
+        tasks = [asyncio.ensure_future(fetch(begin, end)) for begin, end in pieces]
+        _, pending = await asyncio.wait(tasks, timeout=self.remaining())
+        for task in pending:
+            # Pieces still waiting for their turn or for the upstream pool are never sent
+            task.cancel()
+        self.partial = self.partial or bool(pending)
+        parts = [task.result() for task in tasks if task not in pending]
+        if any(part is None for part in parts):
+            return None
+        if not parts:
+            return entries_to_bounds([])
+        # Windows cut at the boundary between two pieces are joined again
+        return merge_bounds(np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
 
     async def query(self):
         """
-        This method queries the ObjObsSAP service.
-        """
-        if self.maxrec != 0:
-            vis_windows = VisQuery(
-                ra=self.s_ra, dec=self.s_dec, begin=self.t_min, end=self.t_max, hires=True, auto_submit=False
-            )
-            await vis_windows.get()
-            self.windows = [
-                (Time(e.begin).mjd, Time(e.end).mjd)
-                for e in vis_windows.entries
-                if e.length.total_seconds() >= self.min_obs
-            ]
+        This method queries the ObjObsSAP service. MAXREC is applied before
+        the selected windows are converted, and ``overflow`` records whether
+        windows beyond MAXREC were left out.
+        """
+        if self.maxrec == 0:
+            return
+        begin, end = await self.fetch_bounds()
+        after = None if self.after is None else mjd_to_datetime64(self.after)
+        self.t_start, self.t_stop, self.overflow = bounds_to_windows(
+            begin, end, self.min_obs, maxrec=self.maxrec, after=after
+        )
+
+    @property
+    def cursor(self) -> str | None:
+        """
+        Opaque cursor for the page following this result, or None if the
+        result did not overflow.
+        """
+        if not self.overflow or not len(self.t_start):
+            return None
+        t_min, t_max = self.requested_time
+        return VOCursor(
+            s_ra=self.s_ra,
+            s_dec=self.s_dec,
+            t_min=t_min,
+            t_max=t_max,
+            min_obs=self.min_obs or 0,
+            after=self.t_start[-1],
+        ).to_string()
+
+    def infos(self, query_url: str = "") -> list[tuple[str, str]]:
+        """
+        This method returns the DALI INFO metadata of the result as (name,
+        value) pairs, in the order they appear in the VOTable.
+        """
+        # Get the current date/time in UTC for the REQUEST_DATE info
+        now_utc: datetime = datetime.now(tz=UTC)
+        request_date_string: str = now_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        infos = [
+            ("QUERY_STATUS", "OVERFLOW" if self.overflow or self.partial else "OK"),
+            ("SERVICE_PROTOCOL", "ivo://ivoa.net/std/ObjObsSAP"),
+            ("REQUEST", query_url),
+            ("REQUEST_DATE", request_date_string),
+            ("POS", f"{self.s_ra},{self.s_dec}"),
+            ("TIME", f"{Time(self.t_min).mjd}/{Time(self.t_max).mjd}"),
+        ]
+        if self.t_max_hard_limit_used:
+            infos.append(("T_MAX_HARD_LIMIT", str(self.t_max_hard_limit)))
+        if self.min_obs is not None and self.min_obs > 0:
+            infos.append(("MIN_OBS", str(self.min_obs)))
         if self.maxrec is not None:
-            self.windows = self.windows[: self.maxrec]
+            infos.append(("MAXREC", str(self.maxrec)))
+        if self.upload is not None:
+            infos.append(("UPLOAD", str(self.upload)))
+        if self.cursor is not None:
+            infos.append(("CURSOR", self.cursor))
+        if self.partial:
+            infos.append(("PARTIAL", "Request deadline expired before all windows were fetched"))
+        return infos
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """
+        This method returns the result columns, named as in ``FIELDS``, as
+        float64 arrays derived from the window arrays.
+        """
+        return {
+            "t_validity": np.full(len(self.t_start), self.t_start[0] + 10 if len(self.t_start) else 0.0),
+            "t_start": self.t_start,
+            "t_stop": self.t_stop,
+            "t_observability": (self.t_stop - self.t_start) * 86400,  # in seconds
+        }
+
+    async def format(
+        self, response_format: str | None = None, query_url: str = ""
+    ) -> tuple[bytes | str, str]:
+        """
+        This method formats the query results in the requested RESPONSEFORMAT
+        (a VOTable by default), returning the content and its media type. As
+        with the VOTable, large results are serialized in the CPU offload pool.
+        """
+        media_type = response_media_type(response_format)
+        if media_type == VOTABLE_MEDIA_TYPE:
+            return await self.vo_format(query_url=query_url), media_type
+        writer = WRITERS[media_type]
+        content = await run_cpu_bound(writer, self.columns(), self.infos(query_url), size=len(self.t_start))
+        return content, media_type
 
     async def vo_format(self, query_url: str = "") -> str:
+        """
+        This method formats the query results into a VOTable. Building and
+        serializing the VOTable is CPU-bound, so large results are rendered in
+        the CPU offload pool rather than on the event loop.
+        """
+        return await run_cpu_bound(self._vo_format, query_url, size=len(self.t_start))
+
+    def _vo_format(self, query_url: str = "") -> str:
         """
         This method formats the query results into a VOTable using astropy's
         VOTable support.
@@ -65,10 +462,6 @@ class ObjObsSAPService:
         VOTable library automatically generates these attributes.
         """
 
-        # Get the current date/time in UTC for the REQUEST_DATE info
-        now_utc: datetime = datetime.now(tz=UTC)
-        request_date_string: str = now_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
-
         # Create a new VOTable file
         votable = VOTableFile()
 
@@ -79,83 +472,22 @@ class ObjObsSAPService:
         resource.tables.append(table)
 
         # Describe resources
-        resource.description = (
-            "NASA Neil Gehrels Swift Observatory Science Operations Center - "
-            + "Object Observability Simple Access Protocol (ObjObsSAP)"
-        )
-        resource.infos.append(Info(name="QUERY_STATUS", value="OK"))
-
-        service_protocol_info = Info(name="SERVICE_PROTOCOL", value="ivo://ivoa.net/std/ObjObsSAP")
-        resource.infos.append(service_protocol_info)
-
-        resource.infos.append(Info(name="REQUEST", value=query_url))
-        resource.infos.append(
-            Info(name="REQUEST_DATE", value=request_date_string, content="Query execution date")
-        )
-
-        resource.infos.append(Info(name="POS", value=f"{self.s_ra},{self.s_dec}"))
-        resource.infos.append(Info(name="TIME", value=f"{Time(self.t_min).mjd}/{Time(self.t_max).mjd}"))
-        if self.t_max_hard_limit_used:
-            resource.infos.append(Info(name="T_MAX_HARD_LIMIT", value=str(self.t_max_hard_limit)))
-        if self.min_obs is not None and self.min_obs > 0:
-            resource.infos.append(Info(name="MIN_OBS", value=str(self.min_obs)))
-        if self.maxrec is not None:
-            resource.infos.append(Info(name="MAXREC", value=str(self.maxrec)))
-        if self.upload is not None:
-            resource.infos.append(Info(name="UPLOAD", value=str(self.upload)))
+        resource.description = RESOURCE_DESCRIPTION
+        for name, value in self.infos(query_url):
+            if name == "REQUEST_DATE":
+                resource.infos.append(Info(name=name, value=value, content="Query execution date"))
+            else:
+                resource.infos.append(Info(name=name, value=value))
 
         # Define the table
-        table.fields.extend(
-            [
-                Field(
-                    votable,
-                    name="t_validity",
-                    datatype="double",
-                    ucd="time.validity",
-                    utype="Char.TimeAxis.Coverage.Time",
-                    unit="d",
-                ),
-                Field(
-                    votable,
-                    name="t_start",
-                    datatype="double",
-                    ucd="time.start",
-                    utype="Char.TimeAxis.Coverage.Bounds.Limits.StartTime",
-                    unit="d",
-                ),
-                Field(
-                    votable,
-                    name="t_stop",
-                    datatype="double",
-                    ucd="time.end",
-                    utype="Char.TimeAxis.Coverage.Bounds.Limits.StopTime",
-                    unit="d",
-                ),
-                Field(
-                    votable,
-                    name="t_observability",
-                    datatype="double",
-                    ucd="time.duration",
-                    utype="Char.TimeAxis.Coverage.Support.Extent",
-                    unit="s",
-                ),
-            ]
-        )
+        table.fields.extend([Field(votable, **field) for field in FIELDS])
 
-        # Add windows to the table
-        n_windows = len(self.windows)
-        table.create_arrays(n_windows)
-        for i in range(0, n_windows):
-            t_start = self.windows[i][0]
-            t_stop = self.windows[i][1]
-            t_validity = self.windows[0][0] + 10
-            t_observability = t_stop - t_start  # Duration in days
-            table.array[i] = (
-                t_validity,
-                t_start,
-                t_stop,
-                t_observability * 86400,  # t_observability in seconds
-            )
+        # Add windows to the table, filling whole columns at once
+        columns = self.columns()
+        table.create_arrays(len(self.t_start))
+        if len(self.t_start):
+            for name, values in columns.items():
+                table.array[name] = values
 
         # Create the VOTable XML as a string and return it
         with BytesIO() as stream:
@@ -164,3 +496,97 @@ class ObjObsSAPService:
             xml_out = stream.read().decode()
 
         return xml_out
+
+
+class JointObsService(ObjObsSAPService):
+    """
+    This class is the service class for joint observability queries: the
+    windows in which several positions are all observable at once, for
+    coordinated or multi-source observations. They are the intersection of
+    the upstream windows of each position, which are fetched and cached as
+    for single position queries, so a joint query of already queried
+    positions does not call the upstream service.
+    """
+
+    def __init__(
+        self,
+        positions,
+        t_min,
+        t_max,
+        min_obs,
+        maxrec=None,
+        upload=None,
+        adaptive=ADAPTIVE_RESOLUTION,
+        deadline=None,
+    ):
+        """
+        This method initializes the service class. ``positions`` is a
+        sequence of (s_ra, s_dec) pairs.
+        """
+        (s_ra, s_dec), *_ = positions
+        super().__init__(
+            s_ra,
+            s_dec,
+            t_min,
+            t_max,
+            min_obs,
+            maxrec=maxrec,
+            upload=upload,
+            adaptive=adaptive,
+            deadline=deadline,
+        )
+        self.targets = [
+            ObjObsSAPService(ra, dec, t_min, t_max, min_obs, adaptive=adaptive, deadline=deadline)
+            for ra, dec in positions
+        ]
+
+    @property
+    def cached(self) -> bool:
+        """Whether the windows of every position are cached."""
+        return self.maxrec == 0 or all(target.cached for target in self.targets)
+
+    async def fetch_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        This method fetches the windows of every position, and returns the
+        begin and end times of their intersection. The result is partial if
+        the windows of any position are.
+
+        Positions are fetched one after the other, so that a joint query,
+        which holds a single admission slot, has no more upstream queries in
+        flight than a single position query.
+        """
+        bounds = [await target.fetch_bounds() for target in self.targets]
+        self.partial = any(target.partial for target in self.targets)
+        first, *others = (IntervalSet(begin, end) for begin, end in bounds)
+        joint = first.intersection(*others)
+        return joint.begin, joint.end
+
+    @property
+    def cursor(self) -> None:
+        """Joint queries are not paged."""
+        return None
+
+    def infos(self, query_url: str = "") -> list[tuple[str, str]]:
+        """
+        This method returns the DALI INFO metadata of the result, with every
+        position in the POS INFO, separated by semicolons.
+        """
+        positions = ";".join(f"{target.s_ra},{target.s_dec}" for target in self.targets)
+        return [(name, positions if name == "POS" else value) for name, value in super().infos(query_url)]
+
+
+def error_votable(message: str) -> str:
+    """
+    Format an error as a DALI error VOTable, with QUERY_STATUS set to ERROR
+    and the message as the content of the status INFO element.
+    """
+    votable = VOTableFile()
+    resource = Resource()
+    votable.resources.append(resource)
+    status = Info(name="QUERY_STATUS", value="ERROR")
+    status.content = message
+    resource.infos.append(status)
+
+    with BytesIO() as stream:
+        votable.to_xml(stream)
+        return stream.getvalue().decode()
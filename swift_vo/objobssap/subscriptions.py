@@ -0,0 +1,245 @@
+"""Subscriptions to changes of the visibility windows of targets, as server-sent events."""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+
+import numpy as np
+
+from ..constants import (
+    SUBSCRIPTION_CHECK_INTERVAL,
+    SUBSCRIPTION_KEEPALIVE,
+    SUBSCRIPTION_REFRESH_CONCURRENCY,
+    SUBSCRIPTION_REFRESH_INTERVAL,
+)
+from ..visibility.orbit import current_tle
+from ..visibility.store import ephemeris_store
+from .cache import window_cache
+from .service import ObjObsSAPService
+
+logger = logging.getLogger(__name__)
+
+# A subscribed target: (s_ra, s_dec, t_min, t_max, min_obs), as in an ObjObsSAP query
+TargetKey = tuple[float, float, float, float, float]
+
+
+def server_sent_event(event: str, data: dict) -> str:
+    """Encode a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def describe(key: TargetKey) -> dict:
+    """The query parameters of a target, as sent with its events."""
+    s_ra, s_dec, t_min, t_max, min_obs = key
+    return {"pos": f"{s_ra},{s_dec}", "time": f"{t_min}/{t_max}", "min_obs": min_obs}
+
+
+class WatchedTarget:
+    """The latest windows of a subscribed target, and the queues of its subscribers."""
+
+    def __init__(self, windows: np.ndarray):
+        """
+        This method initializes the target with its (N, 2) array of t_start
+        and t_stop MJD pairs.
+        """
+        self.windows = windows
+        self.subscribers: set[asyncio.Queue] = set()
+
+
+class SubscriptionRegistry:
+    """
+    Keeps the windows of every target that clients subscribed to, once per
+    unique target however many clients subscribed to it, and pushes the
+    windows that changed to each subscriber.
+
+    Windows are recomputed from the upstream service when a new TLE or
+    ephemeris version appears locally (checked every ``check_interval``
+    seconds), as the upstream ephemeris changes at the same time, and every
+    ``refresh_interval`` seconds to pick up changes in the observing plan.
+    At most ``max_concurrent`` targets are recomputed at once, and failed
+    upstream queries keep the previous windows.
+    """
+
+    def __init__(
+        self,
+        check_interval: float = SUBSCRIPTION_CHECK_INTERVAL,
+        refresh_interval: float = SUBSCRIPTION_REFRESH_INTERVAL,
+        keepalive: float = SUBSCRIPTION_KEEPALIVE,
+        max_concurrent: int = SUBSCRIPTION_REFRESH_CONCURRENCY,
+    ):
+        """
+        This method initializes the registry.
+        """
+        self.check_interval = check_interval
+        self.refresh_interval = refresh_interval
+        self.keepalive = keepalive
+        self.max_concurrent = max_concurrent
+        self.targets: dict[TargetKey, WatchedTarget] = {}
+        self.recomputes = 0
+        self.updates = 0
+        self._version: tuple | None = None
+        self._refreshed = 0.0
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def version() -> tuple:
+        """The versions of the local TLE and ephemeris, which change when a new ephemeris lands."""
+        stored = ephemeris_store.current()
+        return (current_tle(), stored.header["version"] if stored else None)
+
+    @staticmethod
+    async def compute(key: TargetKey, refresh: bool = False) -> np.ndarray | None:
+        """
+        Compute the windows of a target as an ObjObsSAP query would, going
+        back to the upstream service if ``refresh``. Returns None if the
+        upstream query failed.
+        """
+        vo = ObjObsSAPService(*key)
+        if refresh:
+            window_cache.discard(vo.cache_key)
+        await vo.query()
+        if vo.cache_key not in window_cache:
+            return None
+        return np.column_stack([vo.t_start, vo.t_stop])
+
+    @staticmethod
+    async def cached_windows(key: TargetKey) -> np.ndarray:
+        """The windows of a target from the window cache, or none if they are not cached."""
+        vo = ObjObsSAPService(*key)
+        if not vo.cached:
+            return np.empty((0, 2))
+        await vo.query()
+        return np.column_stack([vo.t_start, vo.t_stop])
+
+    def cached(self, key: TargetKey) -> bool:
+        """Whether subscribing to a target needs no upstream query."""
+        return key in self.targets or ObjObsSAPService(*key).cached
+
+    async def watch(self, key: TargetKey) -> None:
+        """Start keeping the windows of a target, computing them if it is new."""
+        if key in self.targets:
+            return
+        windows = await self.compute(key)
+        self.recomputes += 1
+        if key not in self.targets:
+            self.targets[key] = WatchedTarget(np.empty((0, 2)) if windows is None else windows)
+
+    async def stream(self, keys: list[TargetKey]) -> AsyncIterator[str]:
+        """
+        Stream server-sent events for targets passed to ``watch``: a ``snapshot`` of the
+        windows of each target, then an ``update`` with the windows added and
+        removed whenever they change, and keep-alive comments in between.
+        """
+        queue: asyncio.Queue[str | None] = asyncio.Queue()
+        for key in keys:
+            target = self.targets.get(key)
+            if target is None:
+                # A refresh may have forgotten the target since it was watched.
+                # Querying upstream here would bypass admission control, so the
+                # windows come from the cache, or else from the next refresh.
+                windows = await self.cached_windows(key)
+                target = self.targets.setdefault(key, WatchedTarget(windows))
+            target.subscribers.add(queue)
+            queue.put_nowait(
+                server_sent_event("snapshot", {**describe(key), "windows": target.windows.tolist()})
+            )
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.keepalive)
+                except TimeoutError:
+                    message = ": keepalive\n\n"
+                if message is None:
+                    return
+                yield message
+        finally:
+            for key in keys:
+                watched: WatchedTarget | None = self.targets.get(key)
+                if watched is not None:
+                    watched.subscribers.discard(queue)
+
+    def publish(self, key: TargetKey, windows: np.ndarray) -> None:
+        """Record new windows of a target, and push the changes to its subscribers."""
+        target = self.targets[key]
+        old = set(map(tuple, target.windows.tolist()))
+        new = set(map(tuple, windows.tolist()))
+        target.windows = windows
+        if old == new:
+            return
+        message = server_sent_event(
+            "update", {**describe(key), "added": sorted(new - old), "removed": sorted(old - new)}
+        )
+        for queue in target.subscribers:
+            queue.put_nowait(message)
+        self.updates += 1
+
+    async def refresh(self) -> None:
+        """
+        Recompute the windows of every subscribed target from the upstream
+        service, and forget targets nobody subscribes to any more.
+        """
+        for key in [key for key, target in self.targets.items() if not target.subscribers]:
+            del self.targets[key]
+        keys = list(self.targets)
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def recompute(key: TargetKey) -> np.ndarray | None:
+            async with semaphore:
+                return await self.compute(key, refresh=True)
+
+        results = await asyncio.gather(*(recompute(key) for key in keys))
+        self.recomputes += len(keys)
+        for key, windows in zip(keys, results, strict=True):
+            if windows is None:
+                logger.warning("Keeping the windows of %s, as the upstream query failed", describe(key))
+            elif key in self.targets:
+                self.publish(key, windows)
+
+    async def _run(self) -> None:
+        """Refresh the windows when a new ephemeris lands, or when due, until cancelled."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            version = self.version()
+            due = time.monotonic() - self._refreshed >= self.refresh_interval
+            if version != self._version or due:
+                self._version = version
+                self._refreshed = time.monotonic()
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("Refreshing subscribed windows failed")
+
+    def start(self) -> None:
+        """Start refreshing on the running event loop."""
+        if self._task is None or self._task.done():
+            self._version = self.version()
+            self._refreshed = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop refreshing, and end every event stream."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for target in self.targets.values():
+            for queue in target.subscribers:
+                queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        """Number of unique targets and subscribers, recomputations and updates pushed."""
+        return {
+            "targets": len(self.targets),
+            "subscribers": len(
+                {id(queue) for target in self.targets.values() for queue in target.subscribers}
+            ),
+            "recomputes": self.recomputes,
+            "updates": self.updates,
+        }
+
+
+subscription_registry = SubscriptionRegistry()
@@ -0,0 +1 @@
+"""Observable sky service, returning Swift's sky coverage as a MOC."""
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+
+from ..base.admission import admission_controller, client_id
+from ..base.api import app
+from ..objobssap.api import parse_min_obs, parse_time
+from ..objobssap.schema import VOTimeRange
+from .service import ObservableSkyService, response_media_type
+
+router = APIRouter(prefix="/observablesky", tags=["Observable Sky"])
+
+
+@router.get(
+    "/query",
+    response_class=Response,
+    responses={
+        200: {
+            "content": {"application/fits": {}, "text/plain": {}, "application/json": {}},
+            "description": "Returns the observable sky as an IVOA Multi-Order Coverage map (MOC)",
+        },
+        503: {"description": "Service is at capacity, or Swift's orbit is not available"},
+    },
+)
+async def observable_sky(
+    request: Request,
+    time: VOTimeRange = Depends(parse_time),
+    min_obs: float = Depends(parse_min_obs),
+    responseformat: str | None = Query(
+        default=None, description="MOC serialization: 'fits' (default), 'ascii' or 'json'"
+    ),
+):
+    """Handles the query for the sky observable for at least MIN_OBS seconds within TIME."""
+    response_media_type(responseformat)
+    service = ObservableSkyService(t_min=time.t_min, t_max=time.t_max, min_obs=min_obs)
+    # Computing chunks missing from the cache is CPU-bound, and subject to admission control
+    async with admission_controller.slot(client_id(request), exempt=service.cached):
+        await service.query()
+    content, media_type = service.moc_format(responseformat)
+    return Response(content=content, media_type=media_type)
+
+
+app.include_router(router)
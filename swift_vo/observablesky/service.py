@@ -0,0 +1,190 @@
+import asyncio
+import math
+
+import numpy as np
+from astropy.time import Time  # type: ignore[import-untyped]
+from fastapi import HTTPException
+
+from ..base.executor import run_cpu_bound
+from ..constants import (
+    OBSERVABLE_SKY_CHUNK_CACHE_SIZE,
+    OBSERVABLE_SKY_CHUNK_CACHE_TTL,
+    OBSERVABLE_SKY_ORDER,
+    OBSERVABLE_SKY_STEP,
+    T_MAX_HARD_LIMIT_DELTA,
+)
+from ..objobssap.cache import WindowCache
+from ..visibility.healpix import moc_cells, moc_to_ascii, moc_to_fits, moc_to_json, npix
+from ..visibility.orbit import TLE, current_tle
+from ..visibility.sky import RunSummary, sky_chunk_summary
+from ..visibility.store import ephemeris_store
+
+# Run summaries of the sky per time chunk. Chunks are whole MJD days (or the
+# part of a day inside the requested range), so overlapping requests share them.
+chunk_cache = WindowCache(maxsize=OBSERVABLE_SKY_CHUNK_CACHE_SIZE, ttl=OBSERVABLE_SKY_CHUNK_CACHE_TTL)
+
+RESPONSE_FORMATS = {
+    "fits": "application/fits",
+    "application/fits": "application/fits",
+    "ascii": "text/plain",
+    "text/plain": "text/plain",
+    "json": "application/json",
+    "application/json": "application/json",
+}
+
+
+def response_media_type(response_format: str | None) -> str:
+    """Return the media type for a RESPONSEFORMAT value, FITS by default."""
+    media_type = RESPONSE_FORMATS.get((response_format or "fits").lower())
+    if media_type is None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid RESPONSEFORMAT: {response_format}. "
+            f"Expected one of {', '.join(RESPONSE_FORMATS)}.",
+        )
+    return media_type
+
+
+def current_orbit() -> TLE | None:
+    """
+    Swift's current TLE, from ``SWIFT_VO_TLE_FILE`` or else the one the
+    ephemeris file was built from, or None if neither is available.
+    """
+    tle = current_tle()
+    if tle is None:
+        stored = ephemeris_store.current()
+        tle = stored.tle if stored is not None else None
+    return tle
+
+
+class ObservableSkyService:
+    """
+    This class is the service class for the observable sky service, which
+    answers which parts of the sky Swift can observe for at least MIN_OBS
+    seconds between T_MIN and T_MAX.
+
+    Swift is in low Earth orbit, so the Earth occults most targets for part
+    of every orbit. The Earth limb constraint is therefore always applied,
+    and queries fail when Swift's orbit is not available. Passages through
+    the South Atlantic Anomaly are not modelled, unlike in ObjObsSAP
+    windows, so the MOC can include sky that ObjObsSAP finds observable for
+    less than MIN_OBS. The metadata records this as SAA_CONSTRAINT F.
+    """
+
+    def __init__(self, t_min, t_max, min_obs, order=OBSERVABLE_SKY_ORDER, step=OBSERVABLE_SKY_STEP):
+        """
+        This method initializes the service class. Time ranges that are
+        inverted, or longer than T_MAX_HARD_LIMIT_DELTA days once clipped to
+        the hard limit, are rejected.
+        """
+        hard_limit_mjd = int(Time.now().mjd) + T_MAX_HARD_LIMIT_DELTA
+        if t_min >= t_max:
+            raise HTTPException(status_code=422, detail="T_MIN must be earlier than T_MAX.")
+        self.t_min = float(t_min)
+        self.t_max_hard_limit_used = t_max > hard_limit_mjd
+        self.t_max = float(min(t_max, hard_limit_mjd))
+        self.t_max_hard_limit = hard_limit_mjd
+        if self.t_max - self.t_min > T_MAX_HARD_LIMIT_DELTA:
+            raise HTTPException(
+                status_code=422, detail=f"TIME may span at most {T_MAX_HARD_LIMIT_DELTA} days."
+            )
+        self.min_obs = min_obs
+        self.order = order
+        self.step = step
+        self.tle = current_orbit()
+        self.ipix = np.empty(0, dtype=np.int64)
+
+    def _chunk_key(self, day: int, start: int, stop: int) -> tuple:
+        """Key of the run summary of a chunk in the chunk cache."""
+        return (self.order, self.step, self.tle, day, start, stop)
+
+    @property
+    def cached(self) -> bool:
+        """Whether every chunk of the time range is cached, so the query needs no computation."""
+        return self.tle is not None and all(self._chunk_key(*chunk) in chunk_cache for chunk in self.chunks())
+
+    def chunks(self) -> list[tuple[int, int, int]]:
+        """
+        Split the time range into chunks of the global sample grid, one per
+        MJD day, as (day, first sample, end sample) with samples counted from
+        the start of the day.
+        """
+        per_day = 86400 // self.step
+        first = math.ceil(self.t_min * per_day - 1e-9)
+        end = math.ceil(self.t_max * per_day - 1e-9)
+        chunks = []
+        for day in range(first // per_day, -(-end // per_day)):
+            start = max(first, day * per_day) - day * per_day
+            stop = min(end, (day + 1) * per_day) - day * per_day
+            if stop > start:
+                chunks.append((day, start, stop))
+        return chunks
+
+    async def _chunk_summary(self, day: int, start: int, stop: int) -> RunSummary:
+        """Return the run summary of one chunk, from the cache if possible."""
+        key = self._chunk_key(day, start, stop)
+        summary = chunk_cache.get(key)
+        if summary is None:
+            mjd = day + np.arange(start, stop) * self.step / 86400
+            summary = await run_cpu_bound(
+                sky_chunk_summary, self.order, mjd, self.tle, size=len(mjd) * npix(self.order)
+            )
+            chunk_cache.put(key, summary)
+        return summary
+
+    async def query(self):
+        """
+        This method computes the observable sky. Chunks missing from the cache
+        are evaluated concurrently, then the chunk summaries are combined in
+        time order and every pixel with a long enough run is kept.
+        """
+        if self.tle is None:
+            raise HTTPException(
+                status_code=503,
+                detail="Swift's orbit is not available, so the Earth limb constraint cannot be applied. "
+                "Set SWIFT_VO_TLE_FILE or SWIFT_VO_EPHEMERIS_FILE.",
+            )
+        summaries = await asyncio.gather(*(self._chunk_summary(*chunk) for chunk in self.chunks()))
+        if not summaries:
+            self.ipix = np.empty(0, dtype=np.int64)
+            return
+        summary = summaries[0]
+        for chunk_summary in summaries[1:]:
+            summary = summary + chunk_summary
+        required = max(1, math.ceil(self.min_obs / self.step))
+        self.ipix = np.flatnonzero(summary.longest >= required)
+
+    def metadata(self) -> dict[str, str]:
+        """Query parameters and caveats carried along with the MOC."""
+        metadata = {
+            "TIME": f"{self.t_min}/{self.t_max}",
+            "MIN_OBS": str(self.min_obs),
+            "EARTH_CONSTRAINT": "T" if self.tle is not None else "F",
+            "SAA_CONSTRAINT": "F",
+        }
+        if self.t_max_hard_limit_used:
+            metadata["T_MAX_HARD_LIMIT"] = str(self.t_max_hard_limit)
+        return metadata
+
+    def moc_format(self, response_format: str | None = None) -> tuple[bytes | str, str]:
+        """
+        This method serializes the observable sky as a MOC in the requested
+        format (FITS by default, ASCII or JSON), returning the content and its
+        media type.
+        """
+        media_type = response_media_type(response_format)
+        cells = moc_cells(self.order, self.ipix)
+        if media_type == "text/plain":
+            return moc_to_ascii(cells, self.order), media_type
+        if media_type == "application/json":
+            return moc_to_json(cells, self.metadata()), media_type
+        header = {
+            "TMIN": self.t_min,
+            "TMAX": self.t_max,
+            "MIN_OBS": self.min_obs,
+            "EARTHCON": self.tle is not None,
+            "SAACON": False,
+        }
+        if self.t_max_hard_limit_used:
+            header["TMAXLIM"] = self.t_max_hard_limit
+        return moc_to_fits(cells, self.order, header), media_type
@@ -0,0 +1,443 @@
+"""
+Replay of recorded ObjObsSAP traffic, for latency regression testing.
+
+Reads ``/objobssap/query`` requests from access logs (common/combined log
+format, or uvicorn's access log) or from a recorded traffic file (JSON Lines
+of ``{"t": seconds, "path": ..., "client": ...}``), and sends them to the
+application in-process, or to a running server over HTTP, at the original
+rate, a scaled rate or a fixed rate. In-process, the upstream visibility
+service is replaced by responses recorded with ``--record-upstream``.
+
+The report gives the latency distribution, throughput, status codes and
+window cache hit rate of the run, and can be compared with a baseline report.
+
+Usage: swift-vo-replay access.log --upstream upstream.jsonl --output run.json --baseline base.json
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+import httpx
+import numpy as np
+
+from .constants import VO_ROOT_PATH
+
+# Access log formats: common/combined log format, and uvicorn's access log
+COMBINED_LOG_LINE = re.compile(
+    r'^(?P<client>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "GET (?P<path>\S+) HTTP/[\d.]+"'
+)
+UVICORN_LOG_LINE = re.compile(r'(?P<client>[\w.:\[\]]+):\d+ - "GET (?P<path>\S+) HTTP/[\d.]+"')
+COMBINED_LOG_TIME = "%d/%b/%Y:%H:%M:%S %z"
+QUERY_PATH = re.compile(r"/objobssap/query", re.IGNORECASE)
+
+# Report metrics compared with a baseline, and whether an increase is a regression
+COMPARED_METRICS = {
+    "p50_ms": True,
+    "p90_ms": True,
+    "p99_ms": True,
+    "max_ms": True,
+    "mean_ms": True,
+    "throughput_rps": False,
+    "error_rate": True,
+    "cache_hit_rate": False,
+}
+
+
+class LoggedRequest(NamedTuple):
+    """A request to replay, ``t`` seconds after the first one if known."""
+
+    t: float | None
+    path: str
+    client: str | None
+
+
+def parse_log_line(line: str) -> LoggedRequest | None:
+    """Parse an access log line, returning None unless it is an ObjObsSAP query."""
+    match = COMBINED_LOG_LINE.search(line)
+    timestamp = None
+    if match is not None:
+        timestamp = datetime.strptime(match["time"], COMBINED_LOG_TIME).timestamp()
+    else:
+        match = UVICORN_LOG_LINE.search(line)
+    if match is None or not QUERY_PATH.search(match["path"]):
+        return None
+    return LoggedRequest(timestamp, match["path"], match["client"])
+
+
+def read_requests(path: Path) -> list[LoggedRequest]:
+    """
+    Read the requests of an access log or a recorded traffic file, with
+    times relative to the first request.
+    """
+    requests = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                requests.append(LoggedRequest(record.get("t"), record["path"], record.get("client")))
+            elif (request := parse_log_line(line)) is not None:
+                requests.append(request)
+    times = [r.t for r in requests if r.t is not None]
+    if len(times) < len(requests):
+        return [r._replace(t=None) for r in requests]
+    start = min(times, default=0.0)
+    return [r._replace(t=t - start) for r, t in zip(requests, times, strict=True)]
+
+
+def schedule(requests: list[LoggedRequest], speed: float = 1.0, rate: float | None = None) -> list[float]:
+    """
+    Return the send time of each request, in seconds from the start of the
+    replay: the original times divided by ``speed``, or evenly spaced at
+    ``rate`` requests per second if given or if the times are unknown.
+    """
+    if rate is not None:
+        return [i / rate for i in range(len(requests))]
+    times = [r.t for r in requests if r.t is not None]
+    if len(times) < len(requests):
+        raise ValueError("The requests have no times, so a --rate is needed.")
+    return [t / speed for t in times]
+
+
+class UpstreamRecordings:
+    """
+    Recorded responses of the upstream visibility service, as JSON Lines of
+    ``{"ra", "dec", "begin", "end", "hires", "latency", "windows"}``, where
+    windows is a list of [begin, end] ISO times, or null for a failed query.
+    Recordings without ``hires`` are high resolution.
+
+    Replayed queries for a recorded position, time range and resolution get
+    the recorded windows after the recorded latency. Queries whose time range
+    was not recorded, typically because TIME defaulted to the time of the
+    query, get the windows of another recording of the same position and
+    resolution shifted to the requested range. Queries of unrecorded
+    positions or resolutions fail.
+    """
+
+    def __init__(self, latency_scale: float = 1.0):
+        """
+        This method initializes an empty set of recordings.
+        """
+        self.latency_scale = latency_scale
+        self.recordings: dict[tuple[float, float], list[dict]] = {}
+        self.counts: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _position(s_ra: float, s_dec: float) -> tuple[float, float]:
+        """Key of a position in the recordings."""
+        return (round(s_ra, 6), round(s_dec, 6))
+
+    @classmethod
+    def load(cls, path: Path, latency_scale: float = 1.0) -> "UpstreamRecordings":
+        """Load recordings from a JSON Lines file."""
+        recordings = cls(latency_scale)
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    position = cls._position(record["ra"], record["dec"])
+                    recordings.recordings.setdefault(position, []).append(record)
+        return recordings
+
+    def save(self, path: Path) -> None:
+        """Save the recordings as a JSON Lines file."""
+        with open(path, "w") as f:
+            for records in self.recordings.values():
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+    def add(
+        self,
+        s_ra: float,
+        s_dec: float,
+        begin: datetime,
+        end: datetime,
+        latency: float,
+        bounds,
+        hires: bool = True,
+    ) -> None:
+        """Record an upstream response, ``bounds`` being None for a failed query."""
+        windows = None
+        if bounds is not None:
+            windows = np.datetime_as_string(np.stack(bounds, axis=-1), unit="us").tolist()
+        record = {
+            "ra": s_ra,
+            "dec": s_dec,
+            "begin": begin.isoformat(),
+            "end": end.isoformat(),
+            "hires": hires,
+            "latency": latency,
+            "windows": windows,
+        }
+        with self._lock:
+            self.recordings.setdefault(self._position(s_ra, s_dec), []).append(record)
+
+    def recorder(self, fetch):
+        """Wrap an upstream fetch function so that its responses are recorded."""
+
+        def fetch_and_record(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            start = time.perf_counter()
+            bounds = fetch(s_ra, s_dec, begin, end, hires=hires, timeout=timeout)
+            self.add(s_ra, s_dec, begin, end, time.perf_counter() - start, bounds, hires=hires)
+            return bounds
+
+        return fetch_and_record
+
+    def _count(self, outcome: str) -> None:
+        """Count how a replayed upstream query was answered."""
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def fetch(
+        self,
+        s_ra: float,
+        s_dec: float,
+        begin: datetime,
+        end: datetime,
+        hires: bool = True,
+        timeout: float | None = None,
+    ):
+        """
+        Stand-in for ``fetch_upstream_bounds`` that answers from the
+        recordings, sleeping for the scaled recorded latency. ``timeout`` is
+        ignored.
+        """
+        records = [
+            r for r in self.recordings.get(self._position(s_ra, s_dec), []) if r.get("hires", True) == hires
+        ]
+        if not records:
+            self._count("unrecorded")
+            return None
+        requested = (begin.isoformat(), end.isoformat())
+        record = next((r for r in records if (r["begin"], r["end"]) == requested), None)
+        shifted = record is None
+        self._count("shifted" if shifted else "recorded")
+        record = record or records[0]
+        time.sleep(record["latency"] * self.latency_scale)
+        if record["windows"] is None:
+            return None
+        windows = np.array(record["windows"], dtype="datetime64[us]").reshape(-1, 2)
+        if shifted:
+            windows = windows + (np.datetime64(begin, "us") - np.datetime64(record["begin"], "us"))
+            windows = windows[windows[:, 0] < np.datetime64(end, "us")]
+            windows[:, 1] = np.minimum(windows[:, 1], np.datetime64(end, "us"))
+        return np.ascontiguousarray(windows[:, 0]), np.ascontiguousarray(windows[:, 1])
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Return the value at ``fraction`` of a sorted, non-empty list."""
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def summarize(latencies: list[float], statuses: Counter, elapsed: float, cache: dict) -> dict:
+    """Build the report of a run from its latencies (seconds) and status codes."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+    lookups = cache.get("hits", 0) + cache.get("misses", 0)
+    report: dict = {
+        "requests": count,
+        "elapsed_s": elapsed,
+        "throughput_rps": count / elapsed if elapsed > 0 else 0.0,
+        "status": {str(code): n for code, n in sorted(statuses.items())},
+        "error_rate": sum(n for code, n in statuses.items() if code >= 400) / count if count else 0.0,
+        "cache_hits": cache.get("hits", 0),
+        "cache_misses": cache.get("misses", 0),
+        "cache_hit_rate": cache.get("hits", 0) / lookups if lookups else 0.0,
+    }
+    if count:
+        report.update(
+            {
+                "mean_ms": 1000 * sum(ordered) / count,
+                "p50_ms": 1000 * percentile(ordered, 0.50),
+                "p90_ms": 1000 * percentile(ordered, 0.90),
+                "p99_ms": 1000 * percentile(ordered, 0.99),
+                "max_ms": 1000 * ordered[-1],
+            }
+        )
+    return report
+
+
+def compare(report: dict, baseline: dict) -> list[tuple[str, float, float, float, bool]]:
+    """
+    Compare a report with a baseline, returning for each metric its baseline
+    and current values, the relative change, and whether it got worse.
+    """
+    rows = []
+    for metric, higher_is_worse in COMPARED_METRICS.items():
+        if metric not in report or metric not in baseline:
+            continue
+        old, new = baseline[metric], report[metric]
+        change = (new - old) / old if old else 0.0
+        rows.append((metric, old, new, change, (change > 0) == higher_is_worse and change != 0))
+    return rows
+
+
+async def _cache_stats(client: httpx.AsyncClient) -> dict:
+    """Return the window cache counters reported by the metrics endpoint."""
+    try:
+        response = await client.get("/metrics")
+        return response.json()["window_cache"]
+    except (httpx.HTTPError, KeyError, ValueError):
+        return {}
+
+
+async def replay(
+    requests: list[LoggedRequest], send_times: list[float], client: httpx.AsyncClient, strip_prefix: str = ""
+) -> dict:
+    """
+    Send each request at its send time, without waiting for earlier requests
+    to complete, and report on the run. Each request carries its original
+    client address in X-Forwarded-For, so per-client limits apply as they did.
+    """
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    cache_before = await _cache_stats(client)
+
+    async def send(request: LoggedRequest, at: float, start: float) -> None:
+        await asyncio.sleep(max(0.0, start + at - time.perf_counter()))
+        path = request.path
+        if strip_prefix and path.lower().startswith(strip_prefix.lower()):
+            path = path[len(strip_prefix) :]
+        headers = {"X-Forwarded-For": request.client} if request.client else {}
+        sent = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            statuses[599] += 1
+        latencies.append(time.perf_counter() - sent)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(r, at, start) for r, at in zip(requests, send_times, strict=True)))
+    elapsed = time.perf_counter() - start
+
+    cache_after = await _cache_stats(client)
+    cache = {key: cache_after.get(key, 0) - cache_before.get(key, 0) for key in ("hits", "misses")}
+    return summarize(latencies, statuses, elapsed, cache)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Replay the requests as configured by the command line arguments."""
+    requests = read_requests(args.log)
+    if args.limit:
+        requests = requests[: args.limit]
+    send_times = schedule(requests, speed=args.speed, rate=args.rate)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            return await replay(requests, send_times, client)
+
+    # Importing the endpoint modules registers their routes on the application
+    from .base.api import app
+    from .base.executor import shutdown_cpu_executor, shutdown_upstream_executor
+    from .metrics import api as metrics_api  # noqa: F401
+    from .objobssap import api as objobssap_api  # noqa: F401
+    from .objobssap import service
+
+    recordings = None
+    original_fetch = service.fetch_upstream_bounds
+    if args.record_upstream:
+        recordings = UpstreamRecordings()
+        service.fetch_upstream_bounds = recordings.recorder(original_fetch)
+    elif args.upstream:
+        recordings = UpstreamRecordings.load(args.upstream, latency_scale=args.upstream_latency_scale)
+        service.fetch_upstream_bounds = recordings.fetch
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://replay", timeout=args.timeout
+        ) as client:
+            report = await replay(requests, send_times, client, strip_prefix=VO_ROOT_PATH)
+    finally:
+        service.fetch_upstream_bounds = original_fetch
+        shutdown_cpu_executor()
+        shutdown_upstream_executor()
+    if args.record_upstream and recordings is not None:
+        recordings.save(args.record_upstream)
+    elif recordings is not None:
+        report["upstream"] = dict(recordings.counts)
+    return report
+
+
+def print_report(report: dict, comparison: list | None = None) -> None:
+    """Print a report, and its comparison with a baseline if given."""
+    print(f"requests: {report['requests']} in {report['elapsed_s']:.2f} s ({report['throughput_rps']:.1f}/s)")
+    print(f"status: {report['status']}")
+    if report["requests"]:
+        print(
+            "latency ms: "
+            + ", ".join(
+                f"{key[:-3]} {report[key]:.1f}" for key in ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+            )
+        )
+    print(f"window cache: {report['cache_hits']} hits, {report['cache_misses']} misses")
+    if "upstream" in report:
+        print(f"upstream: {report['upstream']}")
+    if comparison:
+        print(f"\n{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}")
+        for metric, old, new, change, worse in comparison:
+            print(f"{metric:<16}{old:>12.3f}{new:>12.3f}{100 * change:>9.1f}%{'  worse' if worse else ''}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Replay recorded ObjObsSAP traffic and report on latency.")
+    parser.add_argument("log", type=Path, help="access log, or recorded traffic file (JSON Lines)")
+    parser.add_argument(
+        "--url", help="base URL of a running server (e.g. http://localhost:8000/vo); in-process if omitted"
+    )
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed relative to the original rate")
+    parser.add_argument("--rate", type=float, help="send requests at this fixed rate per second instead")
+    parser.add_argument("--limit", type=int, help="replay only the first LIMIT requests")
+    parser.add_argument("--timeout", type=float, default=60.0, help="request timeout in seconds")
+    parser.add_argument(
+        "--upstream", type=Path, help="recorded upstream responses to replay (in-process only)"
+    )
+    parser.add_argument(
+        "--upstream-latency-scale", type=float, default=1.0, help="scale the recorded upstream latencies"
+    )
+    parser.add_argument(
+        "--record-upstream",
+        type=Path,
+        help="record the live upstream responses to this file (in-process only)",
+    )
+    parser.add_argument("--output", type=Path, help="write the report as JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="compare with the JSON report of a baseline run")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="exit with status 1 if a compared metric is worse than the baseline by more than this percent",
+    )
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    comparison = compare(report, json.loads(args.baseline.read_text())) if args.baseline else None
+    print_report(report, comparison)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if comparison and args.max_regression is not None:
+        regressed = [
+            metric
+            for metric, _, _, change, worse in comparison
+            if worse and 100 * abs(change) > args.max_regression
+        ]
+        if regressed:
+            print(f"\nRegressed by more than {args.max_regression}%: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Local, vectorized evaluation of Swift's visibility constraints."""
@@ -0,0 +1,91 @@
+"""Vectorized evaluation of Swift's pointing constraints."""
+
+import numpy as np
+
+from ..constants import EARTH_LIMB_AVOIDANCE_ANGLE, MOON_AVOIDANCE_ANGLE, SUN_AVOIDANCE_ANGLE
+from .ephemeris import Ephemeris
+from .orbit import EARTH_RADIUS
+
+
+def radec_to_vectors(ra, dec) -> np.ndarray:
+    """Convert RA and Dec in degrees to an (N, 3) array of unit vectors."""
+    ra = np.radians(np.atleast_1d(np.asarray(ra, dtype=np.float64)))
+    dec = np.radians(np.atleast_1d(np.asarray(dec, dtype=np.float64)))
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=1)
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    """Normalize an (N, 3) array of vectors."""
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def observable_mask(targets: np.ndarray, ephemeris: Ephemeris) -> np.ndarray:
+    """
+    Evaluate the constraints for every target at every ephemeris time in one
+    broadcast pass, returning an (N_times, N_targets) boolean array that is
+    True where the target is observable.
+
+    ``targets`` is an (N_targets, 3) array of unit vectors. The Sun and Moon
+    constraints are separation angles from the body as seen from the
+    spacecraft (from the geocentre if no orbit is available). The Earth
+    constraint is the angle from the Earth limb, and is only applied when the
+    ephemeris includes the spacecraft position. Passages through the South
+    Atlantic Anomaly are not modelled, so targets are observable for longer
+    than in the upstream service's high resolution windows.
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    if ephemeris.spacecraft is None:
+        sun = _unit(ephemeris.sun)
+        moon = _unit(ephemeris.moon)
+    else:
+        sun = _unit(ephemeris.sun - ephemeris.spacecraft)
+        moon = _unit(ephemeris.moon - ephemeris.spacecraft)
+
+    observable = sun @ targets.T < np.cos(np.radians(SUN_AVOIDANCE_ANGLE))
+    observable &= moon @ targets.T < np.cos(np.radians(MOON_AVOIDANCE_ANGLE))
+
+    if ephemeris.spacecraft is not None:
+        distance = np.linalg.norm(ephemeris.spacecraft, axis=1)
+        nadir = -ephemeris.spacecraft / distance[:, None]
+        # Angle from the Earth's centre that a target must exceed: limb plus avoidance angle
+        earth_angle = np.arcsin(EARTH_RADIUS / distance) + np.radians(EARTH_LIMB_AVOIDANCE_ANGLE)
+        observable &= nadir @ targets.T < np.cos(earth_angle)[:, None]
+    return observable
+
+
+def mask_to_windows(mask: np.ndarray, mjd: np.ndarray, step: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Convert a 1-D observability mask on the time grid ``mjd`` into t_start
+    and t_stop MJD arrays. Each sample stands for ``step`` seconds from its
+    time, so a window ends one step after its last observable sample.
+    """
+    edges = np.diff(np.concatenate([[False], mask, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1) - 1
+    return mjd[starts], mjd[stops] + step / 86400
+
+
+def masks_to_windows(
+    mask: np.ndarray, mjd: np.ndarray, step: float, min_obs: float = 0.0
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Convert an (N_times, N_targets) observability mask on the time grid
+    ``mjd`` into a (t_start, t_stop) pair of MJD arrays per target, as
+    ``mask_to_windows`` does for one target, keeping windows at least
+    ``min_obs`` seconds long. The edges of all targets are found at once.
+    """
+    n_times, n_targets = mask.shape
+    padded = np.zeros((n_targets, n_times + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask.T
+    # Rising and falling edges alternate within each target's row
+    edges = np.flatnonzero(np.diff(padded, axis=1))
+    target, sample = np.divmod(edges, n_times + 1)
+    target = target[::2]
+    t_start = mjd[sample[::2]]
+    t_stop = mjd[sample[1::2] - 1] + step / 86400
+    if min_obs > 0:
+        keep = (t_stop - t_start) * 86400 >= min_obs
+        target, t_start, t_stop = target[keep], t_start[keep], t_stop[keep]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(target, minlength=n_targets))]).tolist()
+    return [(t_start[a:b], t_stop[a:b]) for a, b in zip(bounds[:-1], bounds[1:], strict=True)]
@@ -0,0 +1,83 @@
+"""Sun, Moon and spacecraft ephemeris on a time grid."""
+
+from typing import NamedTuple
+
+import astropy.units as u  # type: ignore[import-untyped]
+import numpy as np
+from astropy.coordinates import get_body  # type: ignore[import-untyped]
+from astropy.time import Time  # type: ignore[import-untyped]
+
+from .orbit import TLE, propagate
+from .store import ephemeris_store
+
+# Spacing of the Sun and Moon nodes that finer grids are interpolated from,
+# in days. The Moon moves about half a degree an hour, so linear interpolation
+# between hourly nodes is accurate to well under an arcsecond.
+BODY_NODE_STEP = 1 / 24
+
+
+def _body_positions(body: str, mjd: np.ndarray) -> np.ndarray:
+    """
+    Geocentric GCRS position of ``body`` at the UTC times ``mjd``, in km, as
+    an (N, 3) array, interpolated between nodes when the grid is finer than
+    ``BODY_NODE_STEP``.
+    """
+    if len(mjd) == 0:
+        return np.empty((0, 3))
+    first = np.floor(mjd.min() / BODY_NODE_STEP)
+    last = np.ceil(mjd.max() / BODY_NODE_STEP)
+    nodes = np.arange(first, last + 1) * BODY_NODE_STEP
+    if len(nodes) >= len(mjd):
+        nodes = mjd
+    positions = get_body(body, Time(nodes, format="mjd", scale="utc")).cartesian.xyz.to_value(u.km)
+    if nodes is mjd:
+        return positions.T
+    return np.stack([np.interp(mjd, nodes, axis) for axis in positions], axis=1)
+
+
+class Ephemeris(NamedTuple):
+    """
+    Geocentric positions on a time grid, in km, as (N, 3) arrays in GCRS.
+    ``spacecraft`` is None when no orbit is available, in which case the
+    Earth limb constraint cannot be evaluated.
+    """
+
+    mjd: np.ndarray
+    sun: np.ndarray
+    moon: np.ndarray
+    spacecraft: np.ndarray | None = None
+    velocity: np.ndarray | None = None
+
+
+def compute_ephemeris(mjd: np.ndarray, tle: TLE | None = None) -> Ephemeris:
+    """
+    Return the Sun and Moon positions at the UTC times ``mjd`` and, when
+    ``tle`` is given, Swift's position and velocity. They are read from the
+    precomputed ephemeris store when it covers the times, and computed
+    otherwise. The spacecraft is only read from the store if it was built
+    from the same TLE.
+    """
+    mjd = np.asarray(mjd, dtype=np.float64)
+    stored = ephemeris_store.lookup(mjd, tle)
+    if stored is None:
+        return evaluate_ephemeris(mjd, tle)
+    if tle is None:
+        return Ephemeris(mjd, stored.sun, stored.moon)
+    if stored.spacecraft is None or stored.velocity is None:
+        return Ephemeris(mjd, stored.sun, stored.moon, *propagate(tle, mjd))
+    return Ephemeris(mjd, stored.sun, stored.moon, stored.spacecraft, stored.velocity)
+
+
+def evaluate_ephemeris(mjd: np.ndarray, tle: TLE | None = None) -> Ephemeris:
+    """
+    Compute the Sun and Moon positions at the UTC times ``mjd`` with
+    astropy's built-in ephemeris and, when ``tle`` is given, Swift's position
+    and velocity. Each body is evaluated in one vectorized call.
+    """
+    mjd = np.asarray(mjd, dtype=np.float64)
+    sun = _body_positions("sun", mjd)
+    moon = _body_positions("moon", mjd)
+    if tle is None:
+        return Ephemeris(mjd, sun, moon)
+    spacecraft, velocity = propagate(tle, mjd)
+    return Ephemeris(mjd, sun, moon, spacecraft, velocity)
@@ -0,0 +1,135 @@
+"""HEALPix grid and IVOA Multi-Order Coverage maps (MOC)."""
+
+import json
+from io import BytesIO
+
+import numpy as np
+from astropy.io import fits  # type: ignore[import-untyped]
+
+# Row and column offsets of the twelve base pixels
+_JRLL = np.array([2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4])
+_JPLL = np.array([1, 3, 5, 7, 0, 2, 4, 6, 1, 3, 5, 7])
+
+
+def _compress_bits(values: np.ndarray) -> np.ndarray:
+    """Keep the even bits of ``values``, packed together."""
+    x = values.astype(np.uint64) & np.uint64(0x5555555555555555)
+    for shift, mask in (
+        (1, 0x3333333333333333),
+        (2, 0x0F0F0F0F0F0F0F0F),
+        (4, 0x00FF00FF00FF00FF),
+        (8, 0x0000FFFF0000FFFF),
+        (16, 0x00000000FFFFFFFF),
+    ):
+        x = (x | (x >> np.uint64(shift))) & np.uint64(mask)
+    return x.astype(np.int64)
+
+
+def npix(order: int) -> int:
+    """Number of HEALPix pixels at ``order``."""
+    return 12 * 4**order
+
+
+def pixel_radec(order: int, ipix: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    RA and Dec, in degrees, of the centres of the NESTED pixels ``ipix`` (all
+    pixels by default) at ``order``.
+    """
+    nside = 1 << order
+    ipix = np.arange(npix(order), dtype=np.int64) if ipix is None else np.asarray(ipix, dtype=np.int64)
+    face = ipix >> (2 * order)
+    local = ipix & (nside * nside - 1)
+    ix = _compress_bits(local)
+    iy = _compress_bits(local >> 1)
+
+    jr = _JRLL[face] * nside - ix - iy - 1
+    nr = np.where(jr < nside, jr, np.where(jr > 3 * nside, 4 * nside - jr, nside))
+    z = np.where(
+        jr < nside,
+        1 - nr**2 / (3 * nside**2),
+        np.where(jr > 3 * nside, nr**2 / (3 * nside**2) - 1, (2 * nside - jr) * 2 / (3 * nside)),
+    )
+    kshift = np.where((jr >= nside) & (jr <= 3 * nside), (jr - nside) & 1, 0)
+    jp = (_JPLL[face] * nr + ix - iy + 1 + kshift) // 2
+    jp = np.where(jp > 4 * nside, jp - 4 * nside, np.where(jp < 1, jp + 4 * nside, jp))
+    phi = (jp - (kshift + 1) * 0.5) * (np.pi / 2 / nr)
+    return np.degrees(phi), np.degrees(np.arcsin(z))
+
+
+def moc_cells(order: int, ipix: np.ndarray) -> dict[int, np.ndarray]:
+    """
+    Normalize a set of NESTED pixels at ``order`` into MOC cells: every
+    complete group of four sibling cells is replaced by its parent, down to
+    order 0. Returns the sorted cell indices for each order.
+    """
+    cells = {}
+    current = np.unique(np.asarray(ipix, dtype=np.int64))
+    for level in range(order, 0, -1):
+        parents, counts = np.unique(current >> 2, return_counts=True)
+        complete = parents[counts == 4]
+        cells[level] = current[~np.isin(current >> 2, complete)]
+        current = complete
+    cells[0] = current
+    return {level: cells[level] for level in sorted(cells)}
+
+
+def moc_uniq(cells: dict[int, np.ndarray]) -> np.ndarray:
+    """The NUNIQ indices (4 * 4**order + ipix) of MOC cells, sorted."""
+    uniq = [4 * 4**level + ipix for level, ipix in cells.items()]
+    return np.sort(np.concatenate(uniq)) if uniq else np.empty(0, dtype=np.int64)
+
+
+def _ranges(ipix: np.ndarray) -> list[str]:
+    """Compress sorted cell indices into 'first-last' ranges."""
+    if len(ipix) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(ipix) != 1) + 1
+    firsts = np.concatenate([[0], breaks])
+    lasts = np.concatenate([breaks - 1, [len(ipix) - 1]])
+    return [
+        str(ipix[first]) if first == last else f"{ipix[first]}-{ipix[last]}"
+        for first, last in zip(firsts, lasts, strict=True)
+    ]
+
+
+def moc_to_ascii(cells: dict[int, np.ndarray], max_order: int) -> str:
+    """
+    Serialize MOC cells in the MOC 2.0 ASCII format, e.g. ``3/3 10 4/16-18
+    5/``, where a trailing empty order states the MOC order.
+    """
+    parts = [f"{level}/" + " ".join(_ranges(ipix)) for level, ipix in cells.items() if len(ipix)]
+    if not parts or not parts[-1].startswith(f"{max_order}/"):
+        parts.append(f"{max_order}/")
+    return " ".join(parts)
+
+
+def moc_to_json(cells: dict[int, np.ndarray], metadata: dict[str, str] | None = None) -> str:
+    """Serialize MOC cells in the MOC JSON format, with optional metadata."""
+    document: dict[str, object] = {str(level): ipix.tolist() for level, ipix in cells.items() if len(ipix)}
+    if metadata:
+        document["metadata"] = metadata
+    return json.dumps(document)
+
+
+def moc_to_fits(
+    cells: dict[int, np.ndarray], max_order: int, metadata: dict[str, str] | None = None
+) -> bytes:
+    """
+    Serialize MOC cells as a MOC 2.0 FITS file: a binary table of NUNIQ
+    indices, with any metadata as extra header keywords.
+    """
+    table = fits.BinTableHDU.from_columns([fits.Column(name="UNIQ", format="K", array=moc_uniq(cells))])
+    header = table.header
+    header["EXTNAME"] = "MOC"
+    header["MOCVERS"] = "2.0"
+    header["MOCDIM"] = "SPACE"
+    header["ORDERING"] = "NUNIQ"
+    header["COORDSYS"] = "C"
+    header["PIXTYPE"] = "HEALPIX"
+    header["MOCORDER"] = max_order
+    header["MOCTOOL"] = "swift-vo"
+    for key, value in (metadata or {}).items():
+        header[key] = value
+    with BytesIO() as stream:
+        fits.HDUList([fits.PrimaryHDU(), table]).writeto(stream)
+        return stream.getvalue()
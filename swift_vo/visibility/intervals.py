@@ -0,0 +1,128 @@
+"""Sorted, array-backed sets of time intervals."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+
+import numpy as np
+
+
+class IntervalSet:
+    """
+    Set of disjoint, half-open ``[begin, end)`` intervals held as two sorted
+    arrays. The arrays can hold any ordered numpy type, such as float64 MJD
+    or datetime64 values, as long as both operands of an operation agree.
+
+    Construction normalizes the intervals: empty ones are dropped, and
+    overlapping or touching ones are merged, in O(n log n). Set operations
+    on normalized sets sweep the union of their boundaries with binary
+    searches, also in O(n log n).
+    """
+
+    __slots__ = ("begin", "end")
+
+    def __init__(self, begin, end):
+        """
+        This method initializes the set from interval begin and end times in
+        any order.
+        """
+        begin, end = np.asarray(begin), np.asarray(end)
+        keep = begin < end
+        begin, end = begin[keep], end[keep]
+        order = np.argsort(begin, kind="stable")
+        self.begin, self.end = _merge(begin[order], end[order])
+
+    @classmethod
+    def _normalized(cls, begin: np.ndarray, end: np.ndarray) -> IntervalSet:
+        """Wrap arrays that are already sorted, disjoint and non-empty."""
+        intervals = cls.__new__(cls)
+        intervals.begin, intervals.end = begin, end
+        return intervals
+
+    def __len__(self) -> int:
+        return len(self.begin)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return zip(self.begin.tolist(), self.end.tolist(), strict=True)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return np.array_equal(self.begin, other.begin) and np.array_equal(self.end, other.end)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self)!r})"
+
+    @property
+    def durations(self) -> np.ndarray:
+        """The length of each interval."""
+        return self.end - self.begin
+
+    def __or__(self, other: IntervalSet) -> IntervalSet:
+        return self.union(other)
+
+    def __and__(self, other: IntervalSet) -> IntervalSet:
+        return self.intersection(other)
+
+    def __sub__(self, other: IntervalSet) -> IntervalSet:
+        return self.difference(other)
+
+    def union(self, *others: IntervalSet) -> IntervalSet:
+        """The times covered by this set or any of ``others``."""
+        return _sweep((self, *others), lambda depth: np.asarray(depth.any(axis=0)))
+
+    def intersection(self, *others: IntervalSet) -> IntervalSet:
+        """The times covered by this set and all of ``others``."""
+        return _sweep((self, *others), lambda depth: np.asarray(depth.all(axis=0)))
+
+    def difference(self, other: IntervalSet) -> IntervalSet:
+        """The times covered by this set but not by ``other``."""
+        return _sweep((self, other), lambda depth: depth[0] & ~depth[1])
+
+    def filter(self, min_duration) -> IntervalSet:
+        """The intervals at least ``min_duration`` long."""
+        keep = self.durations >= min_duration
+        return self._normalized(self.begin[keep], self.end[keep])
+
+    def merge(self, max_gap) -> IntervalSet:
+        """Join intervals separated by gaps of at most ``max_gap``."""
+        if len(self) < 2:
+            return self
+        joined = self.begin[1:] - self.end[:-1] <= max_gap
+        first = np.flatnonzero(np.concatenate([[True], ~joined]))
+        last = np.concatenate([first[1:] - 1, [len(self) - 1]])
+        return self._normalized(self.begin[first], self.end[last])
+
+
+def _merge(begin: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Merge overlapping or touching intervals sorted by begin time."""
+    if not len(begin):
+        return begin, end
+    reach = np.maximum.accumulate(end)
+    first = np.flatnonzero(np.concatenate([[True], begin[1:] > reach[:-1]]))
+    last = np.concatenate([first[1:] - 1, [len(begin) - 1]])
+    return begin[first], reach[last]
+
+
+def _sweep(sets: tuple[IntervalSet, ...], inside: Callable[[np.ndarray], np.ndarray]) -> IntervalSet:
+    """
+    Combine normalized sets. Every boundary of every set splits time into
+    elementary segments, within which each set either covers the whole
+    segment or none of it; ``inside`` maps the (N_sets, N_segments) boolean
+    coverage to whether each segment belongs to the result. Consecutive
+    segments of the result are then joined.
+    """
+    points = np.unique(np.concatenate([edges for s in sets for edges in (s.begin, s.end)]))
+    if len(points) < 2:
+        return IntervalSet._normalized(points[:0], points[:0])
+    segments = points[:-1]
+    # The number of intervals begun minus the number ended is 1 inside a set
+    depth = np.stack(
+        [
+            np.searchsorted(s.begin, segments, side="right") > np.searchsorted(s.end, segments, side="right")
+            for s in sets
+        ]
+    )
+    selected = np.concatenate([[False], inside(depth), [False]])
+    edges = np.flatnonzero(selected[1:] != selected[:-1])
+    return IntervalSet._normalized(points[edges[::2]], points[edges[1::2]])
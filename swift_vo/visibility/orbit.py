@@ -0,0 +1,110 @@
+"""Swift orbit from a two-line element set."""
+
+import os
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from ..constants import SWIFT_TLE_FILE
+
+EARTH_MU = 398600.4418  # km^3 / s^2
+EARTH_RADIUS = 6378.137  # km
+EARTH_J2 = 1.08262668e-3
+
+
+class TLE(NamedTuple):
+    """Mean orbital elements of a two-line element set, angles in radians."""
+
+    epoch: float  # MJD
+    ndot2: float  # half the first derivative of the mean motion, rev / day^2
+    inclination: float
+    raan: float
+    eccentricity: float
+    argp: float
+    mean_anomaly: float
+    mean_motion: float  # rev / day
+
+    @classmethod
+    def from_lines(cls, line1: str, line2: str) -> "TLE":
+        """Parses the two lines of a TLE into its mean elements."""
+        year = int(line1[18:20])
+        year += 2000 if year < 57 else 1900
+        day_of_year = float(line1[20:32])
+        epoch = (datetime(year, 1, 1) - datetime(1858, 11, 17)).days + day_of_year - 1
+        return cls(
+            epoch=epoch,
+            ndot2=float(line1[33:43]),
+            inclination=np.radians(float(line2[8:16])),
+            raan=np.radians(float(line2[17:25])),
+            eccentricity=float("0." + line2[26:33].strip()),
+            argp=np.radians(float(line2[34:42])),
+            mean_anomaly=np.radians(float(line2[43:51])),
+            mean_motion=float(line2[52:63]),
+        )
+
+
+_tle_cache: dict[tuple[str, float], TLE] = {}
+
+
+def current_tle(path: str | None = SWIFT_TLE_FILE) -> TLE | None:
+    """
+    Return the TLE in ``path`` (the last two lines of the file), or None if no
+    TLE file is configured. The file is re-read whenever it changes.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    key = (path, os.path.getmtime(path))
+    if key not in _tle_cache:
+        with open(path) as f:
+            lines = [line for line in f.read().splitlines() if line.strip()]
+        _tle_cache.clear()
+        _tle_cache[key] = TLE.from_lines(lines[-2], lines[-1])
+    return _tle_cache[key]
+
+
+def propagate(tle: TLE, mjd: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Propagate ``tle`` to the UTC times ``mjd``, returning (N, 3) arrays of
+    position (km) and velocity (km/s) in the TLE's inertial frame.
+
+    This is a Keplerian propagation with the secular J2 drift of the node and
+    perigee and the TLE's mean motion decay. It is accurate to tens of
+    kilometres within a few days of the TLE epoch, which is ample for pointing
+    constraints but not for precise orbit work.
+    """
+    mjd = np.atleast_1d(np.asarray(mjd, dtype=np.float64))
+    n0 = tle.mean_motion * 2 * np.pi / 86400  # rad / s
+    a = (EARTH_MU / n0**2) ** (1 / 3)
+    e = tle.eccentricity
+    cos_i = np.cos(tle.inclination)
+    j2_rate = 1.5 * EARTH_J2 * (EARTH_RADIUS / (a * (1 - e**2))) ** 2 * n0
+
+    dt_days = mjd - tle.epoch
+    dt = dt_days * 86400
+    raan = tle.raan - j2_rate * cos_i * dt
+    argp = tle.argp + 0.5 * j2_rate * (5 * cos_i**2 - 1) * dt
+    mean_anomaly = tle.mean_anomaly + n0 * dt + 2 * np.pi * tle.ndot2 * dt_days**2
+
+    ecc_anomaly = np.array(mean_anomaly)
+    for _ in range(8):
+        ecc_anomaly -= (ecc_anomaly - e * np.sin(ecc_anomaly) - mean_anomaly) / (1 - e * np.cos(ecc_anomaly))
+
+    cos_ea, sin_ea = np.cos(ecc_anomaly), np.sin(ecc_anomaly)
+    root = np.sqrt(1 - e**2)
+    x, y = a * (cos_ea - e), a * root * sin_ea
+    radius = a * (1 - e * cos_ea)
+    vx, vy = -np.sqrt(EARTH_MU * a) / radius * sin_ea, np.sqrt(EARTH_MU * a) / radius * root * cos_ea
+
+    cos_o, sin_o = np.cos(raan), np.sin(raan)
+    cos_w, sin_w = np.cos(argp), np.sin(argp)
+    sin_i = np.sin(tle.inclination)
+    p = np.stack(
+        [cos_o * cos_w - sin_o * sin_w * cos_i, sin_o * cos_w + cos_o * sin_w * cos_i, sin_w * sin_i], 1
+    )
+    q = np.stack(
+        [-cos_o * sin_w - sin_o * cos_w * cos_i, -sin_o * sin_w + cos_o * cos_w * cos_i, cos_w * sin_i], 1
+    )
+    position = x[:, None] * p + y[:, None] * q
+    velocity = vx[:, None] * p + vy[:, None] * q
+    return position, velocity
@@ -0,0 +1,77 @@
+"""Observability of the whole sky over a time interval, on a HEALPix grid."""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from .constraints import observable_mask, radec_to_vectors
+from .ephemeris import compute_ephemeris
+from .healpix import pixel_radec
+from .orbit import TLE
+
+# Time samples evaluated at once, bounding the size of the (time, pixel) mask
+_BLOCK = 128
+
+
+class RunSummary(NamedTuple):
+    """
+    Runs of consecutive observable samples of every pixel within a span of
+    ``n`` time samples: the run at the start of the span, the run at its end
+    and the longest run. Summaries of adjacent spans combine exactly, so a
+    long interval can be assembled from cached chunks.
+    """
+
+    n: int
+    leading: np.ndarray
+    trailing: np.ndarray
+    longest: np.ndarray
+
+    def __add__(self, other: "RunSummary") -> "RunSummary":  # type: ignore[override]
+        """Summary of this span followed by ``other``."""
+        return RunSummary(
+            n=self.n + other.n,
+            leading=np.where(self.leading == self.n, self.n + other.leading, self.leading),
+            trailing=np.where(other.trailing == other.n, other.n + self.trailing, other.trailing),
+            longest=np.maximum(np.maximum(self.longest, other.longest), self.trailing + other.leading),
+        )
+
+
+def summarize_mask(mask: np.ndarray) -> RunSummary:
+    """Summarize the runs of an (N_times, N_pixels) observability mask."""
+    n_times, n_pixels = mask.shape
+    run = np.zeros(n_pixels, dtype=np.int32)
+    longest = np.zeros(n_pixels, dtype=np.int32)
+    leading = np.zeros(n_pixels, dtype=np.int32)
+    in_leading = np.ones(n_pixels, dtype=bool)
+    for row in mask:
+        run = (run + 1) * row
+        np.maximum(longest, run, out=longest)
+        in_leading &= row
+        leading += in_leading
+    return RunSummary(n_times, leading, run, longest)
+
+
+def sky_chunk_summary(order: int, mjd: np.ndarray, tle: TLE | None) -> RunSummary:
+    """
+    Evaluate the constraints for every pixel centre at ``order`` at the times
+    ``mjd``, and summarize the runs of observable samples. The ephemeris is
+    computed once for all pixels, and the mask is built in blocks of time
+    samples broadcast against the whole grid.
+    """
+    targets = radec_to_vectors(*pixel_radec(order))
+    ephemeris = compute_ephemeris(mjd, tle)
+    summary = None
+    for first in range(0, len(mjd), _BLOCK):
+        block = ephemeris._replace(
+            **{
+                name: values[first : first + _BLOCK]
+                for name, values in ephemeris._asdict().items()
+                if values is not None
+            }
+        )
+        block_summary = summarize_mask(observable_mask(targets, block))
+        summary = block_summary if summary is None else summary + block_summary
+    if summary is None:
+        empty = np.zeros(len(targets), dtype=np.int32)
+        return RunSummary(0, empty, empty, empty)
+    return summary
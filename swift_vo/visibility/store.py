@@ -0,0 +1,259 @@
+"""Precomputed ephemeris in a versioned, memory-mapped file shared by all workers."""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from ..constants import EPHEMERIS_FILE
+from .orbit import TLE
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SWIFTEPH"
+FORMAT_VERSION = 1
+# The data starts at a multiple of this many bytes, so that rows are aligned in memory
+ALIGNMENT = 64
+# Columns of each row of the data, in km and km/s
+COLUMNS = {"sun": (0, 3), "moon": (3, 6), "spacecraft": (6, 9), "velocity": (9, 12)}
+# Times within this many samples of a grid time are read without interpolation
+GRID_TOLERANCE = 1e-6
+
+
+class StoredEphemeris(NamedTuple):
+    """
+    An ephemeris file mapped into memory: its header, with the time grid and
+    the version, and an (N_times, 12) float64 array of the columns in
+    ``COLUMNS``, backed by the file.
+    """
+
+    header: dict
+    data: np.ndarray
+
+    @property
+    def start(self) -> float:
+        """MJD of the first sample."""
+        return self.header["start"]
+
+    @property
+    def step(self) -> float:
+        """Days between samples."""
+        return self.header["step"] / 86400
+
+    @property
+    def stop(self) -> float:
+        """MJD of the last sample."""
+        return self.start + (len(self.data) - 1) * self.step
+
+    @property
+    def tle(self) -> TLE | None:
+        """The TLE the spacecraft columns were propagated from, if any."""
+        return None if self.header["tle"] is None else TLE(*self.header["tle"])
+
+
+class StoredColumns(NamedTuple):
+    """
+    The ephemeris read from the file at requested times, as (N, 3) arrays in
+    km and km/s. The spacecraft position and velocity are None when they were
+    not read from the file.
+    """
+
+    sun: np.ndarray
+    moon: np.ndarray
+    spacecraft: np.ndarray | None = None
+    velocity: np.ndarray | None = None
+
+
+def write_ephemeris_file(
+    path: str,
+    start: float,
+    step: float,
+    sun: np.ndarray,
+    moon: np.ndarray,
+    spacecraft: np.ndarray | None = None,
+    velocity: np.ndarray | None = None,
+    tle: TLE | None = None,
+) -> dict:
+    """
+    Write an ephemeris sampled every ``step`` seconds from the MJD ``start``
+    to ``path``, returning its header. Without an orbit, the spacecraft
+    columns are NaN. The file is written next to ``path`` and renamed over
+    it, so readers only ever see complete files.
+    """
+    rows = len(sun)
+    data = np.full((rows, 12), np.nan)
+    for name, values in (("sun", sun), ("moon", moon), ("spacecraft", spacecraft), ("velocity", velocity)):
+        if values is not None:
+            data[:, slice(*COLUMNS[name])] = values
+    header = {
+        "format": FORMAT_VERSION,
+        "version": datetime.now(UTC).strftime("%Y%m%dT%H%M%S.%fZ"),
+        "start": float(start),
+        "step": float(step),
+        "rows": rows,
+        "columns": COLUMNS,
+        "tle": None if tle is None else [float(value) for value in tle],
+    }
+    encoded = json.dumps(header).encode()
+    prefix = len(MAGIC) + 4 + len(encoded)
+    padding = -prefix % ALIGNMENT
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".ephemeris-", delete=False) as f:
+        f.write(MAGIC + len(encoded).to_bytes(4, "little") + encoded + b"\0" * padding)
+        f.write(data.astype("<f8").tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    # Temporary files are private, but every worker needs to read this one
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+    return header
+
+
+def open_ephemeris_file(path: str) -> StoredEphemeris:
+    """Map an ephemeris file into memory, read-only."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an ephemeris file")
+        length = int.from_bytes(f.read(4), "little")
+        header = json.loads(f.read(length))
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported format {header.get('format')}")
+    offset = len(MAGIC) + 4 + length
+    offset += -offset % ALIGNMENT
+    data = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=(header["rows"], 12))
+    return StoredEphemeris(header, data)
+
+
+def _hermite(p0, v0, p1, v1, f, h) -> np.ndarray:
+    """
+    Cubic Hermite interpolation of positions from the positions and
+    velocities at both ends of intervals ``h`` seconds long, at fractions
+    ``f`` of the intervals.
+    """
+    f = f[:, None]
+    f2, f3 = f * f, f * f * f
+    return (
+        (2 * f3 - 3 * f2 + 1) * p0 + (f3 - 2 * f2 + f) * h * v0 + (3 * f2 - 2 * f3) * p1 + (f3 - f2) * h * v1
+    )
+
+
+class EphemerisStore:
+    """
+    Ephemeris precomputed by ``swift-vo-build-ephemeris`` over the range that
+    queries can ask for. The file is mapped into memory, so every worker on a
+    host shares one copy of it in the page cache, and lookups are array
+    slices when the requested times are on the file's grid, or interpolated
+    otherwise (linearly, and with the velocities for the spacecraft).
+
+    A new version replaces the file by renaming over it. Each lookup checks
+    whether the file changed, and if so maps the new one; lookups already
+    under way keep the version they started with.
+    """
+
+    def __init__(self, path: str | None = EPHEMERIS_FILE):
+        """
+        This method initializes the store. Nothing is read until the first
+        lookup.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._key: tuple | None = None
+        self._stored: StoredEphemeris | None = None
+        self._lock = threading.Lock()
+
+    def current(self) -> StoredEphemeris | None:
+        """The latest version of the ephemeris file, or None if there is none."""
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._key, self._stored = None, None
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._key:
+            with self._lock:
+                if key != self._key:
+                    stored: StoredEphemeris | None
+                    try:
+                        stored = open_ephemeris_file(self.path)
+                        logger.info("Loaded ephemeris file version %s", stored.header["version"])
+                    except (OSError, ValueError) as e:
+                        logger.warning("Cannot load ephemeris file: %s", e)
+                        stored = None
+                    self._key, self._stored = key, stored
+        return self._stored
+
+    def lookup(self, mjd: np.ndarray, tle: TLE | None = None) -> StoredColumns | None:
+        """
+        Look up the ephemeris at the UTC times ``mjd``, or return None if the
+        file does not cover the times. The spacecraft position and velocity
+        are None unless ``tle`` is the TLE the file was built from.
+        """
+        stored = self.current()
+        if stored is None or not len(mjd) or mjd.min() < stored.start or mjd.max() > stored.stop:
+            self.misses += 1
+            return None
+        self.hits += 1
+        orbit = tle is not None and stored.tle == tle
+        names = ["sun", "moon", *(["spacecraft", "velocity"] if orbit else [])]
+        position = (mjd - stored.start) / stored.step
+        index = np.rint(position).astype(np.int64)
+        if np.abs(position - index).max() < GRID_TOLERANCE:
+            columns = self._slice(stored.data, index, names)
+        else:
+            columns = self._interpolate(stored, position, names)
+        return StoredColumns(
+            columns["sun"], columns["moon"], columns.get("spacecraft"), columns.get("velocity")
+        )
+
+    @staticmethod
+    def _slice(data: np.ndarray, index: np.ndarray, names: list[str]) -> dict[str, np.ndarray]:
+        """Read grid times, as views of the file when they are evenly spaced."""
+        stride = index[1] - index[0] if len(index) > 1 else 1
+        if stride > 0 and np.array_equal(index, index[0] + stride * np.arange(len(index))):
+            rows = data[index[0] : index[-1] + 1 : stride]
+        else:
+            rows = data[index]
+        return {name: rows[:, slice(*COLUMNS[name])] for name in names}
+
+    @staticmethod
+    def _interpolate(
+        stored: StoredEphemeris, position: np.ndarray, names: list[str]
+    ) -> dict[str, np.ndarray]:
+        """Interpolate between the samples on either side of each time."""
+        lower = np.clip(np.floor(position).astype(np.int64), 0, len(stored.data) - 2)
+        fraction = position - lower
+        before, after = stored.data[lower], stored.data[lower + 1]
+        columns = {
+            name: before[:, slice(*COLUMNS[name])]
+            + fraction[:, None] * (after[:, slice(*COLUMNS[name])] - before[:, slice(*COLUMNS[name])])
+            for name in names
+        }
+        if "spacecraft" in columns:
+            p, v = slice(*COLUMNS["spacecraft"]), slice(*COLUMNS["velocity"])
+            columns["spacecraft"] = _hermite(
+                before[:, p], before[:, v], after[:, p], after[:, v], fraction, stored.header["step"]
+            )
+        return columns
+
+    def stats(self) -> dict:
+        """The loaded version and range of the ephemeris file, and lookup counts."""
+        stored = self._stored
+        return {
+            "path": self.path,
+            "version": stored.header["version"] if stored else None,
+            "start": stored.start if stored else None,
+            "stop": stored.stop if stored else None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+ephemeris_store = EphemerisStore()
@@ -0,0 +1,42 @@
+"""Visibility windows of many targets over a shared time grid."""
+
+import numpy as np
+
+from .constraints import masks_to_windows, observable_mask, radec_to_vectors
+from .ephemeris import Ephemeris, compute_ephemeris
+from .orbit import TLE
+
+# Targets evaluated at once, bounding the size of the (time, target) mask
+_BLOCK = 128
+
+
+def target_windows(
+    ra, dec, mjd: np.ndarray, step: float, tle: TLE | None = None, min_obs: float = 0.0
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Compute the visibility windows of every (``ra``, ``dec``) target, in
+    degrees, on the time grid ``mjd`` sampled every ``step`` seconds. The
+    ephemeris is computed once for all targets, and the constraints are
+    evaluated in blocks of targets broadcast against the whole grid.
+
+    Returns a (t_start, t_stop) pair of float64 MJD arrays per target, in
+    the order given, holding the windows at least ``min_obs`` seconds long.
+    These are the window arrays of ``ObjObsSAPService``.
+    """
+    return ephemeris_windows(ra, dec, compute_ephemeris(mjd, tle), step, min_obs)
+
+
+def ephemeris_windows(
+    ra, dec, ephemeris: Ephemeris, step: float, min_obs: float = 0.0
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Compute the visibility windows of every target as ``target_windows``
+    does, from an ephemeris already computed on the time grid, so that it can
+    be shared by successive batches of targets.
+    """
+    targets = radec_to_vectors(ra, dec)
+    windows: list[tuple[np.ndarray, np.ndarray]] = []
+    for first in range(0, len(targets), _BLOCK):
+        mask = observable_mask(targets[first : first + _BLOCK], ephemeris)
+        windows.extend(masks_to_windows(mask, ephemeris.mjd, step, min_obs))
+    return windows
@@ -1,20 +1,15 @@
 """VOSI-availability API endpoint implementation."""
 
-from datetime import UTC, datetime
-
 from fastapi import APIRouter, Response
 from vo_models.voresource.models import AccessURL, Capability, Interface
-from vo_models.vosi.availability import Availability
 from vo_models.vosi.capabilities import VOSICapabilities
 
 from ..base.api import app
+from ..base.health import health_monitor
 from ..constants import VO_ROOT_PATH, VO_SERVER
 
 router = APIRouter(prefix="", tags=["VOSI"])
 
-# Store the service startup time at module initialization
-SERVICE_STARTUP_TIME = datetime.now(UTC)
-
 
 @router.get(
     "/objobssap/availability",
@@ -38,12 +33,10 @@ async def availability() -> Response:
     VOSI-availability endpoint.
 
     Returns the availability status of the service as required by DALI and ObjObsSAP specifications.
-    The endpoint follows IVOA VOSI (Virtual Observatory Support Interfaces) standard.
+    The endpoint follows IVOA VOSI (Virtual Observatory Support Interfaces) standard. The status is
+    kept up to date by the background health monitor, so this only returns its latest document.
     """
-    xml_content = Availability(available=True, up_since=SERVICE_STARTUP_TIME).to_xml(
-        encoding="UTF-8", xml_declaration=True
-    )
-    return Response(content=xml_content, media_type="application/xml")
+    return Response(content=health_monitor.availability_xml, media_type="application/xml")
 
 
 @router.get(
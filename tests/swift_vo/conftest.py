@@ -1,7 +1,10 @@
+import numpy as np
 import pytest
 
+from swift_vo.objobssap.cache import window_cache
 from swift_vo.objobssap.schema import VOPosition, VOTimeRange
-from swift_vo.objobssap.service import ObjObsSAPService
+from swift_vo.objobssap.service import MJD_EPOCH, ObjObsSAPService
+from swift_vo.visibility.orbit import TLE
 
 
 @pytest.fixture
@@ -30,6 +33,17 @@ def service_with_windows():
     return service
 
 
+@pytest.fixture
+def cached_windows():
+    """Fixture caching five 2000 s upstream windows for the basic service query."""
+    begin = MJD_EPOCH + np.timedelta64(60000, "D") + np.arange(5) * np.timedelta64(2, "h")
+    window_cache.put(
+        ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500).cache_key, (begin, begin + np.timedelta64(2000, "s"))
+    )
+    yield begin
+    window_cache.clear()
+
+
 @pytest.fixture
 def valid_pos():
     """Valid position string."""
@@ -87,3 +101,12 @@ def expected_fields():
 def field(request, expected_fields):
     """Fixture to get expected field names by index."""
     return expected_fields[request.param]
+
+
+@pytest.fixture
+def swift_tle():
+    """Fixture providing a two-line element set for Swift's orbit."""
+    return TLE.from_lines(
+        "1 28485U 04047A   26291.50000000  .00005000  00000-0  20000-3 0  9990",
+        "2 28485  20.5560 123.4567 0005000 234.5678 125.4321 15.30000000 10000",
+    )
@@ -0,0 +1,136 @@
+"""Tests for admission control of ObjObsSAP queries."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from swift_vo.base.admission import AdmissionController, AdmissionRejected, admission_controller, client_id
+from swift_vo.objobssap.api import app
+
+client = TestClient(app)
+
+
+class TestAdmissionController:
+    """Tests for the AdmissionController class."""
+
+    @pytest.mark.asyncio
+    async def test_admits_within_limits(self):
+        """Test that a request within the limits is admitted at once."""
+        controller = AdmissionController(max_concurrent=2, max_per_client=2, max_queue=1, queue_timeout=1)
+        async with controller.slot("a"):
+            assert controller.active == 1
+        assert controller.active == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """Test that a request is rejected when no slot is free and the queue is full."""
+        controller = AdmissionController(max_concurrent=1, max_per_client=1, max_queue=0, queue_timeout=1)
+        async with controller.slot("a"):
+            with pytest.raises(AdmissionRejected):
+                await controller.acquire("b")
+
+    @pytest.mark.asyncio
+    async def test_rejects_after_queue_timeout(self):
+        """Test that a queued request is rejected when its deadline passes."""
+        controller = AdmissionController(max_concurrent=1, max_per_client=1, max_queue=1, queue_timeout=0.01)
+        async with controller.slot("a"):
+            with pytest.raises(AdmissionRejected):
+                await controller.acquire("b")
+        assert controller.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_bounded_by_deadline(self):
+        """Test that a queued request is rejected at its deadline, before the queue timeout."""
+        controller = AdmissionController(max_concurrent=1, max_per_client=1, max_queue=1, queue_timeout=10)
+        async with controller.slot("a"):
+            started = time.monotonic()
+            with pytest.raises(AdmissionRejected):
+                await controller.acquire("b", deadline=started + 0.05)
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_queued_request_is_admitted_on_release(self):
+        """Test that a queued request gets the slot freed by another request."""
+        controller = AdmissionController(max_concurrent=1, max_per_client=1, max_queue=1, queue_timeout=1)
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+        controller.release("a", 0.1)
+        await waiter
+        assert controller.active_per_client["b"] == 1
+
+    @pytest.mark.asyncio
+    async def test_per_client_limit(self):
+        """Test that a client at its limit does not block other clients."""
+        controller = AdmissionController(max_concurrent=4, max_per_client=1, max_queue=4, queue_timeout=1)
+        await controller.acquire("a")
+        queued = asyncio.create_task(controller.acquire("a"))
+        await asyncio.sleep(0)
+        await controller.acquire("b")
+        assert controller.active == 2
+        queued.cancel()
+
+    @pytest.mark.asyncio
+    async def test_exempt_requests_bypass_limits(self):
+        """Test that exempt requests are admitted even when there is no capacity."""
+        controller = AdmissionController(max_concurrent=0, max_per_client=0, max_queue=0, queue_timeout=1)
+        async with controller.slot("a", exempt=True):
+            assert controller.active == 0
+
+    def test_retry_after_is_positive(self):
+        """Test that the retry estimate is at least one second."""
+        assert AdmissionController().retry_after() >= 1
+
+
+def forwarded_request(forwarded: str) -> Request:
+    """A request from 10.0.0.1 with the given X-Forwarded-For header."""
+    headers = [(b"x-forwarded-for", forwarded.encode())]
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 1234)})
+
+
+class TestClientId:
+    """Tests for the identification of clients behind proxies."""
+
+    def test_uses_address_seen_by_proxy(self):
+        """Test that the entry appended by the trusted proxy identifies the client."""
+        assert client_id(forwarded_request("1.2.3.4, 5.6.7.8"), trusted_proxies=1) == "5.6.7.8"
+
+    def test_ignores_spoofed_entries(self):
+        """Test that entries set by the client do not change its identity."""
+        first = client_id(forwarded_request("1.1.1.1, 5.6.7.8"), trusted_proxies=1)
+        second = client_id(forwarded_request("2.2.2.2, 5.6.7.8"), trusted_proxies=1)
+        assert first == second == "5.6.7.8"
+
+    def test_proxy_chain(self):
+        """Test that with two trusted proxies, the address the outer one saw is used."""
+        assert client_id(forwarded_request("1.1.1.1, 5.6.7.8, 10.0.0.2"), trusted_proxies=2) == "5.6.7.8"
+
+    def test_no_trusted_proxy(self):
+        """Test that without a trusted proxy the header is ignored."""
+        assert client_id(forwarded_request("5.6.7.8"), trusted_proxies=0) == "10.0.0.1"
+
+
+class TestAdmissionRejectedResponse:
+    """Tests for the response to a rejected ObjObsSAP query."""
+
+    @pytest.fixture
+    def rejected_response(self, monkeypatch):
+        """Response to a query made while the service has no capacity."""
+        monkeypatch.setattr(admission_controller, "max_concurrent", 0)
+        monkeypatch.setattr(admission_controller, "max_queue", 0)
+        return client.get("/ObjObsSAP/query", params={"pos": "123.4,-56.7", "time": "60000/60001"})
+
+    def test_status(self, rejected_response):
+        """Test that a rejected query returns 503."""
+        assert rejected_response.status_code == 503
+
+    def test_retry_after_header(self, rejected_response):
+        """Test that a rejected query carries a Retry-After header."""
+        assert int(rejected_response.headers["retry-after"]) >= 1
+
+    def test_error_votable(self, rejected_response):
+        """Test that a rejected query returns a DALI error VOTable."""
+        assert 'name="QUERY_STATUS" value="ERROR"' in rejected_response.text
@@ -4,7 +4,9 @@ import pytest
 from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from swift_vo.constants import JOINT_MAX_POSITIONS
 from swift_vo.objobssap.api import app, parse_min_obs, parse_pos, parse_time
+from swift_vo.objobssap.schema import VOCursor
 
 client = TestClient(app)
 
@@ -110,3 +112,73 @@ class TestObjObsSAP:
         """Test that defaulted parameters still work with uppercase query names."""
         response = client.get(f"/ObjObsSAP/query?POS={quote(valid_pos)}&MIN_OBS={quote(valid_min_obs)}")
         assert response.status_code == 200
+
+
+class TestPagingEndpoint:
+    """Tests for paging through ObjObsSAP results with cursors."""
+
+    def test_cursor_returns_next_page(self, cached_windows, valid_pos, valid_time, valid_min_obs):
+        """Test that the CURSOR of an overflowing page fetches the next page."""
+        params = {"POS": valid_pos, "TIME": valid_time, "MIN_OBS": valid_min_obs, "MAXREC": 3}
+        first = client.get("/ObjObsSAP/query", params={**params, "RESPONSEFORMAT": "json"}).json()
+        assert first["metadata"]["QUERY_STATUS"] == "OVERFLOW"
+        params["CURSOR"] = first["metadata"]["CURSOR"]
+        second = client.get("/ObjObsSAP/query", params={**params, "RESPONSEFORMAT": "json"}).json()
+        assert second["metadata"]["QUERY_STATUS"] == "OK"
+        assert len(first["data"]["t_start"]) + len(second["data"]["t_start"]) == 5
+
+    def test_invalid_cursor(self, valid_pos, valid_min_obs):
+        """Test the response for an undecodable cursor."""
+        response = client.get(
+            "/ObjObsSAP/query", params={"POS": valid_pos, "MIN_OBS": valid_min_obs, "CURSOR": "invalid"}
+        )
+        assert response.status_code == 422
+
+    def test_cursor_of_other_query(self, cached_windows, valid_time, valid_min_obs):
+        """Test that a cursor is rejected for a different position."""
+        cursor = VOCursor(s_ra=10.5, s_dec=20.3, t_min=60000, t_max=60001, min_obs=1500, after=60000)
+        response = client.get(
+            "/ObjObsSAP/query",
+            params={"POS": "1,2", "TIME": valid_time, "MIN_OBS": valid_min_obs, "CURSOR": cursor.to_string()},
+        )
+        assert response.status_code == 422
+
+
+class TestJointEndpoint:
+    """Tests for the joint observability endpoint."""
+
+    def test_repeated_pos(self, cached_windows, valid_time):
+        """Test that repeated POS parameters are combined."""
+        response = client.get(
+            "/ObjObsSAP/joint",
+            params=[
+                ("POS", "10.5,20.3"),
+                ("POS", "10.5,20.3"),
+                ("TIME", valid_time),
+                ("RESPONSEFORMAT", "json"),
+            ],
+        )
+        assert response.status_code == 200
+        assert len(response.json()["data"]["t_start"]) == 5
+
+    def test_too_many_positions(self, valid_time):
+        """Test that too many positions are rejected."""
+        params = [("POS", "1,2")] * (JOINT_MAX_POSITIONS + 1) + [("TIME", valid_time)]
+        assert client.get("/objobssap/joint", params=params).status_code == 422
+
+
+class TestDeadlineHeader:
+    """Tests for the X-Request-Deadline header."""
+
+    def test_deadline_accepted(self, cached_windows, query_params):
+        """Test that a valid deadline is accepted."""
+        response = client.get("/objobssap/query", params=query_params, headers={"X-Request-Deadline": "2.5"})
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize("deadline", ["soon", "0", "-1", "nan", "100000"])
+    def test_invalid_deadline(self, query_params, deadline):
+        """Test that invalid deadlines are rejected."""
+        response = client.get(
+            "/objobssap/query", params=query_params, headers={"X-Request-Deadline": deadline}
+        )
+        assert response.status_code == 422
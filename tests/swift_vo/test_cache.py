@@ -0,0 +1,46 @@
+"""Tests for the upstream window cache."""
+
+from swift_vo.objobssap.cache import WindowCache
+
+
+class TestWindowCache:
+    """Tests for the WindowCache class."""
+
+    def test_miss(self):
+        """Test that a missing key returns None."""
+        assert WindowCache().get("missing") is None
+
+    def test_hit(self):
+        """Test that a cached value is returned."""
+        cache = WindowCache()
+        cache.put("key", [1, 2])
+        assert cache.get("key") == [1, 2]
+
+    def test_contains(self):
+        """Test that membership reflects cached keys."""
+        cache = WindowCache()
+        cache.put("key", [])
+        assert "key" in cache
+
+    def test_expired(self):
+        """Test that entries past their time to live are dropped."""
+        cache = WindowCache(ttl=-1)
+        cache.put("key", [])
+        assert cache.get("key") is None
+
+    def test_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = WindowCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert "b" not in cache
+
+    def test_hit_rate(self):
+        """Test that the hit rate counts hits and misses."""
+        cache = WindowCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        assert cache.stats()["hit_rate"] == 0.5
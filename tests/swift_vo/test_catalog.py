@@ -0,0 +1,146 @@
+"""Tests for the bulk catalog precompute."""
+
+import numpy as np
+import pytest
+from astropy.table import Table
+
+from swift_vo.catalog import main, precompute, read_catalog, time_grid
+from swift_vo.visibility.targets import target_windows
+
+T_MIN, T_MAX = 60000.0, 60001.0
+TLE_LINES = [
+    "1 28485U 04047A   26291.50000000  .00005000  00000-0  20000-3 0  9990",
+    "2 28485  20.5560 123.4567 0005000 234.5678 125.4321 15.30000000 10000",
+]
+
+
+@pytest.fixture(autouse=True)
+def no_hard_limit(monkeypatch):
+    """Fixture placing the hard limit well after the test time range."""
+    monkeypatch.setattr("swift_vo.catalog.T_MAX_HARD_LIMIT_DELTA", 10**6)
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Fixture writing a catalog of 50 random sources to a FITS file."""
+    rng = np.random.default_rng(4)
+    path = tmp_path / "catalog.fits"
+    Table(
+        {
+            "NAME": [f"S{index}" for index in range(50)],
+            "RAJ2000": rng.uniform(0, 360, 50),
+            "DEJ2000": rng.uniform(-90, 90, 50),
+        }
+    ).write(path)
+    return path
+
+
+class TestReadCatalog:
+    """Tests for reading catalogs."""
+
+    def test_recognized_columns(self, catalog):
+        """Test that common RA and Dec column names are recognized."""
+        ra, dec, ids = read_catalog(catalog)
+        assert len(ra) == len(dec) == 50
+        assert ids is None
+
+    @pytest.mark.parametrize("suffix,format", [(".csv", "ascii.csv"), (".vot", "votable")])
+    def test_formats(self, tmp_path, suffix, format):
+        """Test reading CSV and VOTable catalogs with explicit columns."""
+        path = tmp_path / f"catalog{suffix}"
+        Table({"id": ["a", "b"], "x": [1.0, 2.0], "y": [3.0, 4.0]}).write(path, format=format)
+        ra, dec, ids = read_catalog(path, "x", "y", "id")
+        assert (ra.tolist(), dec.tolist(), ids.tolist()) == ([1.0, 2.0], [3.0, 4.0], ["a", "b"])
+
+    def test_missing_columns(self, tmp_path):
+        """Test that a catalog without position columns is rejected."""
+        path = tmp_path / "catalog.csv"
+        Table({"x": [1.0]}).write(path)
+        with pytest.raises(ValueError):
+            read_catalog(path)
+
+
+class TestPrecompute:
+    """Tests for precomputing the windows of a catalog."""
+
+    def test_time_grid_hard_limit(self, monkeypatch):
+        """Test that the time grid stops at the hard limit."""
+        monkeypatch.setattr("swift_vo.catalog.T_MAX_HARD_LIMIT_DELTA", 0)
+        mjd, t_max = time_grid(T_MIN, 10**6, 3600)
+        assert t_max < 10**6
+        assert mjd[-1] + 1 / 24 <= t_max
+
+    def test_matches_target_windows(self, catalog, tmp_path, swift_tle):
+        """Test that the output holds the windows of every source, in catalog order."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        output = tmp_path / "windows.parquet"
+        summary = precompute(
+            catalog, output, T_MIN, T_MAX, min_obs=600, chunk_size=16, earth_constraint=False
+        )
+        assert summary["computed"] == 50
+        table = pq.read_table(output).to_pydict()
+        ra, dec, _ = read_catalog(catalog)
+        expected = target_windows(ra, dec, T_MIN + np.arange(1440) / 1440, 60, min_obs=600)
+        assert table["t_start"] == np.concatenate([t_start for t_start, _ in expected]).tolist()
+        assert table["source"] == sorted(table["source"])
+        assert not (tmp_path / "windows.parquet.checkpoints").exists()
+
+    def test_resumes_from_checkpoints(self, catalog, tmp_path):
+        """Test that a second run only computes the chunks without checkpoints."""
+        output = tmp_path / "windows.csv"
+        precompute(
+            catalog, output, T_MIN, T_MAX, chunk_size=16, earth_constraint=False, keep_checkpoints=True
+        )
+        first = output.read_text()
+        (tmp_path / "windows.csv.checkpoints" / "part-000001.npz").unlink()
+        summary = precompute(catalog, output, T_MIN, T_MAX, chunk_size=16, earth_constraint=False)
+        assert (summary["computed"], summary["resumed_chunks"]) == (16, 3)
+        assert output.read_text() == first
+
+    def test_rejects_checkpoints_of_other_run(self, catalog, tmp_path):
+        """Test that checkpoints of a run with other arguments are not reused."""
+        output = tmp_path / "windows.csv"
+        precompute(
+            catalog, output, T_MIN, T_MAX, chunk_size=16, earth_constraint=False, keep_checkpoints=True
+        )
+        with pytest.raises(ValueError):
+            precompute(catalog, output, T_MIN, T_MAX, min_obs=600, chunk_size=16, earth_constraint=False)
+
+    def test_process_pool(self, catalog, tmp_path):
+        """Test that chunks evaluated by worker processes give the same result."""
+        inline, pooled = tmp_path / "inline.csv", tmp_path / "pooled.csv"
+        precompute(catalog, inline, T_MIN, T_MAX, chunk_size=16, earth_constraint=False)
+        summary = precompute(catalog, pooled, T_MIN, T_MAX, chunk_size=16, workers=2, earth_constraint=False)
+        assert summary["workers"] == 2
+        assert inline.read_text() == pooled.read_text()
+
+    def test_main(self, catalog, tmp_path, capsys):
+        """Test the command line entry point."""
+        output = tmp_path / "windows.csv"
+        args = [str(catalog), "--time", f"{T_MIN}/{T_MAX}", "--output", str(output), "--workers", "1"]
+        assert main([*args, "--id-column", "NAME", "--no-earth-constraint"]) == 0
+        assert "sources/s" in capsys.readouterr().out
+        header = next(line for line in output.read_text().splitlines() if not line.startswith("#"))
+        assert header.startswith("source,id,s_ra")
+
+    def test_requires_tle(self, catalog, tmp_path, capsys):
+        """Test that without a TLE the run fails unless the Earth constraint is dropped."""
+        output = tmp_path / "windows.csv"
+        args = [str(catalog), "--time", f"{T_MIN}/{T_MAX}", "--output", str(output), "--workers", "1"]
+        assert main(args) == 2
+        assert "--no-earth-constraint" in capsys.readouterr().err
+        assert not output.exists()
+
+    def test_earth_constraint(self, catalog, tmp_path, swift_tle):
+        """Test that windows with a TLE include Earth occultation."""
+        path = tmp_path / "swift.tle"
+        path.write_text("\n".join(["SWIFT", *TLE_LINES]) + "\n")
+        day = swift_tle.epoch
+        output = tmp_path / "windows.csv"
+        precompute(catalog, output, day, day + 0.5, chunk_size=16, tle_file=str(path))
+        lines = output.read_text().splitlines()
+        assert "# EARTH_CONSTRAINT: T" in lines
+        assert "# SAA_CONSTRAINT: F" in lines
+        # Occulted for part of every 94 minute orbit
+        durations = [float(line.split(",")[-1]) for line in lines if line[0].isdigit()]
+        assert durations and max(durations) < 94 * 60
@@ -0,0 +1,84 @@
+"""Tests for offloading CPU-bound work from the event loop."""
+
+import pickle
+import threading
+
+import pytest
+
+from swift_vo import constants
+from swift_vo.base.executor import run_cpu_bound, run_upstream
+from swift_vo.objobssap import service
+from swift_vo.objobssap.cache import window_cache
+from swift_vo.objobssap.service import ObjObsSAPService
+
+
+def _thread_name() -> str:
+    """Return the name of the thread this function runs in."""
+    return threading.current_thread().name
+
+
+class TestRunCpuBound:
+    """Tests for the run_cpu_bound function."""
+
+    @pytest.mark.asyncio
+    async def test_small_work_runs_inline(self):
+        """Test that work below the threshold runs on the event loop thread."""
+        assert await run_cpu_bound(_thread_name, size=0) == threading.current_thread().name
+
+    @pytest.mark.asyncio
+    async def test_large_work_is_offloaded(self, monkeypatch):
+        """Test that work at or above the threshold runs in the CPU pool."""
+        monkeypatch.setattr(constants, "CPU_OFFLOAD_THRESHOLD", 10)
+        assert (await run_cpu_bound(_thread_name, size=10)).startswith("swift-vo-cpu")
+
+    @pytest.mark.asyncio
+    async def test_arguments_are_passed(self, monkeypatch):
+        """Test that positional and keyword arguments reach the offloaded callable."""
+        monkeypatch.setattr(constants, "CPU_OFFLOAD_THRESHOLD", 0)
+        assert await run_cpu_bound(divmod, 7, 2, size=1) == (3, 1)
+
+    @pytest.mark.asyncio
+    async def test_offloaded_vo_format_matches_inline(self, service_with_windows, monkeypatch):
+        """Test that the VOTable rendered in the CPU pool has the same rows as inline rendering."""
+        inline = await service_with_windows.vo_format()
+        monkeypatch.setattr(constants, "CPU_OFFLOAD_THRESHOLD", 0)
+        offloaded = await service_with_windows.vo_format()
+        assert inline.split("<TABLEDATA>")[1] == offloaded.split("<TABLEDATA>")[1]
+
+
+class TestRunUpstream:
+    """Tests for running upstream calls in the upstream pool."""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_upstream_pool(self):
+        """Test that upstream calls run in the dedicated upstream pool."""
+        assert (await run_upstream(_thread_name)).startswith("swift-vo-upstream")
+
+    @pytest.mark.asyncio
+    async def test_visibility_query_off_the_loop(self, basic_service, monkeypatch):
+        """Test that the whole upstream visibility query runs in the upstream pool."""
+        threads = []
+
+        class FakeVisQuery:
+            def __init__(self, **kwargs):
+                threads.append(_thread_name())
+                self.entries = []
+
+            def submit_get(self):
+                threads.append(_thread_name())
+                return True
+
+        monkeypatch.setattr(service, "VisQuery", FakeVisQuery)
+        await basic_service.fetch_bounds()
+        window_cache.clear()
+        assert len(threads) == 2
+        assert all(name.startswith("swift-vo-upstream") for name in threads)
+
+
+class TestServicePickling:
+    """Tests for sending the service to a process pool."""
+
+    def test_service_is_picklable(self, service_with_windows):
+        """Test that the service can be sent to a process pool."""
+        restored = pickle.loads(pickle.dumps(service_with_windows))
+        assert isinstance(restored, ObjObsSAPService)
@@ -0,0 +1,90 @@
+"""Tests for the alternative ObjObsSAP response formats."""
+
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from swift_vo.objobssap.api import app
+from swift_vo.objobssap.formats import response_media_type
+
+client = TestClient(app)
+
+
+class TestResponseMediaType:
+    """Tests for the response_media_type function."""
+
+    def test_default_is_votable(self):
+        """Test that the default format is a VOTable."""
+        assert response_media_type(None) == "application/x-votable+xml"
+
+    def test_short_name(self):
+        """Test that DALI short names are accepted case-insensitively."""
+        assert response_media_type("CSV") == "text/csv"
+
+    def test_media_type(self):
+        """Test that media types are accepted."""
+        assert response_media_type("application/json") == "application/json"
+
+    def test_invalid(self):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(HTTPException):
+            response_media_type("xls")
+
+
+class TestFormats:
+    """Tests for the formatted output of the service."""
+
+    @pytest.mark.asyncio
+    async def test_csv_rows(self, service_with_windows):
+        """Test that the CSV output has a header row and one row per window."""
+        content, _ = await service_with_windows.format("csv")
+        rows = [line for line in content.splitlines() if not line.startswith("#")]
+        assert rows == ["t_validity,t_start,t_stop,t_observability", "60010.0,60000.0,60001.0,86400.0"]
+
+    @pytest.mark.asyncio
+    async def test_csv_metadata(self, service_with_upload):
+        """Test that the CSV output carries the INFO metadata as comments."""
+        content, _ = await service_with_upload.format("csv")
+        assert "# UPLOAD: test.xml" in content.splitlines()
+
+    @pytest.mark.asyncio
+    async def test_json(self, service_with_windows):
+        """Test that the JSON output holds the columns and metadata."""
+        content, _ = await service_with_windows.format("json")
+        document = json.loads(content)
+        assert document["data"]["t_observability"] == [86400.0]
+        assert document["metadata"]["QUERY_STATUS"] == "OK"
+
+    @pytest.mark.asyncio
+    async def test_arrow(self, service_with_windows):
+        """Test that the Arrow IPC stream holds the columns and schema metadata."""
+        pa = pytest.importorskip("pyarrow")
+        content, _ = await service_with_windows.format("arrow")
+        table = pa.ipc.open_stream(content).read_all()
+        assert table.column("t_start").to_pylist() == [60000.0]
+        assert table.schema.metadata[b"QUERY_STATUS"] == b"OK"
+
+    @pytest.mark.asyncio
+    async def test_parquet(self, service_with_windows):
+        """Test that the Parquet file holds the columns and field units."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        content, _ = await service_with_windows.format("parquet")
+        table = pq.read_table(io.BytesIO(content))
+        assert table.schema.field("t_observability").metadata[b"unit"] == b"s"
+
+
+class TestFormatEndpoint:
+    """Tests for RESPONSEFORMAT on the ObjObsSAP endpoint."""
+
+    def test_csv_content_type(self, query_params):
+        """Test that RESPONSEFORMAT=csv returns CSV."""
+        response = client.get("/ObjObsSAP/query", params={**query_params, "RESPONSEFORMAT": "csv"})
+        assert response.headers["content-type"].startswith("text/csv")
+
+    def test_invalid_format(self, query_params):
+        """Test that an unknown RESPONSEFORMAT is rejected."""
+        response = client.get("/ObjObsSAP/query", params={**query_params, "responseformat": "xls"})
+        assert response.status_code == 422
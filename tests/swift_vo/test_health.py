@@ -0,0 +1,149 @@
+"""Tests for the background health monitor behind VOSI availability."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from swift_vo.base import health
+from swift_vo.base.admission import admission_controller
+from swift_vo.base.health import HealthMonitor
+from swift_vo.base.monitor import loop_lag_monitor
+from swift_vo.objobssap import service
+
+client = TestClient(app)
+
+
+class FakeVisQuery:
+    """Stand-in for the upstream visibility query."""
+
+    ok = True
+    delay = 0.0
+    entries: list = []
+    _timeout = 120
+    timeouts: list[float] = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def submit_get(self):
+        """Answer after ``delay`` seconds."""
+        self.timeouts.append(self._timeout)
+        time.sleep(self.delay)
+        return self.ok
+
+
+@pytest.fixture
+def fake_upstream(monkeypatch):
+    """Fixture replacing the upstream visibility query used by health probes."""
+    monkeypatch.setattr(service, "VisQuery", FakeVisQuery)
+    monkeypatch.setattr(FakeVisQuery, "ok", True)
+    monkeypatch.setattr(FakeVisQuery, "delay", 0.0)
+    monkeypatch.setattr(FakeVisQuery, "timeouts", [])
+    return FakeVisQuery
+
+
+class TestHealthMonitor:
+    """Tests for the HealthMonitor class."""
+
+    def test_available_before_first_check(self):
+        """Test that the service is reported available until checked."""
+        assert b"<available>true</available>" in HealthMonitor().availability_xml
+
+    @pytest.mark.asyncio
+    async def test_successful_probe(self, fake_upstream):
+        """Test that an answering upstream service keeps the service available."""
+        monitor = HealthMonitor()
+        assert await monitor.probe()
+        monitor.evaluate()
+        assert monitor.available
+
+    @pytest.mark.asyncio
+    async def test_probe_timeout_counts_as_failure(self, fake_upstream):
+        """Test that a probe that does not answer in time fails."""
+        fake_upstream.delay = 0.2
+        monitor = HealthMonitor(probe_timeout=0.01)
+        assert not await monitor.probe()
+        assert monitor.failures == 1
+
+    @pytest.mark.asyncio
+    async def test_probe_timeout_passed_to_client(self, fake_upstream):
+        """Test that the upstream request itself gives up after the probe timeout."""
+        await HealthMonitor(probe_timeout=3.0).probe()
+        assert fake_upstream.timeouts == [3.0]
+
+    def test_unavailable_after_repeated_failures(self):
+        """Test that repeated probe failures make the service unavailable."""
+        monitor = HealthMonitor(max_failures=2)
+        monitor.record_probe(False, 0.1)
+        monitor.evaluate()
+        assert monitor.available
+        monitor.record_probe(False, 0.1)
+        monitor.evaluate()
+        assert not monitor.available
+
+    def test_unavailable_document(self):
+        """Test that the availability document carries notes and backAt when unavailable."""
+        monitor = HealthMonitor(max_failures=1)
+        monitor.record_probe(False, 0.1)
+        monitor.evaluate()
+        assert b"<available>false</available>" in monitor.availability_xml
+        assert b"<backAt>" in monitor.availability_xml
+        assert b"<note>Upstream" in monitor.availability_xml
+
+    def test_recovery_resets_up_since(self):
+        """Test that becoming available again restarts upSince."""
+        monitor = HealthMonitor(max_failures=1)
+        started = monitor.up_since
+        monitor.record_probe(False, 0.1)
+        monitor.evaluate()
+        monitor.record_probe(True, 0.1)
+        monitor.evaluate()
+        assert monitor.available
+        assert monitor.up_since > started
+
+    def test_loop_lag_makes_unavailable(self, monkeypatch):
+        """Test that a saturated event loop makes the service unavailable."""
+        monkeypatch.setattr(loop_lag_monitor, "samples", type(loop_lag_monitor.samples)([2.0], maxlen=10))
+        monitor = HealthMonitor(max_loop_lag=1.0)
+        monitor.evaluate()
+        assert not monitor.available
+        assert "saturated" in monitor.notes[0]
+
+    def test_full_queue_makes_unavailable(self, monkeypatch):
+        """Test that a full admission queue makes the service unavailable."""
+        monkeypatch.setattr(admission_controller, "max_queue", 0)
+        monitor = HealthMonitor()
+        monitor.evaluate()
+        assert not monitor.available
+        assert "capacity" in monitor.notes[0]
+
+    @pytest.mark.asyncio
+    async def test_background_probes(self, fake_upstream):
+        """Test that the running monitor probes the upstream service."""
+        fake_upstream.ok = False
+        monitor = HealthMonitor(check_interval=0.01, probe_interval=0.01, max_failures=1)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        assert monitor.failures >= 1
+        assert not monitor.available
+
+
+class TestAvailabilityEndpoint:
+    """Tests for the availability endpoint serving the health monitor state."""
+
+    def test_reports_monitor_state(self, monkeypatch):
+        """Test that the endpoint returns the monitor's latest document."""
+        monitor = HealthMonitor(max_failures=1)
+        monitor.record_probe(False, 0.1)
+        monitor.evaluate()
+        monkeypatch.setattr(health.health_monitor, "availability_xml", monitor.availability_xml)
+        response = client.get("/objobssap/availability")
+        assert "<available>false</available>" in response.text
+
+    def test_health_in_metrics(self):
+        """Test that the metrics endpoint reports the health state."""
+        assert "available" in client.get("/metrics").json()["health"]
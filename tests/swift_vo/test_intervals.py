@@ -0,0 +1,77 @@
+"""Tests for sorted, array-backed interval sets."""
+
+import numpy as np
+
+from swift_vo.visibility.intervals import IntervalSet
+
+
+def brute_force(intervals: IntervalSet, grid: np.ndarray) -> np.ndarray:
+    """Whether each grid point lies in one of the intervals."""
+    return np.array([any(b <= t < e for b, e in intervals) for t in grid])
+
+
+class TestIntervalSet:
+    """Tests for the IntervalSet class."""
+
+    def test_normalizes_intervals(self):
+        """Test that intervals are sorted, and overlapping or touching ones merged."""
+        intervals = IntervalSet([5, 0, 2, 8], [7, 2, 3, 8])
+        assert list(intervals) == [(0, 3), (5, 7)]
+
+    def test_union(self):
+        """Test the union of two sets."""
+        union = IntervalSet([0, 10], [5, 15]) | IntervalSet([4, 20], [11, 21])
+        assert list(union) == [(0, 15), (20, 21)]
+
+    def test_intersection(self):
+        """Test the intersection of two sets."""
+        both = IntervalSet([0, 10], [5, 15]) & IntervalSet([4, 20], [11, 21])
+        assert list(both) == [(4, 5), (10, 11)]
+
+    def test_intersection_of_many(self):
+        """Test the intersection of several sets at once."""
+        sets = [IntervalSet([0], [10]), IntervalSet([2], [8]), IntervalSet([5], [12])]
+        assert list(sets[0].intersection(*sets[1:])) == [(5, 8)]
+
+    def test_touching_intervals_do_not_intersect(self):
+        """Test that half-open intervals that only touch have no intersection."""
+        assert len(IntervalSet([0], [5]) & IntervalSet([5], [10])) == 0
+
+    def test_difference(self):
+        """Test the difference of two sets."""
+        remainder = IntervalSet([0, 10], [5, 15]) - IntervalSet([4, 12], [11, 13])
+        assert list(remainder) == [(0, 4), (11, 12), (13, 15)]
+
+    def test_operations_match_brute_force(self):
+        """Test the set operations against pointwise evaluation on random sets."""
+        rng = np.random.default_rng(3)
+        begin = rng.integers(0, 1000, (2, 50))
+        a = IntervalSet(begin[0], begin[0] + rng.integers(1, 40, 50))
+        b = IntervalSet(begin[1], begin[1] + rng.integers(1, 40, 50))
+        grid = np.arange(-1, 1045) + 0.5
+        in_a, in_b = brute_force(a, grid), brute_force(b, grid)
+        assert (brute_force(a | b, grid) == (in_a | in_b)).all()
+        assert (brute_force(a & b, grid) == (in_a & in_b)).all()
+        assert (brute_force(a - b, grid) == (in_a & ~in_b)).all()
+
+    def test_filter(self):
+        """Test that filtering keeps the intervals at least the given length."""
+        assert list(IntervalSet([0, 10], [5, 12]).filter(3)) == [(0, 5)]
+
+    def test_merge(self):
+        """Test that merging closes gaps up to the given length."""
+        intervals = IntervalSet([0, 6, 20], [5, 10, 25]).merge(1)
+        assert list(intervals) == [(0, 10), (20, 25)]
+
+    def test_datetime64(self):
+        """Test that datetime64 intervals are supported, with timedelta64 lengths."""
+        begin = np.datetime64("2025-01-01T00:00") + np.array([0, 120], dtype="timedelta64[m]")
+        intervals = IntervalSet(begin, begin + np.timedelta64(90, "m"))
+        assert len(intervals & IntervalSet(begin[1:], begin[1:] + np.timedelta64(1, "D"))) == 1
+        assert len(intervals.filter(np.timedelta64(2, "h"))) == 0
+
+    def test_empty(self):
+        """Test operations involving empty sets."""
+        empty = IntervalSet(np.empty(0), np.empty(0))
+        assert len(empty | empty) == 0
+        assert list(IntervalSet([0], [1]) - empty) == [(0, 1)]
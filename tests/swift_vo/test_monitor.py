@@ -0,0 +1,61 @@
+"""Tests for event loop lag monitoring and the metrics endpoint."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from swift_vo.base.monitor import LoopLagMonitor
+
+client = TestClient(app)
+
+
+class TestLoopLagMonitor:
+    """Tests for the LoopLagMonitor class."""
+
+    def test_empty_stats(self):
+        """Test that statistics are zero before any sample is taken."""
+        assert LoopLagMonitor().stats()["samples"] == 0
+
+    def test_record_updates_max(self):
+        """Test that recording samples tracks the maximum lag."""
+        monitor = LoopLagMonitor()
+        monitor.record(0.01)
+        monitor.record(0.2)
+        assert monitor.stats()["max_ms"] == pytest.approx(200.0)
+
+    def test_current_lag(self):
+        """Test that the current lag is the latest sample."""
+        monitor = LoopLagMonitor()
+        monitor.record(0.2)
+        monitor.record(0.01)
+        assert monitor.current_lag == 0.01
+
+    @pytest.mark.asyncio
+    async def test_detects_blocked_loop(self):
+        """Test that blocking the event loop shows up as lag."""
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        assert monitor.stats()["max_ms"] >= 50
+
+
+class TestMetricsEndpoint:
+    """Tests for the metrics endpoint."""
+
+    def test_metrics_status(self):
+        """Test that the metrics endpoint returns 200."""
+        assert client.get("/metrics").status_code == 200
+
+    def test_metrics_has_loop_lag(self):
+        """Test that the metrics include event loop lag statistics."""
+        assert "p99_ms" in client.get("/metrics").json()["event_loop_lag"]
+
+    def test_metrics_has_cpu_offload(self):
+        """Test that the metrics include CPU offload counters."""
+        assert "offloaded" in client.get("/metrics").json()["cpu_offload"]
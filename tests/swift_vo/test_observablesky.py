@@ -0,0 +1,114 @@
+"""Tests for the observable sky endpoint."""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from swift_vo.observablesky import service as observablesky_service
+from swift_vo.observablesky.api import app
+from swift_vo.observablesky.service import ObservableSkyService
+from swift_vo.visibility.store import EphemerisStore
+
+client = TestClient(app)
+
+# A day within a few days of the test TLE's epoch
+DAY = 61331
+
+
+@pytest.fixture(autouse=True)
+def orbit(monkeypatch, swift_tle):
+    """Make the test TLE Swift's current orbit."""
+    monkeypatch.setattr(observablesky_service, "current_tle", lambda: swift_tle)
+    return swift_tle
+
+
+class TestObservableSkyService:
+    """Tests for the ObservableSkyService class."""
+
+    def test_chunks_split_at_day_boundaries(self):
+        """Test that the time range is split into per-day chunks."""
+        service = ObservableSkyService(60000.5, 60002.25, 0, step=3600)
+        assert service.chunks() == [(60000, 12, 24), (60001, 0, 24), (60002, 0, 6)]
+
+    @pytest.mark.asyncio
+    async def test_most_of_the_sky_is_observable(self):
+        """Test that most of the sky is observable outside the Sun and Moon constraints."""
+        service = ObservableSkyService(DAY, DAY + 0.1, 0, order=3, step=600)
+        await service.query()
+        assert 0.5 < len(service.ipix) / 768 < 1
+
+    @pytest.mark.asyncio
+    async def test_min_obs_longer_than_range(self):
+        """Test that nothing is observable for longer than the time range."""
+        service = ObservableSkyService(DAY, DAY + 0.1, 86400, order=3, step=600)
+        await service.query()
+        assert len(service.ipix) == 0
+
+    @pytest.mark.asyncio
+    async def test_earth_occultation_applied(self):
+        """Test that little of the sky is observable for longer than an orbit."""
+        service = ObservableSkyService(DAY, DAY + 0.5, 6000, order=3, step=600)
+        await service.query()
+        assert len(service.ipix) / 768 < 0.5
+
+    def test_rejects_inverted_range(self):
+        """Test that a time range ending before it starts is rejected."""
+        with pytest.raises(HTTPException) as excinfo:
+            ObservableSkyService(DAY + 1, DAY, 0)
+        assert excinfo.value.status_code == 422
+
+    def test_rejects_long_range(self):
+        """Test that a time range longer than the hard limit span is rejected."""
+        with pytest.raises(HTTPException) as excinfo:
+            ObservableSkyService(0, 61000, 0)
+        assert excinfo.value.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_requires_orbit(self, monkeypatch):
+        """Test that queries fail when Swift's orbit is not available."""
+        monkeypatch.setattr(observablesky_service, "current_tle", lambda: None)
+        monkeypatch.setattr(observablesky_service, "ephemeris_store", EphemerisStore(None))
+        service = ObservableSkyService(DAY, DAY + 0.1, 0, order=3, step=600)
+        with pytest.raises(HTTPException) as excinfo:
+            await service.query()
+        assert excinfo.value.status_code == 503
+
+
+class TestObservableSkyEndpoint:
+    """Tests for the observable sky endpoint."""
+
+    def test_fits(self):
+        """Test that the default response is a FITS MOC."""
+        response = client.get("/observablesky/query", params={"time": f"{DAY}/{DAY + 0.01}"})
+        assert response.headers["content-type"] == "application/fits"
+        assert response.content.startswith(b"SIMPLE")
+
+    def test_ascii(self):
+        """Test the ASCII MOC response."""
+        response = client.get(
+            "/ObservableSky/query", params={"TIME": f"{DAY}/{DAY + 0.01}", "RESPONSEFORMAT": "ascii"}
+        )
+        assert any(token.startswith("5/") for token in response.text.split())
+
+    def test_json_metadata(self):
+        """Test that the JSON MOC carries the query metadata."""
+        params = {"time": f"{DAY}/{DAY + 0.01}", "min_obs": "60", "responseformat": "json"}
+        response = client.get("/observablesky/query", params=params)
+        assert response.json()["metadata"]["MIN_OBS"] == "60.0"
+
+    def test_invalid_format(self):
+        """Test that an unknown RESPONSEFORMAT is rejected."""
+        response = client.get("/observablesky/query", params={"time": "60000/60001", "responseformat": "xls"})
+        assert response.status_code == 422
+
+    def test_long_range_rejected(self):
+        """Test that a time range spanning thousands of days is rejected."""
+        response = client.get("/observablesky/query", params={"time": "0/61000"})
+        assert response.status_code == 422
+
+    def test_constraint_metadata(self):
+        """Test that the JSON MOC records that the Earth limb constraint is applied and the SAA is not."""
+        params = {"time": f"{DAY}/{DAY + 0.01}", "responseformat": "json"}
+        response = client.get("/observablesky/query", params=params)
+        assert response.json()["metadata"]["EARTH_CONSTRAINT"] == "T"
+        assert response.json()["metadata"]["SAA_CONSTRAINT"] == "F"
@@ -0,0 +1,156 @@
+"""Tests for the traffic replay tool."""
+
+import json
+from collections import Counter
+from datetime import datetime
+
+import httpx
+import numpy as np
+import pytest
+
+from app import app
+from swift_vo import replay
+from swift_vo.objobssap import service
+from swift_vo.objobssap.cache import window_cache
+from swift_vo.replay import LoggedRequest, UpstreamRecordings
+
+COMBINED_LINE = (
+    '10.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET /vo/objobssap/query?POS=10.5,20.3&TIME=60000/60001 '
+    'HTTP/1.1" 200 1234 "-" "curl/8.0"'
+)
+UVICORN_LINE = 'INFO:     10.0.0.2:51234 - "GET /vo/ObjObsSAP/query?POS=1,2 HTTP/1.1" 200 OK'
+
+
+@pytest.fixture
+def recordings():
+    """Fixture with one recorded upstream response of two windows."""
+    recordings = UpstreamRecordings(latency_scale=0)
+    begin = np.array(["2023-02-25T01:00", "2023-02-25T03:00"], dtype="datetime64[us]")
+    recordings.add(
+        10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26), 0.1, (begin, begin + 1800_000_000)
+    )
+    return recordings
+
+
+class TestReadRequests:
+    """Tests for reading requests to replay."""
+
+    def test_combined_log_line(self):
+        """Test that a combined log line gives the client, path and time."""
+        request = replay.parse_log_line(COMBINED_LINE)
+        assert request.client == "10.0.0.1"
+        assert request.path.startswith("/vo/objobssap/query?")
+        assert request.t == datetime.fromisoformat("2026-10-19T10:00:00+00:00").timestamp()
+
+    def test_uvicorn_log_line(self):
+        """Test that a uvicorn access log line gives the client and path."""
+        request = replay.parse_log_line(UVICORN_LINE)
+        assert (request.client, request.t) == ("10.0.0.2", None)
+
+    def test_other_paths_ignored(self):
+        """Test that requests other than ObjObsSAP queries are skipped."""
+        assert replay.parse_log_line(COMBINED_LINE.replace("query?", "availability?")) is None
+
+    def test_times_relative_to_first(self, tmp_path):
+        """Test that request times are relative to the first request."""
+        log = tmp_path / "traffic.jsonl"
+        log.write_text('{"t": 100.0, "path": "/objobssap/query?POS=1,2"}\n{"t": 102.5, "path": "/x"}\n')
+        assert [r.t for r in replay.read_requests(log)] == [0.0, 2.5]
+
+    def test_scaled_schedule(self):
+        """Test that the speed scales the original schedule."""
+        requests = [LoggedRequest(0.0, "/", None), LoggedRequest(2.0, "/", None)]
+        assert replay.schedule(requests, speed=2) == [0.0, 1.0]
+
+    def test_untimed_requests_need_rate(self):
+        """Test that requests without times need a fixed rate."""
+        requests = [LoggedRequest(None, "/", None)] * 3
+        with pytest.raises(ValueError):
+            replay.schedule(requests)
+        assert replay.schedule(requests, rate=2) == [0.0, 0.5, 1.0]
+
+
+class TestUpstreamRecordings:
+    """Tests for replaying recorded upstream responses."""
+
+    def test_recorded_range(self, recordings):
+        """Test that a recorded query gets the recorded windows."""
+        begin, _ = recordings.fetch(10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26))
+        assert np.datetime_as_string(begin, unit="m").tolist() == ["2023-02-25T01:00", "2023-02-25T03:00"]
+
+    def test_shifted_range(self, recordings):
+        """Test that another time range of a recorded position gets shifted windows."""
+        begin, end = recordings.fetch(10.5, 20.3, datetime(2023, 3, 1), datetime(2023, 3, 1, 2))
+        assert np.datetime_as_string(begin, unit="m").tolist() == ["2023-03-01T01:00"]
+        assert recordings.counts["shifted"] == 1
+
+    def test_unrecorded_position_fails(self, recordings):
+        """Test that an unrecorded position gives a failed query."""
+        assert recordings.fetch(1.0, 2.0, datetime(2023, 2, 25), datetime(2023, 2, 26)) is None
+
+    def test_resolutions_kept_apart(self, recordings):
+        """Test that a low resolution query does not get high resolution windows."""
+        assert recordings.fetch(10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26), hires=False) is None
+        begin = np.array(["2023-02-25T00:00"], dtype="datetime64[us]")
+        recordings.add(
+            10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26), 0.1, (begin, begin), hires=False
+        )
+        coarse, _ = recordings.fetch(10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26), hires=False)
+        assert len(coarse) == 1
+
+    def test_recorder_passes_resolution(self):
+        """Test that recorded queries keep their resolution."""
+        recordings = UpstreamRecordings(latency_scale=0)
+        empty = np.empty(0, dtype="datetime64[us]")
+        fetch = recordings.recorder(lambda s_ra, s_dec, begin, end, hires=True, timeout=None: (empty, empty))
+        fetch(10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26), hires=False)
+        assert [r["hires"] for r in recordings.recordings[(10.5, 20.3)]] == [False]
+
+    def test_save_and_load(self, recordings, tmp_path):
+        """Test that recordings survive a round trip through a file."""
+        recordings.save(tmp_path / "upstream.jsonl")
+        loaded = UpstreamRecordings.load(tmp_path / "upstream.jsonl")
+        assert loaded.recordings == recordings.recordings
+
+
+class TestReplay:
+    """Tests for replaying requests and reporting on them."""
+
+    @pytest.mark.asyncio
+    async def test_in_process_replay(self, recordings, monkeypatch):
+        """Test replaying against the application with recorded upstream responses."""
+        monkeypatch.setattr(service, "fetch_upstream_bounds", recordings.fetch)
+        path = "/vo/objobssap/query?POS=10.5,20.3&TIME=60000/60001"
+        requests = [LoggedRequest(0.0, path, "10.0.0.1"), LoggedRequest(0.01, path, "10.0.0.2")]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            report = await replay.replay(requests, [0.0, 0.05], client, strip_prefix="/vo")
+        window_cache.clear()
+        assert report["status"] == {"200": 2}
+        assert report["cache_hit_rate"] == 0.5
+
+    def test_summary_percentiles(self):
+        """Test the latency percentiles of a report."""
+        report = replay.summarize([i / 1000 for i in range(1, 101)], Counter({200: 100}), 10.0, {})
+        assert (report["p50_ms"], report["p99_ms"], report["throughput_rps"]) == (50.0, 99.0, 10.0)
+
+    def test_compare_flags_regressions(self):
+        """Test that slower latencies and lower hit rates count as worse."""
+        rows = replay.compare(
+            {"p99_ms": 200.0, "cache_hit_rate": 0.4}, {"p99_ms": 100.0, "cache_hit_rate": 0.5}
+        )
+        assert [(metric, worse) for metric, _, _, _, worse in rows] == [
+            ("p99_ms", True),
+            ("cache_hit_rate", True),
+        ]
+
+    def test_main_fails_on_regression(self, recordings, tmp_path, monkeypatch):
+        """Test that the command exits with status 1 when the baseline is beaten by the margin."""
+        log = tmp_path / "traffic.jsonl"
+        log.write_text(json.dumps({"t": 0, "path": "/vo/objobssap/query?POS=10.5,20.3&TIME=60000/60001"}))
+        recordings.save(tmp_path / "upstream.jsonl")
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps({"p50_ms": 0.001}))
+        args = [str(log), "--upstream", str(tmp_path / "upstream.jsonl"), "--baseline", str(baseline)]
+        assert replay.main(args + ["--max-regression", "10"]) == 1
+        window_cache.clear()
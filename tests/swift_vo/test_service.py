@@ -1,10 +1,24 @@
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 
+import numpy as np
 import pytest  # type: ignore[import-untyped]
 from astropy.time import Time  # type: ignore[import-untyped]
 
 from swift_vo.constants import T_MAX_HARD_LIMIT_DELTA
-from swift_vo.objobssap.service import ObjObsSAPService
+from swift_vo.objobssap import service
+from swift_vo.objobssap.cache import window_cache
+from swift_vo.objobssap.schema import VOCursor
+from swift_vo.objobssap.service import (
+    JointObsService,
+    ObjObsSAPService,
+    bounds_to_windows,
+    candidate_spans,
+    datetime64_to_mjd,
+    merge_bounds,
+    split_span,
+)
 
 
 class TestObjObsSAPService:
@@ -128,3 +142,377 @@ class TestObjObsSAPService:
         """Test if each field is defined in XML."""
         result = await service_with_windows.vo_format()
         assert f'name="{field}"' in result
+
+
+class TestWindowArrays:
+    """Test class for the columnar window pipeline."""
+
+    def test_datetime64_to_mjd_matches_astropy(self):
+        """Test that the array MJD conversion matches astropy."""
+        dt = datetime(2026, 10, 19, 3, 4, 5, 123456)
+        assert datetime64_to_mjd(np.array([dt], dtype="datetime64[us]"))[0] == pytest.approx(
+            Time(dt).mjd, abs=1e-11
+        )
+
+    def test_bounds_to_windows_filters_min_obs(self):
+        """Test that windows shorter than min_obs are dropped."""
+        begin = np.array([datetime(2026, 1, 1), datetime(2026, 1, 2)], dtype="datetime64[us]")
+        end = begin + np.array([timedelta(seconds=100), timedelta(seconds=2000)], dtype="timedelta64[us]")
+        t_start, _, _ = bounds_to_windows(begin, end, 1500)
+        assert t_start.tolist() == [datetime64_to_mjd(begin[1:])[0]]
+
+    def test_windows_are_float64_arrays(self, service_with_windows):
+        """Test that windows are held as contiguous float64 arrays."""
+        assert service_with_windows.t_start.dtype == np.float64
+        assert service_with_windows.t_stop.flags["C_CONTIGUOUS"]
+
+    def test_windows_round_trip(self, service_with_windows):
+        """Test that windows read back as (t_start, t_stop) pairs."""
+        assert service_with_windows.windows == [(60000.0, 60001.0)]
+
+    @pytest.mark.asyncio
+    async def test_many_windows_in_xml(self, basic_service):
+        """Test that every window becomes a table row."""
+        basic_service.windows = [(60000.0 + i, 60000.5 + i) for i in range(5)]
+        result = await basic_service.vo_format()
+        assert result.count("<TR>") == 5
+
+
+class TestPaging:
+    """Test class for MAXREC truncation and continuation cursors."""
+
+    @pytest.mark.asyncio
+    async def test_maxrec_limits_windows(self, cached_windows):
+        """Test that at most MAXREC windows are returned."""
+        service = ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500, maxrec=2)
+        await service.query()
+        assert service.t_start.tolist() == datetime64_to_mjd(cached_windows[:2]).tolist()
+
+    @pytest.mark.asyncio
+    async def test_overflow_status(self, cached_windows):
+        """Test that a truncated result reports QUERY_STATUS=OVERFLOW."""
+        service = ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500, maxrec=2)
+        await service.query()
+        assert ("QUERY_STATUS", "OVERFLOW") in service.infos()
+
+    @pytest.mark.asyncio
+    async def test_no_overflow_when_complete(self, cached_windows):
+        """Test that a complete result reports QUERY_STATUS=OK and no cursor."""
+        service = ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500, maxrec=5)
+        await service.query()
+        assert ("QUERY_STATUS", "OK") in service.infos()
+        assert service.cursor is None
+
+    @pytest.mark.asyncio
+    async def test_cursor_continues_after_last_window(self, cached_windows):
+        """Test that the cursor points after the last returned window."""
+        service = ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500, maxrec=2)
+        await service.query()
+        assert VOCursor.from_string(service.cursor).after == service.t_start[-1]
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_all_windows(self, cached_windows):
+        """Test that following cursors returns every window exactly once."""
+        starts, after = [], None
+        while True:
+            service = ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500, maxrec=2, after=after)
+            await service.query()
+            starts.extend(service.t_start.tolist())
+            if service.cursor is None:
+                break
+            after = VOCursor.from_string(service.cursor).after
+        assert starts == datetime64_to_mjd(cached_windows).tolist()
+
+    def test_bounds_to_windows_applies_maxrec(self, cached_windows):
+        """Test that MAXREC is applied before conversion."""
+        t_start, _, _ = bounds_to_windows(
+            cached_windows, cached_windows + np.timedelta64(2000, "s"), 0, maxrec=3
+        )
+        assert len(t_start) == 3
+
+
+def _times(*values: str) -> np.ndarray:
+    """Build a datetime64 array from ISO times."""
+    return np.array(values, dtype="datetime64[us]")
+
+
+class TestJointObs:
+    """Tests for joint observability of several positions."""
+
+    @pytest.fixture
+    def joint_windows(self, cached_windows):
+        """Fixture caching windows of a second position, offset by 1000 s from the first."""
+        window_cache.put(
+            ObjObsSAPService(30.0, -10.0, 60000, 60001, 1500).cache_key,
+            (cached_windows + np.timedelta64(1000, "s"), cached_windows + np.timedelta64(3500, "s")),
+        )
+        return cached_windows
+
+    @pytest.mark.asyncio
+    async def test_intersects_cached_windows(self, joint_windows, monkeypatch):
+        """Test that the joint windows are the overlap of cached windows, without upstream calls."""
+        monkeypatch.setattr(service, "fetch_upstream_bounds", None)
+        joint = JointObsService([(10.5, 20.3), (30.0, -10.0)], 60000, 60001, 0)
+        assert joint.cached
+        await joint.query()
+        expected = joint_windows + np.timedelta64(1000, "s")
+        assert joint.t_start.tolist() == datetime64_to_mjd(expected).tolist()
+        assert ((joint.t_stop - joint.t_start) * 86400).round().tolist() == [1000.0] * 5
+
+    @pytest.mark.asyncio
+    async def test_min_obs_applies_to_joint_windows(self, joint_windows):
+        """Test that MIN_OBS filters the joint windows rather than each position's."""
+        joint = JointObsService([(10.5, 20.3), (30.0, -10.0)], 60000, 60001, 1500)
+        await joint.query()
+        assert len(joint.t_start) == 0
+
+    @pytest.mark.asyncio
+    async def test_one_upstream_query_at_a_time(self, monkeypatch):
+        """Test that uncached positions are fetched one after the other."""
+        in_flight, peak = 0, 0
+        lock = threading.Lock()
+
+        def fetch(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return _times(), _times()
+
+        monkeypatch.setattr(service, "fetch_upstream_bounds", fetch)
+        joint = JointObsService([(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)], 60000, 60001, 0)
+        await joint.query()
+        window_cache.clear()
+        assert peak == 1
+
+    def test_infos_list_all_positions(self, joint_windows):
+        """Test that the POS INFO holds every position."""
+        joint = JointObsService([(10.5, 20.3), (30.0, -10.0)], 60000, 60001, 0)
+        assert ("POS", "10.5,20.3;30.0,-10.0") in joint.infos()
+
+
+class TestAdaptiveResolution:
+    """Test class for adaptive resolution upstream queries."""
+
+    def test_merge_bounds_joins_touching(self):
+        """Test that overlapping and touching intervals are merged."""
+        begin, end = merge_bounds(
+            _times("2026-01-01T02", "2026-01-01T00", "2026-01-01T05"),
+            _times("2026-01-01T03", "2026-01-01T02", "2026-01-01T06"),
+        )
+        assert (begin.tolist(), end.tolist()) == (
+            _times("2026-01-01T00", "2026-01-01T05").tolist(),
+            _times("2026-01-01T03", "2026-01-01T06").tolist(),
+        )
+
+    def test_candidate_spans_padded_and_clipped(self):
+        """Test that candidate windows are widened by the margin within the query range."""
+        begin, end = candidate_spans(
+            _times("2026-01-01T01", "2026-01-02T12"),
+            _times("2026-01-01T12", "2026-01-02T13"),
+            np.datetime64("2026-01-01T00", "us"),
+            np.datetime64("2026-01-03T00", "us"),
+            0,
+            margin=7200,
+        )
+        assert begin.tolist() == _times("2026-01-01T00", "2026-01-02T10").tolist()
+        assert end.tolist() == _times("2026-01-01T14", "2026-01-02T15").tolist()
+
+    def test_candidate_spans_skip_short_windows(self):
+        """Test that windows that cannot reach min_obs are skipped."""
+        begin, _ = candidate_spans(
+            _times("2026-01-01T01", "2026-01-02T00"),
+            _times("2026-01-01T02", "2026-01-02T12"),
+            np.datetime64("2026-01-01T00", "us"),
+            np.datetime64("2026-01-03T00", "us"),
+            6 * 3600,
+            margin=1800,
+        )
+        assert begin.tolist() == _times("2026-01-01T23:30").tolist()
+
+    def test_split_span(self):
+        """Test that long spans are split into overlapping pieces of at most the maximum length."""
+        pieces = split_span(np.datetime64("2026-01-01", "us"), np.datetime64("2026-01-31", "us"), 20)
+        assert [str(end) for _, end in pieces] == ["2026-01-21T00:00:00.000000", "2026-01-31T00:00:00.000000"]
+        assert str(pieces[1][0]) == "2026-01-20T23:50:00.000000"
+
+    def test_cache_key_includes_min_obs(self):
+        """Test that adaptive results are cached per MIN_OBS."""
+        adaptive = ObjObsSAPService(10.5, 20.3, 60000, 60001, 1500, adaptive=True)
+        assert adaptive.cache_key[-1] == 1500
+
+    @pytest.mark.asyncio
+    async def test_hires_only_around_candidates(self, monkeypatch):
+        """Test that high resolution queries cover only the candidate windows and are merged."""
+        queries = []
+
+        def fake_fetch(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            queries.append((begin, end, hires))
+            if not hires:
+                return _times("2023-02-25T06"), _times("2023-02-25T12")
+            # A window around noon, cut where the queried span ends
+            window_end = min(np.datetime64(end, "us"), np.datetime64("2023-02-25T13", "us"))
+            return _times("2023-02-25T11"), np.array([window_end])
+
+        monkeypatch.setattr(service, "fetch_upstream_bounds", fake_fetch)
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60001, 0, adaptive=True)
+        begin, end = await vo.fetch_bounds()
+        window_cache.clear()
+        assert [hires for _, _, hires in queries] == [False, True]
+        assert (queries[1][0], queries[1][1]) == (datetime(2023, 2, 25, 3), datetime(2023, 2, 25, 15))
+        assert (begin.tolist(), end.tolist()) == ([datetime(2023, 2, 25, 11)], [datetime(2023, 2, 25, 13)])
+
+
+class TestDeadline:
+    """Tests for the request deadline of upstream queries."""
+
+    @pytest.fixture
+    def slow_upstream(self, monkeypatch):
+        """Fixture replacing the upstream service with one answering late for spans past noon."""
+        starts, stops = _times("2023-02-25T02", "2023-02-25T20"), _times("2023-02-25T03", "2023-02-25T21")
+
+        def fake_fetch(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            if not hires:
+                return starts, stops
+            if np.datetime64(end, "us") > np.datetime64("2023-02-25T12", "us"):
+                time.sleep(0.5)
+            keep = (starts >= np.datetime64(begin, "us")) & (stops <= np.datetime64(end, "us"))
+            return starts[keep], stops[keep]
+
+        monkeypatch.setattr(service, "fetch_upstream_bounds", fake_fetch)
+        yield
+        window_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_gives_partial_result(self, slow_upstream):
+        """Test that an upstream query outliving the deadline gives an uncached, partial result."""
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60001, 0, adaptive=False, deadline=time.monotonic() + 0.05)
+        started = time.monotonic()
+        await vo.query()
+        assert time.monotonic() - started < 0.4
+        assert vo.partial
+        assert len(vo.t_start) == 0
+        assert vo.cache_key not in window_cache
+        infos = dict(vo.infos())
+        assert infos["QUERY_STATUS"] == "OVERFLOW"
+        assert "PARTIAL" in infos
+
+    @pytest.mark.asyncio
+    async def test_keeps_completed_chunks(self, slow_upstream, monkeypatch):
+        """Test that the windows of the pieces fetched before the deadline are returned."""
+        monkeypatch.setattr(service, "UPSTREAM_CHUNK_SPAN", 0.25)
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60001, 0, adaptive=False, deadline=time.monotonic() + 0.2)
+        await vo.query()
+        assert vo.partial
+        assert vo.t_start.tolist() == datetime64_to_mjd(_times("2023-02-25T02")).tolist()
+        assert vo.cache_key not in window_cache
+
+    @pytest.mark.asyncio
+    async def test_one_query_by_default(self, monkeypatch):
+        """Test that the time range is not split unless UPSTREAM_CHUNK_SPAN is set."""
+        queries = []
+
+        def fake_fetch(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            queries.append((begin, end))
+            return _times(), _times()
+
+        monkeypatch.setattr(service, "fetch_upstream_bounds", fake_fetch)
+        monkeypatch.setattr(service, "UPSTREAM_CHUNK_SPAN", 0)
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60030, 0, adaptive=False)
+        await vo.query()
+        window_cache.clear()
+        assert queries == [(datetime(2023, 2, 25), datetime(2023, 3, 27))]
+
+    @pytest.mark.asyncio
+    async def test_window_across_piece_boundary(self, monkeypatch):
+        """Test that a window cut at a piece boundary is joined again before MIN_OBS applies."""
+        start, stop = _times("2023-02-25T21"), _times("2023-02-26T03")
+
+        def fake_fetch(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            # Like the upstream service, only report visibility from the first sample of the piece
+            begin = np.datetime64(begin, "us") + np.timedelta64(1, "m")
+            end = np.datetime64(end, "us")
+            if start >= end or stop <= begin:
+                return _times(), _times()
+            return np.maximum(start, begin), np.minimum(stop, end)
+
+        monkeypatch.setattr(service, "fetch_upstream_bounds", fake_fetch)
+        monkeypatch.setattr(service, "UPSTREAM_CHUNK_SPAN", 1)
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60002, 4 * 3600, adaptive=False)
+        await vo.query()
+        window_cache.clear()
+        assert vo.t_start.tolist() == datetime64_to_mjd(start).tolist()
+        assert vo.t_stop.tolist() == datetime64_to_mjd(stop).tolist()
+
+    @pytest.mark.asyncio
+    async def test_upstream_timeout_bounded_by_deadline(self, monkeypatch):
+        """Test that each upstream query gets at most the remaining budget as its timeout."""
+        timeouts = []
+
+        def fake_fetch(s_ra, s_dec, begin, end, hires=True, timeout=None):
+            timeouts.append(timeout)
+            return _times(), _times()
+
+        monkeypatch.setattr(service, "fetch_upstream_bounds", fake_fetch)
+        monkeypatch.setattr(service, "UPSTREAM_CHUNK_SPAN", 2)
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60003, 0, adaptive=False, deadline=time.monotonic() + 2)
+        await vo.query()
+        window_cache.clear()
+        assert len(timeouts) == 2
+        assert all(0 < timeout <= 2 for timeout in timeouts)
+
+    def test_timeout_passed_to_client(self, monkeypatch):
+        """Test that the upstream client uses the given timeout."""
+        clients = []
+
+        class FakeVisQuery:
+            _timeout = 120
+            entries: list = []
+
+            def __init__(self, **kwargs):
+                clients.append(self)
+
+            def submit_get(self):
+                return True
+
+        monkeypatch.setattr(service, "VisQuery", FakeVisQuery)
+        service.fetch_upstream_bounds(10.5, 20.3, datetime(2023, 2, 25), datetime(2023, 2, 26), timeout=1.5)
+        assert clients[0]._timeout == 1.5
+
+    def test_timeout_skipped_without_client_support(self, monkeypatch):
+        """Test that a client without a settable timeout is queried with its own."""
+
+        class FakeVisQuery:
+            entries: list = []
+
+            def __init__(self, **kwargs):
+                pass
+
+            def submit_get(self):
+                return not hasattr(self, "_timeout")
+
+        monkeypatch.setattr(service, "VisQuery", FakeVisQuery)
+        begin, end = datetime(2023, 2, 25), datetime(2023, 2, 26)
+        bounds = service.fetch_upstream_bounds(10.5, 20.3, begin, end, timeout=1.5)
+        assert bounds is not None
+
+    @pytest.mark.asyncio
+    async def test_adaptive_keeps_completed_pieces(self, slow_upstream):
+        """Test that the windows of completed high resolution queries are returned."""
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60001, 0, adaptive=True, deadline=time.monotonic() + 0.2)
+        await vo.query()
+        assert vo.partial
+        assert vo.t_start.tolist() == datetime64_to_mjd(_times("2023-02-25T02")).tolist()
+
+    @pytest.mark.asyncio
+    async def test_deadline_met(self, slow_upstream):
+        """Test that a query done in time is complete and cached."""
+        vo = ObjObsSAPService(10.5, 20.3, 60000, 60001, 0, adaptive=True, deadline=time.monotonic() + 5)
+        await vo.query()
+        assert not vo.partial
+        assert len(vo.t_start) == 2
+        assert dict(vo.infos())["QUERY_STATUS"] == "OK"
+        assert vo.cache_key in window_cache
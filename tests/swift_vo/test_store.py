@@ -0,0 +1,119 @@
+"""Tests for the precomputed ephemeris store."""
+
+import numpy as np
+import pytest
+
+from swift_vo.build_ephemeris import build, main
+from swift_vo.visibility import ephemeris
+from swift_vo.visibility.ephemeris import compute_ephemeris, evaluate_ephemeris
+from swift_vo.visibility.store import EphemerisStore, open_ephemeris_file
+
+
+@pytest.fixture
+def tle_file(tmp_path, swift_tle):
+    """Fixture writing Swift's TLE to a file."""
+    path = tmp_path / "swift.tle"
+    path.write_text(
+        "SWIFT\n"
+        "1 28485U 04047A   26291.50000000  .00005000  00000-0  20000-3 0  9990\n"
+        "2 28485  20.5560 123.4567 0005000 234.5678 125.4321 15.30000000 10000\n"
+    )
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path, tle_file, swift_tle, monkeypatch):
+    """Fixture building a one day ephemeris file from the TLE epoch, used by compute_ephemeris."""
+    path = str(tmp_path / "ephemeris.bin")
+    build(path, swift_tle.epoch, 1, 60, tle_file)
+    store = EphemerisStore(path)
+    monkeypatch.setattr(ephemeris, "ephemeris_store", store)
+    return store
+
+
+class TestEphemerisFile:
+    """Tests for writing and mapping ephemeris files."""
+
+    def test_round_trip(self, store, swift_tle):
+        """Test that a built file maps back with its grid and TLE."""
+        stored = open_ephemeris_file(store.path)
+        assert len(stored.data) == 1441
+        assert stored.start == swift_tle.epoch
+        assert stored.stop == pytest.approx(swift_tle.epoch + 1)
+        assert stored.tle == swift_tle
+        assert isinstance(stored.data, np.memmap)
+
+    def test_without_tle(self, tmp_path, swift_tle):
+        """Test that a file built without a TLE has no orbit."""
+        path = str(tmp_path / "ephemeris.bin")
+        header = build(path, swift_tle.epoch, 0.1, 60, None)
+        assert header["tle"] is None
+        assert (
+            EphemerisStore(path).lookup(swift_tle.epoch + np.arange(10) / 1440, swift_tle).spacecraft is None
+        )
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file that is not an ephemeris file is not mapped."""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not an ephemeris")
+        with pytest.raises(ValueError):
+            open_ephemeris_file(str(path))
+        assert EphemerisStore(str(path)).lookup(np.array([60000.0])) is None
+
+    def test_main(self, tmp_path, tle_file, swift_tle, capsys):
+        """Test the command line entry point."""
+        path = str(tmp_path / "ephemeris.bin")
+        args = ["--output", path, "--tle", tle_file, "--start", str(swift_tle.epoch), "--days", "0.5"]
+        assert main(args) == 0
+        assert "with Swift's orbit" in capsys.readouterr().out
+        assert len(open_ephemeris_file(path).data) == 721
+
+
+class TestEphemerisStore:
+    """Tests for ephemeris lookups from the store."""
+
+    def test_grid_lookup_is_a_view(self, store, swift_tle):
+        """Test that times on the file's grid are read as views of the file."""
+        mjd = swift_tle.epoch + np.arange(0, 600, 5) / 1440
+        columns = store.lookup(mjd, swift_tle)
+        assert all(np.shares_memory(values, store.current().data) for values in columns)
+
+    def test_matches_computed_ephemeris(self, store, swift_tle):
+        """Test that stored and computed ephemeris agree on the grid and between samples."""
+        for mjd in (swift_tle.epoch + np.arange(120) / 1440, swift_tle.epoch + 0.001 + np.arange(120) / 3000):
+            stored, computed = compute_ephemeris(mjd, swift_tle), evaluate_ephemeris(mjd, swift_tle)
+            assert np.abs(stored.sun - computed.sun).max() < 1
+            assert np.abs(stored.moon - computed.moon).max() < 0.01
+            # Within 0.1 km of the propagated orbit
+            assert np.abs(stored.spacecraft - computed.spacecraft).max() < 0.1
+
+    def test_outside_range_is_computed(self, store, swift_tle):
+        """Test that times the file does not cover are computed."""
+        mjd = swift_tle.epoch + 0.5 + np.arange(1440) / 1440
+        assert store.lookup(mjd) is None
+        assert len(compute_ephemeris(mjd, swift_tle).sun) == 1440
+
+    def test_other_tle_is_propagated(self, store, swift_tle):
+        """Test that the spacecraft is not read from a file built from another TLE."""
+        other = swift_tle._replace(mean_anomaly=swift_tle.mean_anomaly + 1)
+        mjd = swift_tle.epoch + np.arange(60) / 1440
+        assert store.lookup(mjd, other).spacecraft is None
+        assert np.allclose(
+            compute_ephemeris(mjd, other).spacecraft, evaluate_ephemeris(mjd, other).spacecraft
+        )
+
+    def test_reloads_new_version(self, store, tle_file, swift_tle):
+        """Test that a new version renamed over the file is picked up."""
+        first = store.current()
+        build(store.path, swift_tle.epoch + 1, 1, 60, tle_file)
+        assert store.current().header["version"] != first.header["version"]
+        assert store.current().start == swift_tle.epoch + 1
+        # Arrays of the previous version remain readable
+        assert np.isfinite(first.data[:, :3]).all()
+
+    def test_stats(self, store, swift_tle):
+        """Test the reported version and lookup counts."""
+        store.lookup(swift_tle.epoch + np.arange(10) / 1440)
+        stats = store.stats()
+        assert stats["version"] is not None
+        assert stats["hits"] == 1
@@ -0,0 +1,216 @@
+"""Tests for subscriptions to visibility window changes."""
+
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from app import app
+from swift_vo.constants import JOINT_MAX_POSITIONS
+from swift_vo.objobssap import api, service
+from swift_vo.objobssap.api import subscribe
+from swift_vo.objobssap.cache import window_cache
+from swift_vo.objobssap.schema import VOPosition, VOTimeRange
+from swift_vo.objobssap.service import MJD_EPOCH
+from swift_vo.objobssap.subscriptions import SubscriptionRegistry
+
+client = TestClient(app)
+
+KEY = (10.5, 20.3, 60000.0, 60001.0, 0.0)
+
+
+class FakeUpstream:
+    """Stand-in for the upstream service, answering with ``windows`` (hours after MJD 60000)."""
+
+    def __init__(self):
+        self.windows = [(0, 1), (2, 3)]
+        self.fail = False
+        self.queries = 0
+        self.delay = 0.0
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, s_ra, s_dec, begin, end, hires=True, timeout=None):
+        """Answer a query after ``delay`` seconds, or fail."""
+        with self._lock:
+            self.queries += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if self.fail:
+            return None
+        hours = np.array(self.windows, dtype="timedelta64[h]").reshape(-1, 2)
+        start = MJD_EPOCH + np.timedelta64(60000, "D")
+        return start + hours[:, 0], start + hours[:, 1]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fixture replacing the upstream service."""
+    fake = FakeUpstream()
+    monkeypatch.setattr(service, "fetch_upstream_bounds", fake)
+    yield fake
+    window_cache.clear()
+
+
+async def next_event(stream) -> tuple[str, dict]:
+    """Read the next server-sent event of a stream."""
+    message = await asyncio.wait_for(anext(stream), 1)
+    event, data = message.strip().split("\n")
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+class TestSubscriptionRegistry:
+    """Tests for the SubscriptionRegistry class."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_first(self, upstream):
+        """Test that a stream starts with the windows of its target."""
+        registry = SubscriptionRegistry()
+        await registry.watch(KEY)
+        event, data = await next_event(registry.stream([KEY]))
+        assert event == "snapshot"
+        assert data["pos"] == "10.5,20.3"
+        assert len(data["windows"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_one_computation_per_unique_target(self, upstream):
+        """Test that subscribers of the same target share its computation."""
+        registry = SubscriptionRegistry()
+        for _ in range(3):
+            await registry.watch(KEY)
+        streams = [registry.stream([KEY]) for _ in range(3)]
+        for stream in streams:
+            await next_event(stream)
+        await registry.refresh()
+        assert upstream.queries == 2
+        assert registry.stats()["subscribers"] == 3
+
+    @pytest.mark.asyncio
+    async def test_pushes_only_changes(self, upstream):
+        """Test that a refresh pushes the windows added and removed."""
+        registry = SubscriptionRegistry()
+        await registry.watch(KEY)
+        stream = registry.stream([KEY])
+        await next_event(stream)
+        upstream.windows = [(0, 1), (4, 5)]
+        await registry.refresh()
+        event, data = await next_event(stream)
+        assert event == "update"
+        assert data["added"] == [[60000 + 4 / 24, 60000 + 5 / 24]]
+        assert data["removed"] == [[60000 + 2 / 24, 60000 + 3 / 24]]
+
+    @pytest.mark.asyncio
+    async def test_no_event_without_changes(self, upstream):
+        """Test that unchanged windows push nothing."""
+        registry = SubscriptionRegistry(keepalive=0.01)
+        await registry.watch(KEY)
+        stream = registry.stream([KEY])
+        await next_event(stream)
+        await registry.refresh()
+        assert registry.updates == 0
+        assert await anext(stream) == ": keepalive\n\n"
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_windows(self, upstream):
+        """Test that a failed upstream query does not remove windows."""
+        registry = SubscriptionRegistry()
+        await registry.watch(KEY)
+        stream = registry.stream([KEY])
+        await next_event(stream)
+        upstream.fail = True
+        await registry.refresh()
+        assert len(registry.targets[KEY].windows) == 2
+        assert registry.updates == 0
+
+    @pytest.mark.asyncio
+    async def test_refresh_concurrency_bounded(self, upstream):
+        """Test that a refresh has at most max_concurrent upstream queries in flight."""
+        registry = SubscriptionRegistry(max_concurrent=2)
+        keys = [(float(ra), 20.3, 60000.0, 60001.0, 0.0) for ra in range(6)]
+        for key in keys:
+            await registry.watch(key)
+        stream = registry.stream(keys)
+        await next_event(stream)
+        upstream.delay, upstream.peak = 0.02, 0
+        await registry.refresh()
+        assert upstream.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_forgets_unsubscribed_targets(self, upstream):
+        """Test that targets without subscribers are dropped at the next refresh."""
+        registry = SubscriptionRegistry()
+        await registry.watch(KEY)
+        stream = registry.stream([KEY])
+        await next_event(stream)
+        await stream.aclose()
+        await registry.refresh()
+        assert registry.targets == {}
+
+    @pytest.mark.asyncio
+    async def test_refresh_on_new_version(self, upstream, monkeypatch):
+        """Test that a new TLE or ephemeris version triggers a refresh."""
+        registry = SubscriptionRegistry(check_interval=0.01)
+        await registry.watch(KEY)
+        stream = registry.stream([KEY])
+        await next_event(stream)
+        registry.start()
+        monkeypatch.setattr(SubscriptionRegistry, "version", staticmethod(lambda: ("new",)))
+        upstream.windows = [(0, 1)]
+        event, _ = await next_event(stream)
+        await registry.stop()
+        assert event == "update"
+
+    @pytest.mark.asyncio
+    async def test_stream_does_not_query_upstream(self, upstream):
+        """Test that streaming a target forgotten since it was watched needs no upstream query."""
+        registry = SubscriptionRegistry()
+        await registry.watch(KEY)
+        await registry.refresh()
+        assert registry.targets == {}
+        _, data = await next_event(registry.stream([KEY]))
+        assert upstream.queries == 1
+        assert len(data["windows"]) == 2
+        window_cache.clear()
+        _, data = await next_event(registry.stream([(30.0, -10.0, 60000.0, 60001.0, 0.0)]))
+        assert upstream.queries == 1
+        assert data["windows"] == []
+
+    @pytest.mark.asyncio
+    async def test_stop_ends_streams(self, upstream):
+        """Test that stopping the registry ends the event streams."""
+        registry = SubscriptionRegistry()
+        await registry.watch(KEY)
+        stream = registry.stream([KEY])
+        await next_event(stream)
+        await registry.stop()
+        with pytest.raises(StopAsyncIteration):
+            await anext(stream)
+
+
+class TestSubscribeEndpoint:
+    """Tests for the subscription endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_event_stream(self, upstream, monkeypatch):
+        """Test that the endpoint streams snapshots of every position."""
+        monkeypatch.setattr(api, "subscription_registry", SubscriptionRegistry())
+        request = Request({"type": "http", "headers": [], "client": ("127.0.0.1", 1)})
+        positions = [VOPosition(s_ra=10.5, s_dec=20.3), VOPosition(s_ra=30.0, s_dec=-10.0)]
+        response = await subscribe(request, positions, VOTimeRange(t_min=60000, t_max=60001), 0.0)
+        assert response.media_type == "text/event-stream"
+        events = [await next_event(response.body_iterator) for _ in positions]
+        assert [data["pos"] for _, data in events] == ["10.5,20.3", "30.0,-10.0"]
+
+    def test_too_many_positions(self):
+        """Test that too many positions are rejected."""
+        params = [("POS", "1,2")] * (JOINT_MAX_POSITIONS + 1)
+        assert client.get("/objobssap/subscribe", params=params).status_code == 422
@@ -0,0 +1,161 @@
+"""Tests for the local evaluation of Swift's visibility constraints."""
+
+import numpy as np
+import pytest
+
+from swift_vo.visibility.constraints import (
+    mask_to_windows,
+    masks_to_windows,
+    observable_mask,
+    radec_to_vectors,
+)
+from swift_vo.visibility.ephemeris import compute_ephemeris
+from swift_vo.visibility.healpix import moc_cells, moc_to_ascii, moc_uniq, npix, pixel_radec
+from swift_vo.visibility.orbit import EARTH_RADIUS, propagate
+from swift_vo.visibility.sky import summarize_mask
+from swift_vo.visibility.targets import target_windows
+
+
+class TestOrbit:
+    """Tests for the TLE parsing and propagation."""
+
+    def test_epoch(self, swift_tle):
+        """Test that the TLE epoch is converted to MJD."""
+        assert swift_tle.epoch == 61331.5
+
+    def test_altitude(self, swift_tle):
+        """Test that the propagated orbit is at Swift's altitude."""
+        position, _ = propagate(swift_tle, swift_tle.epoch + np.linspace(0, 1, 50))
+        altitude = np.linalg.norm(position, axis=1) - EARTH_RADIUS
+        assert np.all((altitude > 400) & (altitude < 600))
+
+    def test_inclination(self, swift_tle):
+        """Test that the orbital plane has the TLE's inclination."""
+        position, velocity = propagate(swift_tle, swift_tle.epoch + np.array([0.1]))
+        momentum = np.cross(position, velocity)[0]
+        assert np.degrees(np.arccos(momentum[2] / np.linalg.norm(momentum))) == pytest.approx(20.556)
+
+
+class TestConstraints:
+    """Tests for the constraint evaluation."""
+
+    @pytest.fixture
+    def ephemeris(self):
+        """Sun and Moon ephemeris over one hour."""
+        return compute_ephemeris(60000 + np.arange(60) / 1440)
+
+    def test_sun_is_not_observable(self, ephemeris):
+        """Test that the direction of the Sun is never observable."""
+        sun = ephemeris.sun[0] / np.linalg.norm(ephemeris.sun[0])
+        assert not observable_mask(sun[None, :], ephemeris).any()
+
+    def test_anti_sun_is_observable(self, ephemeris):
+        """Test that the direction opposite the Sun is observable without an orbit."""
+        sun = ephemeris.sun[0] / np.linalg.norm(ephemeris.sun[0])
+        assert observable_mask(-sun[None, :], ephemeris).all()
+
+    def test_mask_shape(self, ephemeris):
+        """Test that the mask has one row per time and one column per target."""
+        targets = radec_to_vectors([0, 90, 180], [0, 10, -10])
+        assert observable_mask(targets, ephemeris).shape == (60, 3)
+
+    def test_earth_blocks_nadir(self, swift_tle):
+        """Test that a target straight below the spacecraft is not observable."""
+        ephemeris = compute_ephemeris(swift_tle.epoch + np.array([0.0]), swift_tle)
+        nadir = -ephemeris.spacecraft[0] / np.linalg.norm(ephemeris.spacecraft[0])
+        assert not observable_mask(nadir[None, :], ephemeris).any()
+
+    def test_mask_to_windows(self):
+        """Test that runs of observable samples become windows."""
+        mjd = 60000 + np.arange(6) / 1440
+        t_start, t_stop = mask_to_windows(np.array([True, True, False, False, True, False]), mjd, 60)
+        assert t_start.tolist() == [mjd[0], mjd[4]]
+        assert t_stop.tolist() == pytest.approx([mjd[2], mjd[5]])
+
+
+class TestMultiTarget:
+    """Tests for the multi-target visibility evaluation."""
+
+    def test_masks_to_windows_matches_single_target(self):
+        """Test that each target's windows match the single target conversion."""
+        mjd = 60000 + np.arange(200) / 1440
+        mask = np.random.default_rng(1).random((200, 7)) < 0.6
+        windows = masks_to_windows(mask, mjd, 60)
+        for column, (t_start, t_stop) in enumerate(windows):
+            expected = mask_to_windows(mask[:, column], mjd, 60)
+            assert t_start.tolist() == expected[0].tolist()
+            assert t_stop.tolist() == expected[1].tolist()
+
+    def test_masks_to_windows_min_obs(self):
+        """Test that windows shorter than min_obs are dropped for every target."""
+        mjd = 60000 + np.arange(6) / 1440
+        mask = np.array(
+            [[True, True], [True, False], [False, True], [False, True], [True, True], [False, True]]
+        )
+        windows = masks_to_windows(mask, mjd, 60, min_obs=120)
+        assert [len(t_start) for t_start, _ in windows] == [1, 1]
+
+    def test_unobservable_target_has_no_windows(self):
+        """Test that a target that is never observable gets empty window arrays."""
+        mask = np.zeros((10, 3), dtype=bool)
+        mask[2:5, 1] = True
+        windows = masks_to_windows(mask, 60000 + np.arange(10) / 1440, 60)
+        assert [len(t_start) for t_start, _ in windows] == [0, 1, 0]
+
+    def test_target_windows_match_single_evaluation(self, swift_tle):
+        """Test that evaluating many targets together matches evaluating each alone."""
+        mjd = swift_tle.epoch + np.arange(300) / 1440
+        rng = np.random.default_rng(2)
+        ra, dec = rng.uniform(0, 360, 300), rng.uniform(-90, 90, 300)
+        windows = target_windows(ra, dec, mjd, 60, swift_tle)
+        assert len(windows) == 300
+        ephemeris = compute_ephemeris(mjd, swift_tle)
+        for index in (0, 150, 299):
+            mask = observable_mask(radec_to_vectors(ra[index], dec[index]), ephemeris)[:, 0]
+            assert windows[index][0].tolist() == mask_to_windows(mask, mjd, 60)[0].tolist()
+
+
+class TestHealpix:
+    """Tests for the HEALPix grid and MOC serialization."""
+
+    def test_base_pixel_centre(self):
+        """Test the centre of the first base pixel."""
+        ra, dec = pixel_radec(0, np.array([0]))
+        assert (ra[0], dec[0]) == pytest.approx((45.0, np.degrees(np.arcsin(2 / 3))))
+
+    def test_pixel_count(self):
+        """Test that every pixel has a centre."""
+        ra, _ = pixel_radec(3)
+        assert len(ra) == npix(3)
+
+    def test_full_sky_normalizes_to_base_pixels(self):
+        """Test that a complete sky collapses to the twelve order 0 cells."""
+        cells = moc_cells(2, np.arange(npix(2)))
+        assert cells[0].tolist() == list(range(12)) and not len(cells[2])
+
+    def test_uniq(self):
+        """Test the NUNIQ indices of MOC cells."""
+        assert moc_uniq({0: np.array([1]), 1: np.array([0])}).tolist() == [5, 16]
+
+    def test_ascii(self):
+        """Test the MOC ASCII serialization with ranges and the MOC order."""
+        cells = moc_cells(3, np.array([0, 1, 2, 3, 9, 10]))
+        assert moc_to_ascii(cells, 3) == "2/0 3/9-10"
+
+
+class TestRunSummary:
+    """Tests for the run summaries of the sky."""
+
+    def test_longest_run(self):
+        """Test the longest run of observable samples."""
+        mask = np.array([[1, 0], [1, 1], [0, 1], [1, 1]], dtype=bool)
+        assert summarize_mask(mask).longest.tolist() == [2, 3]
+
+    def test_combined_chunks_match_whole(self):
+        """Test that combining chunk summaries matches summarizing the whole mask."""
+        mask = np.random.default_rng(0).random((40, 5)) < 0.7
+        whole = summarize_mask(mask)
+        combined = summarize_mask(mask[:13]) + summarize_mask(mask[13:21]) + summarize_mask(mask[21:])
+        assert combined.longest.tolist() == whole.longest.tolist()
+        assert combined.leading.tolist() == whole.leading.tolist()
+        assert combined.trailing.tolist() == whole.trailing.tolist()
@@ -0,0 +1,57 @@
+"""Tests for event loop stall detection."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from swift_vo.base.watchdog import LoopStallWatchdog
+
+client = TestClient(app)
+
+
+def _block_loop(seconds: float) -> None:
+    """Block the calling thread, standing in for blocking code on the event loop."""
+    time.sleep(seconds)
+
+
+class TestLoopStallWatchdog:
+    """Tests for the LoopStallWatchdog class."""
+
+    @pytest.mark.asyncio
+    async def test_detects_stall_with_stack(self):
+        """Test that a blocked loop is reported with the stack of the blocking code."""
+        watchdog = LoopStallWatchdog(threshold=0.05)
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        _block_loop(0.3)
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+        assert watchdog.stalls == 1
+        assert "_block_loop" in watchdog.reports[0]["stack"]
+
+    @pytest.mark.asyncio
+    async def test_stall_duration_updated_when_loop_resumes(self):
+        """Test that a reported stall records its full duration."""
+        watchdog = LoopStallWatchdog(threshold=0.05)
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        _block_loop(0.3)
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+        assert watchdog.reports[0]["blocked_ms"] >= 250
+
+    @pytest.mark.asyncio
+    async def test_no_stall_when_responsive(self):
+        """Test that a responsive loop is not reported."""
+        watchdog = LoopStallWatchdog(threshold=0.2)
+        watchdog.start()
+        await asyncio.sleep(0.3)
+        await watchdog.stop()
+        assert watchdog.stalls == 0
+
+    def test_stalls_in_metrics(self):
+        """Test that the metrics endpoint reports event loop stalls."""
+        assert "stalls" in client.get("/metrics").json()["event_loop_stalls"]